@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Modüller düz içe aktarmayla (from database import ...) birbirini bulur; app2.py de
+# bu klasörden doğrudan çalıştırılır.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+sys.exit(main())
@@ -0,0 +1,215 @@
+"""Çalışan veritabanının çevrimiçi yedeği ve yedekten geri yükleme.
+
+Yedek, sqlite3.Connection.backup ile sayfa grupları halinde alınır. Kaynak
+bağlantıda açık tutulan okuma işlemi (WAL kipinde) tutarlı bir anlık görüntü
+sağlar; diğer bağlantılar bu sırada yazmaya devam edebilir. Kopya bütünlük
+denetiminden geçtikten sonra gzip ile sıkıştırılır, yanına SHA-256 özeti yazılır
+ve en eski yedekler silinir.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+SNAPSHOT_SUFFIX = ".db.gz"
+CHECKSUM_SUFFIX = ".sha256"
+
+# Her backup adımında kopyalanan sayfa sayısı ve adımlar arası bekleme
+PAGES_PER_STEP = 1024
+STEP_SLEEP = 0.005
+
+
+class BackupError(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _integrity_problems(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [msg for (msg,) in conn.execute("PRAGMA integrity_check") if msg != "ok"]
+    finally:
+        conn.close()
+
+
+class BackupManager:
+    def __init__(self, db_path, backup_dir=None, keep=24, pages_per_step=PAGES_PER_STEP, step_sleep=STEP_SLEEP):
+        self.db_path = db_path
+        self.backup_dir = backup_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), "backups")
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self._lock = threading.Lock()
+
+    @property
+    def prefix(self):
+        return os.path.splitext(os.path.basename(self.db_path))[0] + "-"
+
+    def list_snapshots(self):
+        """Yedek dosyaları, eskiden yeniye."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        names = sorted(n for n in os.listdir(self.backup_dir)
+                       if n.startswith(self.prefix) and n.endswith(SNAPSHOT_SUFFIX))
+        return [os.path.join(self.backup_dir, n) for n in names]
+
+    def _snapshot_path(self):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.backup_dir, f"{self.prefix}{stamp}{SNAPSHOT_SUFFIX}")
+        counter = 1
+        while os.path.exists(path):
+            counter += 1
+            path = os.path.join(self.backup_dir, f"{self.prefix}{stamp}-{counter}{SNAPSHOT_SUFFIX}")
+        return path
+
+    def create_snapshot(self, progress=None):
+        """Yeni bir yedek alır ve yolunu döner. progress(kalan_sayfa, toplam_sayfa)."""
+        with self._lock:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            target = self._snapshot_path()
+            partial_db = target[:-len(SNAPSHOT_SUFFIX)] + ".partial.db"
+            partial_gz = target + ".partial"
+            try:
+                self._copy_database(partial_db, progress)
+                problems = _integrity_problems(partial_db)
+                if problems:
+                    raise BackupError("yedek bütünlük denetiminden geçemedi: " + "; ".join(problems[:5]))
+                with open(partial_db, "rb") as src, gzip.open(partial_gz, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                checksum = _sha256(partial_gz)
+                os.replace(partial_gz, target)
+                with open(target + CHECKSUM_SUFFIX, "w", encoding="ascii") as f:
+                    f.write(f"{checksum}  {os.path.basename(target)}\n")
+            finally:
+                for leftover in (partial_db, partial_gz):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            self.rotate()
+            return target
+
+    def _copy_database(self, dest_path, progress=None):
+        source = sqlite3.connect(self.db_path)
+        dest = sqlite3.connect(dest_path)
+        try:
+            # Okuma işlemini açık tutmak kopyanın tek bir anın görüntüsü olmasını sağlar
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(dest, pages=self.pages_per_step, sleep=self.step_sleep,
+                          progress=(lambda status, remaining, total: progress(remaining, total)) if progress else None)
+            source.rollback()
+            # Yedek tek dosya olsun (kaynak WAL kipinde olsa da)
+            dest.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dest.close()
+            source.close()
+
+    def rotate(self):
+        snapshots = self.list_snapshots()
+        for path in snapshots[:max(0, len(snapshots) - self.keep)]:
+            for victim in (path, path + CHECKSUM_SUFFIX):
+                if os.path.exists(victim):
+                    os.remove(victim)
+
+    def verify_snapshot(self, path):
+        """Özet ve bütünlük denetimi; sorunların listesini döner (boşsa yedek sağlam)."""
+        problems = []
+        checksum_file = path + CHECKSUM_SUFFIX
+        if os.path.exists(checksum_file):
+            with open(checksum_file, encoding="ascii") as f:
+                expected = f.read().split()[0]
+            if _sha256(path) != expected:
+                problems.append("SHA-256 özeti uyuşmuyor")
+                return problems
+        else:
+            problems.append("özet dosyası yok")
+        with _Decompressed(path) as db_path:
+            problems.extend(_integrity_problems(db_path))
+        return problems
+
+    def restore(self, path, target_path=None):
+        """Yedeği target_path'e (varsayılan: db_path) geri yükler.
+
+        Hedef dosya varsa önce onun yedeği alınır; geri yükleme backup API'si ile
+        tek işlemde yapılır, böylece açık bağlantılar yarım bir dosya görmez. Hedef
+        okunamayacak kadar bozuksa yedeği alınamaz; WAL dosyalarıyla birlikte yanına
+        taşınır ve yeni yolu döner (aksi halde None).
+        """
+        target_path = target_path or self.db_path
+        problems = self.verify_snapshot(path)
+        if any(p != "özet dosyası yok" for p in problems):
+            raise BackupError("yedek doğrulanamadı: " + "; ".join(problems[:5]))
+        set_aside = None
+        if os.path.exists(target_path) and os.path.abspath(target_path) == os.path.abspath(self.db_path):
+            try:
+                self.create_snapshot()
+            except (sqlite3.DatabaseError, BackupError):
+                set_aside = _set_aside(target_path)
+        with _Decompressed(path) as db_path:
+            source = sqlite3.connect(db_path)
+            dest = sqlite3.connect(target_path)
+            try:
+                source.backup(dest, pages=self.pages_per_step, sleep=self.step_sleep)
+            finally:
+                dest.close()
+                source.close()
+        return set_aside
+
+
+def _set_aside(path):
+    """Bozuk veritabanını (ve -wal/-shm dosyalarını) silmeden path.corrupt-<zaman> adına taşır."""
+    aside = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.replace(path + suffix, aside + suffix)
+    return aside
+
+
+class _Decompressed:
+    """Sıkıştırılmış yedeği geçici bir dosyaya açar, çıkışta siler."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + f".{os.getpid()}.restore.db"
+
+    def __enter__(self):
+        with gzip.open(self.path, "rb") as src, open(self.tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        return self.tmp
+
+    def __exit__(self, *exc):
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+class BackupScheduler(threading.Thread):
+    """Belirli aralıklarla arka planda yedek alan iş parçacığı."""
+
+    def __init__(self, manager, interval_seconds, on_error=None):
+        super().__init__(name="backup-scheduler", daemon=True)
+        self.manager = manager
+        self.interval = interval_seconds
+        self.on_error = on_error
+        self.last_snapshot = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # aralık, bir yedeğin bitişiyle sonrakinin başlangıcı arasındaki süredir
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.last_snapshot = self.manager.create_snapshot()
+            except Exception as exc:
+                if self.on_error:
+                    self.on_error(exc)
+
+    def stop(self):
+        self._stop_event.set()
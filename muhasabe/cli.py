@@ -0,0 +1,551 @@
+"""Komut satırı arayüzü: python -m muhasabe [--db customers.db] <komut> ...
+
+PyQt yüklenmez; her komut yalnızca ihtiyaç duyduğu modülleri içe aktarır ki
+betiklerden binlerce kez çağrıldığında açılış maliyeti düşük kalsın.
+"""
+import argparse
+import os
+import sys
+
+from database import DB_NAME, Database, SearchIndexPending
+
+CUSTOMER_FIELDS = ["id", "first_name", "last_name", "tc_no", "phone", "address", "notes", "debt"]
+
+
+def _open_output(path):
+    if not path or path == "-":
+        return sys.stdout
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def _write_rows(rows, fields, fmt, output):
+    out = _open_output(output)
+    try:
+        if fmt == "csv":
+            import csv
+            writer = csv.writer(out)
+            writer.writerow(fields)
+            for row in rows:
+                writer.writerow(row)
+        else:
+            import json
+            for row in rows:
+                out.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False))
+                out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+
+def _filters(args):
+    return {
+        'type': args.type,
+        'payment': args.payment,
+        'start_date': args.start,
+        'end_date': args.end,
+        'search': args.search,
+    }
+
+
+def cmd_customers(db, args):
+    _write_rows(db.iter_customers(args.search), CUSTOMER_FIELDS, args.format, args.output)
+    return 0
+
+
+def cmd_transactions(db, args):
+    from exporters import export_transactions, transaction_fields
+
+    if args.output and args.output != "-":
+        count = export_transactions(db, args.output, args.format, args.customer, _filters(args))
+        print(f"{count} hareket yazıldı: {args.output}", file=sys.stderr)
+        return 0
+    if args.format == "xlsx":
+        print("xlsx çıktısı için -o ile dosya belirtin", file=sys.stderr)
+        return 2
+    with_balance = args.customer is not None
+    rows = db.iter_transactions(args.customer, _filters(args), with_balance=with_balance)
+    _write_rows(rows, transaction_fields(with_balance), args.format, args.output)
+    return 0
+
+
+def cmd_import(db, args):
+    import csv
+
+    with open(args.file, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if args.kind == "customers":
+            rows = ((r["first_name"], r["last_name"], r.get("tc_no"), r.get("phone"),
+                     r.get("address"), r.get("notes"), r.get("debt") or 0) for r in reader)
+            count = db.import_customers(rows)
+        else:
+            rows = ((int(r["customer_id"]), r["amount"], r.get("description"), r["transaction_type"],
+                     r["payment_type"], r.get("date") or None) for r in reader)
+            count = db.import_transactions(rows)
+    print(f"{count} kayıt içe aktarıldı", file=sys.stderr)
+    return 0
+
+
+def cmd_report(db, args):
+    totals = db.get_period_totals(args.customer, _filters(args))
+    report = {
+        'customer_count': db.conn.execute("SELECT customer_count FROM customer_totals WHERE id = 1").fetchone()[0],
+        'total_customer_debt': db.get_total_debt(),
+        'transaction_count': totals['count'],
+        'total_paid': totals['total_paid'],
+        'total_debt': totals['total_debt'],
+    }
+    if args.customer is not None:
+        report.update(db.get_transaction_stats(args.customer))
+    if args.json:
+        import json
+        print(json.dumps(report, ensure_ascii=False))
+    else:
+        for key, value in report.items():
+            print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+    return 0
+
+
+def cmd_verify(db, args):
+    problems = db.verify()
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if not problems:
+        print("ok")
+    return 1 if problems else 0
+
+
+def cmd_backup(db, args):
+    # Database açılmaz: kopyalama dosya üzerinden yapılır, geri yükleme ise tam da
+    # veritabanı eksik ya da bozukken gerekir
+    from backup import BackupError, BackupManager
+
+    manager = BackupManager(args.db, args.dir, keep=args.keep)
+    if args.action == "create":
+        if not os.path.exists(args.db):
+            print(f"veritabanı bulunamadı: {args.db}", file=sys.stderr)
+            return 2
+        print(manager.create_snapshot())
+    elif args.action == "list":
+        for path in manager.list_snapshots():
+            print(path)
+    elif args.action == "verify":
+        snapshots = [args.snapshot] if args.snapshot else manager.list_snapshots()
+        failed = False
+        for path in snapshots:
+            problems = manager.verify_snapshot(path)
+            failed = failed or bool(problems)
+            print(f"{path}: {'ok' if not problems else '; '.join(problems)}")
+        return 1 if failed else 0
+    else:
+        if not args.snapshot:
+            print("geri yüklenecek yedek dosyasını belirtin", file=sys.stderr)
+            return 2
+        try:
+            set_aside = manager.restore(args.snapshot)
+        except BackupError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        if set_aside:
+            print(f"bozuk veritabanı okunamadı, kenara alındı: {set_aside}", file=sys.stderr)
+        print(f"{args.snapshot} -> {args.db}")
+    return 0
+
+
+def cmd_sync(db, args):
+    import sync
+
+    if args.action in ("export", "apply") and not args.file:
+        print("değişiklik dosyasını belirtin", file=sys.stderr)
+        return 2
+    if args.action == "export":
+        count = sync.export_changes(db, args.file, peer=args.peer, since=args.since)
+        print(f"{count} değişiklik yazıldı: {args.file}", file=sys.stderr)
+    elif args.action == "apply":
+        try:
+            stats = sync.apply_changes(db, args.file)
+        except sync.SyncError as exc:
+            print(f"eşitleme hatası: {exc}", file=sys.stderr)
+            return 1
+        print(f"uygulanan: {stats['applied']}, atlanan: {stats['skipped']}, çözümlenemeyen: {stats['unresolved']}")
+    elif args.action == "status":
+        print(f"node: {sync.node_id(db, create=False) or '-'}")
+        print(f"günlük konumu: {sync.journal_position(db)}")
+        for peer, seq in db.conn.execute("SELECT peer, last_seq FROM sync_sent ORDER BY peer"):
+            print(f"gönderilen {peer}: {seq}")
+        for origin, seq in db.conn.execute("SELECT origin, last_seq FROM sync_received ORDER BY origin"):
+            print(f"alınan {origin}: {seq}")
+    else:
+        print(f"{sync.prune_journal(db)} günlük kaydı silindi")
+    return 0
+
+
+AUDIT_FIELDS = ["id", "at", "user", "table_name", "row_id", "action", "old", "new"]
+
+
+def cmd_audit(db, args):
+    rows = db.iter_audit(args.table, args.row, args.user, args.start, args.end)
+    if args.format == "jsonl":
+        import json
+        # eski/yeni değerler metin olarak değil iç içe nesne olarak yazılsın
+        rows = (row[:6] + tuple(json.loads(v) if v else None for v in row[6:]) for row in rows)
+    _write_rows(rows, AUDIT_FIELDS, args.format, args.output)
+    return 0
+
+
+def cmd_maintenance(db, args):
+    result = db.sweep(purge_deleted=args.purge_deleted)
+    print(f"silinen sahipsiz hareket: {result['orphans']}")
+    if args.purge_deleted:
+        print(f"kalıcı olarak silinen müşteri: {result['purged']}")
+    print(f"dosya boyutu: {result['size_before']:,} -> {result['size_after']:,} bayt")
+    return 0
+
+
+def cmd_migrate(db, args):
+    import migrations
+
+    if args.action == "status":
+        applied = dict(db.conn.execute("SELECT version, applied_at FROM schema_version"))
+        for migration in migrations.MIGRATIONS:
+            if migration.version in applied:
+                state = f"uygulandı {applied[migration.version]}"
+            else:
+                done, total = migration.completed(db)
+                state = f"bekliyor %{100 * done // total}" if done and total else "bekliyor"
+            print(f"{migration.version}\t{state}\t{migration.name}")
+        return 0
+
+    shown = {}
+
+    def progress(migration, done, total):
+        percent = 100 * done // total if total else 100
+        if shown.get(migration.version) == percent:
+            return
+        shown[migration.version] = percent
+        print(f"\r{migration.version} {migration.name}: %{percent}", end="", file=sys.stderr, flush=True)
+        if done >= total:
+            print(file=sys.stderr)
+
+    try:
+        migrations.migrate(db, progress)
+    except KeyboardInterrupt:
+        print("\nyarıda kesildi; yeniden çalıştırıldığında kaldığı yerden devam eder", file=sys.stderr)
+        return 1
+    print(f"şema sürümü: {migrations.current_version(db)}", file=sys.stderr)
+    return 0
+
+
+def cmd_dedupe(db, args):
+    import dedupe
+
+    if args.action == "merge":
+        if len(args.ids) != 2:
+            print("merge için korunacak ve birleştirilecek müşteri id'lerini verin", file=sys.stderr)
+            return 2
+        try:
+            db.merge_customers(*args.ids)
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print(f"{args.ids[1]} -> {args.ids[0]} birleştirildi")
+        return 0
+    candidates = dedupe.find_duplicates(db, threshold=args.threshold)
+    names = {r[0]: f"{r[1]} {r[2]}" for r in db.get_customers_by_ids(
+        {c.keep_id for c in candidates} | {c.merge_id for c in candidates})}
+    for c in candidates[:args.limit]:
+        print(f"{c.score:.2f}\t{c.keep_id} {names[c.keep_id]}\t{c.merge_id} {names[c.merge_id]}\t{', '.join(c.reasons)}")
+    print(f"{len(candidates)} olası mükerrer çift", file=sys.stderr)
+    return 0
+
+
+RECONCILE_LINE_FIELDS = ["id", "line_no", "date", "amount", "reference", "description", "status",
+                         "transaction_id", "score"]
+
+
+def cmd_reconcile(db, args):
+    import reconcile
+    from exporters import TRANSACTION_FIELDS
+
+    try:
+        if args.action in ("confirm", "reject"):
+            if not args.ids:
+                print(f"{args.action} için ekstre satırı id'si verin", file=sys.stderr)
+                return 2
+            if args.action == "confirm":
+                reconcile.confirm(db, *args.ids[:2])
+            else:
+                reconcile.reject(db, args.ids[0])
+            return 0
+        if args.action == "import":
+            if not args.file:
+                print("import için ekstre dosyası verin", file=sys.stderr)
+                return 2
+            summary = reconcile.import_statement(db, args.file, args.window, args.fuzzy_window, args.tolerance)
+        else:
+            if not args.ids:
+                print(f"{args.action} için ekstre id'si verin", file=sys.stderr)
+                return 2
+            statement_id = args.ids[0]
+            if args.action == "lines":
+                _write_rows(reconcile.iter_lines(db, statement_id, args.status), RECONCILE_LINE_FIELDS,
+                            args.format, args.output)
+                return 0
+            if args.action == "unmatched":
+                _write_rows(reconcile.iter_unmatched_transactions(db, statement_id), TRANSACTION_FIELDS,
+                            args.format, args.output)
+                return 0
+            summary = reconcile.match_statement(db, statement_id, args.window, args.fuzzy_window, args.tolerance)
+    except ValueError as exc:
+        # StatementError dahil: okunamayan ekstre, bilinmeyen satır/ekstre
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"ekstre {summary.statement_id}: {summary.lines} satır, {summary.matched} eşleşti, "
+          f"{summary.proposed} öneri, {summary.unmatched_lines} eşleşmeyen satır, "
+          f"{summary.unmatched_transactions} eşleşmeyen kartlı hareket")
+    return 0
+
+
+def cmd_shards(registry, args):
+    from exporters import TRANSACTION_FIELDS
+    from shards import ShardError
+
+    names = args.only or None
+    try:
+        if args.action == "list":
+            for name in registry.names():
+                print(f"{name}\t{registry.path_of(name)}")
+        elif args.action == "add":
+            if not args.name:
+                print("add için shard adı verin", file=sys.stderr)
+                return 2
+            print(f"{args.name}: {registry.add(args.name, args.file)}", file=sys.stderr)
+        elif args.action == "remove":
+            if not args.name:
+                print("remove için shard adı verin", file=sys.stderr)
+                return 2
+            registry.remove(args.name)
+        elif args.action == "report":
+            per_shard, combined = registry.report(_filters(args), names)
+            if args.json:
+                import json
+                print(json.dumps({'shards': per_shard, 'total': combined}, ensure_ascii=False))
+            else:
+                for name, report in list(per_shard.items()) + [("toplam", combined)]:
+                    print(f"[{name}]")
+                    for key, value in report.items():
+                        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value}")
+        elif args.action == "search":
+            rows = registry.search_customers(args.name, args.limit, names)
+            _write_rows(rows, ["shard"] + CUSTOMER_FIELDS, args.format, args.output)
+        else:
+            rows = registry.iter_transactions(_filters(args), args.limit, names)
+            _write_rows(rows, ["shard"] + list(TRANSACTION_FIELDS), args.format, args.output)
+    except ShardError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_plans(db, args):
+    import queryplan
+
+    def progress(message):
+        print(message, file=sys.stderr)
+
+    results = queryplan.check(args.rows, args.scale, args.repeat, args.keep, progress)
+    failures = queryplan.report(results, verbose=args.verbose)
+    if failures:
+        print(f"{failures} senaryoda sorun var", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def cmd_serve(db, args):
+    from server import serve
+
+    # sunucu kendi bağlantılarını açar
+    db.conn.close()
+    serve(args.db, host=args.host, port=args.port, read_workers=args.read_workers,
+          batch_ms=args.batch_ms, batch_size=args.batch_size)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m muhasabe", description="Müşteri ve muhasebe veritabanı araçları")
+    parser.add_argument("--db", default=DB_NAME, help=f"veritabanı dosyası (varsayılan: {DB_NAME})")
+    parser.add_argument("--registry", help="shard kaydı (varsayılan: $MUHASABE_SHARDS ya da shards.json)")
+    parser.add_argument("--shard", help="--db yerine kayıttaki bu ajansın veritabanı")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_filter_args(p):
+        p.add_argument("--customer", type=int, help="yalnızca bu müşteri id'si")
+        p.add_argument("--type", choices=["income", "expense"])
+        p.add_argument("--payment", choices=["cash", "card"])
+        p.add_argument("--from", dest="start", metavar="YYYY-MM-DD")
+        p.add_argument("--to", dest="end", metavar="YYYY-MM-DD")
+        p.add_argument("--search", metavar="METİN", help="açıklamada geçen kelimeler (ör. \"kasko 12345\")")
+
+    def add_output_args(p, formats=("csv", "jsonl")):
+        p.add_argument("--format", choices=formats, default="csv")
+        p.add_argument("-o", "--output", help="çıktı dosyası (varsayılan: stdout)")
+
+    p = sub.add_parser("customers", help="müşterileri listele / dışa aktar")
+    p.add_argument("--search", help="ad, soyad, telefon veya TC no içinde ara")
+    add_output_args(p)
+    p.set_defaults(func=cmd_customers, read_only=True)
+
+    p = sub.add_parser("transactions", help="hareketleri listele / dışa aktar")
+    add_filter_args(p)
+    add_output_args(p, formats=("csv", "jsonl", "xlsx"))
+    p.set_defaults(func=cmd_transactions, read_only=True)
+
+    p = sub.add_parser("import", help="CSV dosyasından içe aktar")
+    p.add_argument("kind", choices=["customers", "transactions"])
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import, creates_db=True)
+
+    p = sub.add_parser("report", help="özet rapor")
+    add_filter_args(p)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_report, read_only=True)
+
+    p = sub.add_parser("verify", help="bütünlük denetimi (sorun varsa çıkış kodu 1)")
+    p.set_defaults(func=cmd_verify, read_only=True)
+
+    p = sub.add_parser("backup", help="sıkıştırılmış yedek al, listele, doğrula veya geri yükle")
+    p.add_argument("action", choices=["create", "list", "verify", "restore"])
+    p.add_argument("snapshot", nargs="?", help="verify/restore için yedek dosyası")
+    p.add_argument("--dir", help="yedek klasörü (varsayılan: veritabanının yanında backups/)")
+    p.add_argument("--keep", type=int, default=24, help="saklanacak yedek sayısı")
+    p.set_defaults(func=cmd_backup, standalone=True)
+
+    p = sub.add_parser("sync", help="şubeler arası değişiklik dosyası dışa aktar / uygula")
+    p.add_argument("action", choices=["export", "apply", "status", "prune"])
+    p.add_argument("file", nargs="?", help="export/apply için değişiklik dosyası")
+    p.add_argument("--peer", help="karşı şubenin adı; verilirse son gönderimden sonrası yazılır")
+    p.add_argument("--since", type=int, help="bu seq numarasından sonraki değişiklikler")
+    p.set_defaults(func=cmd_sync, read_only=("status",))
+
+    p = sub.add_parser("audit", help="denetim kaydını (eski/yeni değerler, kullanıcı, zaman) listele / dışa aktar")
+    p.add_argument("--table", choices=["customers", "transactions"])
+    p.add_argument("--row", type=int, help="yalnızca bu kaydın geçmişi")
+    p.add_argument("--user")
+    p.add_argument("--from", dest="start", metavar="YYYY-MM-DD")
+    p.add_argument("--to", dest="end", metavar="YYYY-MM-DD")
+    add_output_args(p)
+    p.set_defaults(func=cmd_audit, read_only=True)
+
+    p = sub.add_parser("maintenance", help="sahipsiz hareketleri temizle ve dosyayı küçült (VACUUM)")
+    p.add_argument("--purge-deleted", action="store_true",
+                   help="silinmiş (soft) müşterileri hareketleriyle kalıcı olarak kaldır")
+    p.set_defaults(func=cmd_maintenance)
+
+    p = sub.add_parser("migrate", help="bekleyen şema geçişlerini göster / uygula (kesilirse kaldığı yerden sürer)")
+    p.add_argument("action", choices=["status", "run"], nargs="?", default="status")
+    p.set_defaults(func=cmd_migrate, read_only=("status",))
+
+    p = sub.add_parser("dedupe", help="mükerrer müşterileri listele / birleştir")
+    p.add_argument("action", choices=["list", "merge"])
+    p.add_argument("ids", nargs="*", type=int, metavar="ID", help="merge: korunacak id, birleştirilecek id")
+    p.add_argument("--threshold", type=float, default=0.75, help="en düşük benzerlik puanı (0-1)")
+    p.add_argument("--limit", type=int, help="en fazla bu kadar çift yazdır")
+    p.set_defaults(func=cmd_dedupe, read_only=("list",))
+
+    p = sub.add_parser("reconcile", help="banka POS ekstresini kartlı hareketlerle eşleştir")
+    p.add_argument("action", choices=["import", "match", "lines", "unmatched", "confirm", "reject"])
+    p.add_argument("file", nargs="?", help="import: ekstre dosyası (CSV)")
+    p.add_argument("--id", dest="ids", type=int, nargs="+", default=[], metavar="ID",
+                   help="match/lines/unmatched: ekstre id; confirm: satır id [hareket id]; reject: satır id")
+    p.add_argument("--status", choices=["matched", "proposed", "confirmed", "unmatched"], help="lines: yalnızca bu durum")
+    p.add_argument("--window", type=int, default=2, help="tam eşleşmede en fazla tarih farkı (gün)")
+    p.add_argument("--fuzzy-window", type=int, default=5, help="önerilerde en fazla tarih farkı (gün)")
+    p.add_argument("--tolerance", type=float, default=0.03, help="önerilerde en fazla tutar farkı oranı")
+    add_output_args(p)
+    p.set_defaults(func=cmd_reconcile)
+
+    p = sub.add_parser("shards", help="ajans veritabanlarını (shard) yönet, tümünde rapor / arama")
+    p.add_argument("action", choices=["list", "add", "remove", "report", "search", "transactions"])
+    p.add_argument("name", nargs="?", help="add/remove: shard adı; search: aranan metin")
+    p.add_argument("file", nargs="?", help="add: veritabanı dosyası (varsayılan: <ad>.db)")
+    p.add_argument("--only", nargs="+", metavar="SHARD", help="yalnızca bu shard'lar")
+    p.add_argument("--limit", type=int, help="search/transactions: en fazla satır")
+    p.add_argument("--type", choices=["income", "expense"])
+    p.add_argument("--payment", choices=["cash", "card"])
+    p.add_argument("--from", dest="start", metavar="YYYY-MM-DD")
+    p.add_argument("--to", dest="end", metavar="YYYY-MM-DD")
+    p.add_argument("--search", metavar="METİN", help="report/transactions: açıklamada geçen kelimeler")
+    p.add_argument("--json", action="store_true", help="report: JSON çıktı")
+    add_output_args(p)
+    p.set_defaults(func=cmd_shards, uses_registry=True)
+
+    p = sub.add_parser("plans", help="sorgu planı denetimi: indeks beklenen sorgularda tam tarama / "
+                                     "veriyle hızlı büyüyen süre (sorun varsa çıkış kodu 1)")
+    p.add_argument("--rows", type=int, default=50000, help="küçük veri kümesindeki hareket sayısı")
+    p.add_argument("--scale", type=int, default=4, help="büyük veri kümesi kaç kat")
+    p.add_argument("--repeat", type=int, default=5, help="süre ölçümünde tekrar (en kısası alınır)")
+    p.add_argument("--keep", metavar="DIR", help="üretilen veri kümelerini burada sakla / yeniden kullan")
+    p.add_argument("-v", "--verbose", action="store_true", help="tüm sorgu planlarını yazdır")
+    p.set_defaults(func=cmd_plans, standalone=True)
+
+    p = sub.add_parser("serve", help="yerel ağ için JSON HTTP API sunucusu")
+    p.add_argument("--host", default="127.0.0.1", help="dinlenecek adres (ağa açmak için 0.0.0.0)")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--read-workers", type=int, default=4, help="okuma iş parçacığı sayısı")
+    p.add_argument("--batch-ms", type=float, default=0, help="ilk yazmadan sonra diğerlerinin bekleneceği süre (ms)")
+    p.add_argument("--batch-size", type=int, default=256, help="tek işlemde onaylanacak en fazla yazma")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def _open_database(args):
+    """Okuma komutları (read_only=True ya da listedeki action'lar) veritabanını salt okunur
+    açar: şema denetimi ve açılış geçişleri yapılmaz, yazma kilidi beklenmez. Bu sürümle
+    hiç açılmamış bir dosyanın şeması önce bir kez yazılabilir açılışla güncellenir."""
+    read_only = getattr(args, "read_only", False)
+    if not isinstance(read_only, bool):
+        read_only = args.action in read_only
+    if read_only:
+        import migrations
+
+        db = Database(args.db, read_only=True)
+        if migrations.initialized(db):
+            return db
+        db.close()
+    return Database(args.db)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    uses_registry = getattr(args, "uses_registry", False)
+    if uses_registry or args.shard:
+        from shards import ShardError, ShardRegistry
+
+        try:
+            registry = ShardRegistry(args.registry)
+            if args.shard:
+                args.db = registry.path_of(args.shard)
+        except ShardError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+    if uses_registry or getattr(args, "standalone", False):
+        # shards her shard'ı, plans kendi deneme veritabanlarını açar; backup --db
+        # dosyasını Database açmadan kopyalar
+        db = None
+    elif not getattr(args, "creates_db", False) and not os.path.exists(args.db):
+        print(f"veritabanı bulunamadı: {args.db}", file=sys.stderr)
+        return 2
+    else:
+        db = _open_database(args)
+    try:
+        return args.func(registry if uses_registry else db, args)
+    except SearchIndexPending as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # çıktı head gibi bir komuta bağlandığında sessizce çık
+        sys.stderr.close()
+        return 0
+    finally:
+        if db is not None:
+            db.conn.close()
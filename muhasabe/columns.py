@@ -0,0 +1,188 @@
+"""Büyük hareket sonuçları için sütun bazlı, az bellek kullanan kap.
+
+Demet listesinde her satır ayrı bir demet, float, tarih metni ve açıklama nesnesi
+taşır (satır başına ~400 bayt). TransactionColumns aynı satırları sayısal dizilerde
+ve tekilleştirilmiş metinlerle tutar (satır başına ~45 bayt); indeksle erişimde
+iter_transactions ile aynı biçimde demet döndürür, böylece tablo modeli ve dışa
+aktarma kodu satırları değişmeden kullanır.
+"""
+import sys
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+
+# iter_transactions satırındaki konumlar
+_ID, _CUSTOMER, _NAME, _DATE, _TYPE, _PAYMENT, _AMOUNT, _DESCRIPTION, _BALANCE = range(9)
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# ayrıştırılamayan tarih metni için dates dizisine yazılan değer
+NO_DATE = -(1 << 62)
+# NULL tutar/bakiye için amounts/balances dizisine yazılan değer; geri None olarak okunur.
+# Müşteri satırı olmayan (sahipsiz ya da silinmiş müşterinin) hareketinin bakiyesi NULL'dır.
+NO_AMOUNT = -(1 << 62)
+
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+def _cents(value):
+    return NO_AMOUNT if value is None else round(value * 100)
+
+
+def _money(cents):
+    return None if cents == NO_AMOUNT else cents / 100
+
+
+def _epoch(text):
+    # saat dilimi yok sayılır: tarih metni olduğu gibi geri üretilebilsin
+    try:
+        return (datetime.fromisoformat(text) - _EPOCH) // _SECOND
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+class TransactionColumns:
+    """iter_transactions satırlarının sütun sütun saklanmış hali.
+
+    Kimlikler, kuruş cinsinden tutar/bakiye ve tarihler (1970'ten beri saniye)
+    array('q'), tür ve ödeme kodları array('b') içindedir; açıklamalar tekilleştirilir,
+    müşteri adları müşteri başına bir kez tutulur. Tarihler "YYYY-MM-DD HH:MM:SS"
+    biçiminde geri verilir.
+    """
+
+    def __init__(self, with_balance=False):
+        self.with_balance = with_balance
+        self.ids = array('q')
+        self.customer_ids = array('q')
+        self.dates = array('q')
+        self.amounts = array('q')
+        self.balances = array('q') if with_balance else None
+        self.types = array('b')
+        self.payments = array('b')
+        self.descriptions = []
+        self.names = {}
+        # kod -> metin ('income', 'cash' ...); yeni değerler görüldükçe eklenir
+        self.type_names = []
+        self.payment_names = []
+        self._type_codes = {}
+        self._payment_codes = {}
+        self._strings = {}
+        self._odd_dates = {}
+        # tekilleştirilmiş açıklama ve müşteri adı metinlerinin toplam boyutu (bkz. nbytes)
+        self._text_bytes = 0
+
+    @classmethod
+    def from_cursor(cls, cursor, with_balance=False, batch_size=2000):
+        """fetchmany destekleyen bir imlecin (yerel ya da uzak) tüm satırlarını okur."""
+        columns = cls(with_balance)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return columns
+            columns.extend(rows)
+
+    def _code(self, value, codes, names):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def extend(self, rows):
+        """iter_transactions biçimindeki satırları ekler."""
+        if not rows:
+            return
+        start = len(self.ids)
+        cols = list(zip(*rows))
+        self.ids.extend(cols[_ID])
+        self.customer_ids.extend(cols[_CUSTOMER])
+        known = len(self.names)
+        self.names.update(zip(cols[_CUSTOMER], cols[_NAME]))
+        if len(self.names) != known:
+            self._text_bytes += sum(map(sys.getsizeof, islice(reversed(self.names.values()), len(self.names) - known)))
+        dates = list(map(_epoch, cols[_DATE]))
+        for offset, epoch in enumerate(dates):
+            if epoch == NO_DATE:
+                self._odd_dates[start + offset] = cols[_DATE][offset]
+        self.dates.extend(dates)
+        self.amounts.extend(map(_cents, cols[_AMOUNT]))
+        if self.with_balance:
+            self.balances.extend(map(_cents, cols[_BALANCE]))
+        codes, names = self._type_codes, self.type_names
+        self.types.extend(codes[v] if v in codes else self._code(v, codes, names) for v in cols[_TYPE])
+        codes, names = self._payment_codes, self.payment_names
+        self.payments.extend(codes[v] if v in codes else self._code(v, codes, names) for v in cols[_PAYMENT])
+        intern = self._strings.setdefault
+        known = len(self._strings)
+        self.descriptions.extend([intern(d, d) for d in cols[_DESCRIPTION]])
+        if len(self._strings) != known:
+            # yeni metinler sözlüğün sonuna eklenmiştir
+            self._text_bytes += sum(map(sys.getsizeof, islice(reversed(self._strings), len(self._strings) - known)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        """Yaklaşık bellek kullanımı (bayt): diziler, açıklama başvuruları ve tekil metinler."""
+        arrays = (self.ids, self.customer_ids, self.dates, self.amounts, self.types, self.payments)
+        if self.with_balance:
+            arrays += (self.balances,)
+        return (sum(a.itemsize * len(a) for a in arrays) + 8 * len(self.descriptions)
+                + self._text_bytes)
+
+    def date_text(self, i):
+        epoch = self.dates[i]
+        if epoch == NO_DATE:
+            return self._odd_dates[i]
+        return (_EPOCH + timedelta(seconds=epoch)).strftime(DATE_FORMAT)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.ids)
+        customer_id = self.customer_ids[i]
+        row = (self.ids[i], customer_id, self.names.get(customer_id), self.date_text(i),
+               self.type_names[self.types[i]], self.payment_names[self.payments[i]],
+               _money(self.amounts[i]), self.descriptions[i])
+        if self.with_balance:
+            row += (_money(self.balances[i]),)
+        return row
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self[i]
+
+    def cursor(self):
+        """Satırları sqlite3 imleci gibi fetchmany ile okutan okuyucu (dışa aktarma için)."""
+        return _ColumnCursor(self)
+
+    def totals(self):
+        """get_period_totals ile aynı biçimde ödeme/borç toplamları."""
+        income, expense = self._type_codes.get('income'), self._type_codes.get('expense')
+        paid = debt = 0
+        for code, cents in zip(self.types, self.amounts):
+            if code == income:
+                paid += cents
+            elif code == expense:
+                debt += cents
+        return {'count': len(self.ids), 'total_paid': paid / 100, 'total_debt': debt / 100}
+
+
+class _ColumnCursor:
+    def __init__(self, columns):
+        self.columns = columns
+        self.position = 0
+
+    def fetchmany(self, size=1000):
+        end = min(self.position + size, len(self.columns))
+        rows = [self.columns[i] for i in range(self.position, end)]
+        self.position = end
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self.columns) - self.position)
+
+    def __iter__(self):
+        while self.position < len(self.columns):
+            yield self.columns[self.position]
+            self.position += 1
@@ -0,0 +1,1042 @@
+import getpass
+import os
+import re
+import sqlite3
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from columns import TransactionColumns
+from migrations import migrate, pending, search_ready
+
+DB_NAME = "customers.db"
+
+# Hareketi olan müşteri silinirken: cascade hareketleriyle siler, block silmeyi
+# reddeder (FOREIGN KEY hatası), soft yalnızca deleted_at ile işaretler.
+DELETE_POLICIES = ('cascade', 'block', 'soft')
+DEFAULT_DELETE_POLICY = os.environ.get("MUHASABE_DELETE_POLICY", "cascade")
+
+# Sunucu tarafı sıralama anahtarları; her biri bir indeksle karşılanır
+CUSTOMER_ORDERINGS = {
+    'first_name': ('first_name', 'last_name'),
+    'last_name': ('last_name', 'first_name'),
+    'tc_no': ('tc_no',),
+    'phone': ('phone',),
+    'debt': ('debt',),
+}
+
+# Açıklama aramasında bu kadar ya da daha az eşleşme alaka sırasıyla (bm25) döner. Daha
+# çok eşleşen kelimede ("kasko") hepsini puanlayıp sıralamak yüzlerce ms sürer ve sıra
+# anlamını yitirir; sonuçlar diğer listeler gibi yeniden eskiye sıralanır.
+SEARCH_RANK_LIMIT = 5000
+
+# Türkçe harfleri aramada eşleşecek şekilde sadeleştirir (İ/I -> i, ş -> s ...)
+_FOLD_UPPER = str.maketrans({"İ": "i", "I": "i"})
+_FOLD_LOWER = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c",
+                             "â": "a", "î": "i", "û": "u"})
+
+
+def fold_text(text):
+    return (text or "").translate(_FOLD_UPPER).lower().translate(_FOLD_LOWER)
+
+
+def fts_query(text):
+    """Arama kutusundaki metni FTS5 sorgusuna çevirir; kelime yoksa None.
+
+    Kelimelerin hepsi geçmelidir; yazılmakta olan son kelime önek olarak aranır:
+    "poliçe 1234" -> "police" "1234"*. (Her kelimeyi önekle aramak "poliçe" gibi her
+    harekette geçen kelimelerde sorguyu birkaç kat yavaşlatır.) Tırnak, yıldız gibi FTS5
+    işleçleri kelimeye alınmadığından kullanıcı metni sorguyu bozamaz.
+    """
+    words = [f'"{word}"' for word in re.findall(r"\w+", fold_text(text))]
+    if not words:
+        return None
+    words[-1] += "*"
+    return " ".join(words)
+
+
+# Şema geçişi satır düzeltirken (bkz. migrations) sync_state'e 'migration' anahtarı konur ve
+# aynı işlem içinde silinir; başka bağlantılar görmez. Biçim düzeltmesi kullanıcı değişikliği
+# değildir: denetim kaydına ve eşitleme günlüğüne yazılmaz.
+NOT_MIGRATING = "NOT EXISTS (SELECT 1 FROM sync_state WHERE key = 'migration')"
+
+# Hareketin müşteri borcuna etkisi: ödeme (income) azaltır, borç (expense) artırır
+LEDGER_CHANGE_SQL = "CASE WHEN transaction_type = 'income' THEN -amount ELSE amount END"
+
+
+def _default_user():
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "bilinmiyor"
+
+
+def normalize_date(date):
+    """Tarihi 'YYYY-MM-DD HH:MM:SS' biçimine getirir; okunamazsa şimdiki zamanı döner."""
+    if date is None:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+        return date
+    except Exception:
+        try:
+            dt = datetime.strptime(date, "%Y-%m-%d")
+            return dt.strftime("%Y-%m-%d %H:%M:%S")
+        except Exception:
+            return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SearchIndexPending(Exception):
+    """Açıklama araması istendi ama arama dizini henüz doldurulmadı (bkz. migrations)."""
+
+
+class Database:
+    # changes_since için tutulan son değişiklik sayısı; daha eskisi istenirse tam yükleme gerekir
+    CHANGE_LOG_SIZE = 1024
+
+    def __init__(self, db_path=DB_NAME, delete_policy=None, user=None, factory=sqlite3.Connection,
+                 read_only=False):
+        delete_policy = delete_policy or DEFAULT_DELETE_POLICY
+        if delete_policy not in DELETE_POLICIES:
+            raise ValueError(f"geçersiz silme politikası: {delete_policy}")
+        self.path = db_path
+        self.delete_policy = delete_policy
+        # audit_log'a yazılan kullanıcı; sunucu her istek için değiştirir
+        self.user = user or os.environ.get("MUHASABE_USER") or _default_user()
+        self.read_only = read_only
+        # factory: ölçüm için sqlite3.Connection alt sınıfı (bkz. tracing.TracedConnection)
+        if read_only:
+            # salt okunur: dosya yoksa oluşturulmaz, şema dokunulmadan kullanılır (bkz. shards)
+            uri = "file:" + quote(os.path.abspath(db_path)) + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=factory)
+        else:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=factory)
+        # denetim tetikleyicileri kullanıcıyı bu işlevle okur
+        self.conn.create_function("audit_user", 0, lambda: self.user)
+        # açıklama arama dizininin tetikleyicileri (bkz. migrations)
+        self.conn.create_function("fold_text", 1, fold_text, deterministic=True)
+        # Her yazma işleminde artar; önbellekler bu sayaçla geçerliliklerini denetler
+        self._generation = 0
+        # başka bağlantıların onayladığı yazmalar (bkz. generation); izlenen ve ölçülen
+        # bağlantılarda bile bu sorgu kayda geçmesin diye düz sqlite3 imleci kullanılır
+        self._version_cursor = sqlite3.Cursor(self.conn)
+        self._data_version = self._version_cursor.execute("PRAGMA data_version").fetchone()[0]
+        self._change_log = deque(maxlen=self.CHANGE_LOG_SIZE)
+        # müşteri id -> o müşteriyi (bilgileri ya da hareketleri) değiştiren son yazmanın sayacı
+        self._customer_generations = {}
+        # kapsamı bilinmeyen son yazma (toplu içe aktarma, eşitleme); tüm müşterileri geçersiz kılar
+        self._reset_generation = 0
+        self._batch_depth = 0
+        self._search_ready = False
+        if read_only:
+            # salt okunur bağlantı geçiş uygulamaz; bekleyen adım olup olmadığını yalnızca bildirir
+            self.migrations_pending = bool(pending(self))
+            return
+        # WAL: okuyucular (yedekleme, dışa aktarma) yazmaları engellemez
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self._create_tables()
+        # büyük tablolarda uzun sürecek adımlar açılışı bekletmez (bkz. migrations.migrate)
+        self.migrations_pending = migrate(self, inline_only=True)
+
+    def reopen(self):
+        """Aynı dosyaya yeni bir bağlantı (başka bir iş parçacığında kullanmak için)."""
+        return Database(self.path, self.delete_policy, self.user, factory=type(self.conn),
+                        read_only=self.read_only)
+
+    def close(self):
+        self.conn.close()
+
+    def _commit(self):
+        # batch() içindeyken onay, toplu işlemin sonuna bırakılır
+        if not self._batch_depth:
+            self.conn.commit()
+
+    @contextmanager
+    def batch(self):
+        """İçindeki tüm değişiklikleri tek işlemde (tek diske yazma ile) onaylar.
+
+        Hata olursa işlemin tamamı geri alınır.
+        """
+        if not self._batch_depth:
+            self.conn.commit()
+            self.conn.execute("BEGIN IMMEDIATE")
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.conn.rollback()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth:
+            self.conn.commit()
+
+    def _bump(self, customer_id=None):
+        # customer_id None ise değişikliğin kapsamı bilinmiyor demektir
+        self._generation += 1
+        self._change_log.append((self._generation, customer_id))
+        if customer_id is None:
+            self._reset_generation = self._generation
+        else:
+            self._customer_generations[customer_id] = self._generation
+
+    def _notice_external_writes(self):
+        # data_version yalnızca başka bir bağlantı (CLI içe aktarma/eşitleme/geçiş, ikinci
+        # pencere, sunucu) yazıp onayladığında değişir; hangi müşterilerin değiştiği bilinmez
+        version = self._version_cursor.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._bump()
+
+    @property
+    def generation(self):
+        """Her yazmada artan sayaç; başka bağlantıların yazmaları da onu artırır."""
+        self._notice_external_writes()
+        return self._generation
+
+    def customer_generation(self, customer_id):
+        """Müşterinin bilgilerini ya da hareketlerini değiştiren son yazmanın sayacı.
+
+        Diğer müşterilere yazmak bu değeri değiştirmez; görünüm önbelleği (viewcache)
+        müşteri görünümlerini bununla geçersiz kılar.
+        """
+        self._notice_external_writes()
+        return max(self._customer_generations.get(customer_id, 0), self._reset_generation)
+
+    def changes_since(self, generation):
+        """generation'dan sonra değişen müşteri id'leri; bilinmiyorsa None."""
+        if generation == self.generation:
+            return set()
+        if not self._change_log or self._change_log[0][0] > generation + 1:
+            return None
+        changed = set()
+        for gen, customer_id in self._change_log:
+            if gen <= generation:
+                continue
+            if customer_id is None:
+                return None
+            changed.add(customer_id)
+        return changed
+
+    def _create_tables(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            tc_no TEXT UNIQUE,
+            phone TEXT UNIQUE,
+            address TEXT,
+            notes TEXT,
+            debt REAL DEFAULT 0,
+            deleted_at TEXT
+        )""")
+        # deleted_at sonradan eklendi; eski veritabanlarına sütunu ekle
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(customers)")}
+        if 'deleted_at' not in columns:
+            self.conn.execute("ALTER TABLE customers ADD COLUMN deleted_at TEXT")
+
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            transaction_type TEXT NOT NULL,
+            payment_type TEXT NOT NULL,
+            date TEXT NOT NULL,
+            deleted_at TEXT,
+            FOREIGN KEY (customer_id) REFERENCES customers (id)
+        )""")
+
+        # Sıralama indeksleri (tc_no ve phone UNIQUE olduğu için zaten indeksli). Yalnızca
+        # silinmemiş müşterileri kapsar; sorgular bu yüzden "deleted_at IS NULL" içermeli.
+        self._ensure_schema_object("index", "idx_customers_last_first",
+                                   "ON customers (last_name, first_name) WHERE deleted_at IS NULL")
+        self._ensure_schema_object("index", "idx_customers_first_last",
+                                   "ON customers (first_name, last_name) WHERE deleted_at IS NULL")
+        self._ensure_schema_object("index", "idx_customers_debt", "ON customers (debt) WHERE deleted_at IS NULL")
+        # Silinmiş (soft) müşteriler: hareket sorguları bu küçük indeksle onları dışarıda bırakır
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_deleted ON customers (id) WHERE deleted_at IS NOT NULL")
+        # Silinen hareketler tombstone olarak kalır (deleted_at); eski veritabanlarına sütunu ekle
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(transactions)")}
+        if 'deleted_at' not in columns:
+            self.conn.execute("ALTER TABLE transactions ADD COLUMN deleted_at TEXT")
+        # Hareket filtreleri (müşteri + tarih aralığı, tüm müşteriler için tarih aralığı). Müşteri
+        # indeksi (idx_transactions_customer_date) büyük tablolarda uzun süren bir kurulum
+        # gerektirdiği için migrations.py'de tanımlıdır.
+        self._ensure_schema_object("index", "idx_transactions_date", "ON transactions (date) WHERE deleted_at IS NULL")
+
+        # Toplam borç her yenilemede SUM ile taranmak yerine tetikleyicilerle güncel tutulur
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS customer_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_debt REAL NOT NULL DEFAULT 0,
+            customer_count INTEGER NOT NULL DEFAULT 0
+        )""")
+        if self.conn.execute("SELECT 1 FROM customer_totals WHERE id = 1").fetchone() is None:
+            self.conn.execute("""
+                INSERT INTO customer_totals (id, total_debt, customer_count)
+                SELECT 1, COALESCE(SUM(debt), 0), COUNT(*) FROM customers
+            """)
+        self.conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customer_totals_insert AFTER INSERT ON customers
+        BEGIN
+            UPDATE customer_totals SET total_debt = total_debt + COALESCE(NEW.debt, 0),
+                                       customer_count = customer_count + 1 WHERE id = 1;
+        END""")
+        # silinmiş (soft) müşteriler toplamlara dahil değildir
+        self._ensure_schema_object("trigger", "trg_customer_totals_update", """
+        AFTER UPDATE OF debt ON customers WHEN NEW.deleted_at IS NULL
+        BEGIN
+            UPDATE customer_totals SET total_debt = total_debt + COALESCE(NEW.debt, 0) - COALESCE(OLD.debt, 0)
+            WHERE id = 1;
+        END""")
+        self._ensure_schema_object("trigger", "trg_customer_totals_delete", """
+        AFTER DELETE ON customers WHEN OLD.deleted_at IS NULL
+        BEGIN
+            UPDATE customer_totals SET total_debt = total_debt - COALESCE(OLD.debt, 0),
+                                       customer_count = customer_count - 1 WHERE id = 1;
+        END""")
+        self.conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customer_totals_soft_delete AFTER UPDATE OF deleted_at ON customers
+        WHEN (OLD.deleted_at IS NULL) != (NEW.deleted_at IS NULL)
+        BEGIN
+            UPDATE customer_totals
+            SET total_debt = total_debt + CASE WHEN NEW.deleted_at IS NULL THEN 1 ELSE -1 END * COALESCE(NEW.debt, 0),
+                customer_count = customer_count + CASE WHEN NEW.deleted_at IS NULL THEN 1 ELSE -1 END
+            WHERE id = 1;
+        END""")
+        self._create_change_journal()
+        self._create_audit_log()
+        self._create_reconciliation_tables()
+        self.conn.commit()
+
+    def _ensure_schema_object(self, kind, name, body):
+        """İndeks/tetikleyiciyi oluşturur; tanımı değişmişse eskisini silip yeniden oluşturur."""
+        sql = f"CREATE {kind.upper()} {name} {body.strip()}"
+        row = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        if row is not None and " ".join(row[0].split()) == " ".join(sql.split()):
+            return
+        if row is not None:
+            self.conn.execute(f"DROP {kind.upper()} {name}")
+        self.conn.execute(sql)
+
+    def _create_change_journal(self):
+        # Şubeler arası eşitleme için değişiklik günlüğü (bkz. sync.py).
+        # origin NULL ise değişiklik bu veritabanında yapılmıştır; eşitleme ile gelen
+        # değişiklikler kaynak düğümün kimliğiyle yazılır ve geri gönderilmez.
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_journal (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            payload TEXT,
+            origin TEXT
+        )""")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )""")
+        # sync_sent: karşı şubeye en son gönderilen seq; sync_received: kaynağından alınan son seq
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_sent (
+            peer TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0
+        )""")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_received (
+            origin TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL DEFAULT 0
+        )""")
+        # Başka şubede oluşturulan satırların oradaki id'si -> buradaki id
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_id_map (
+            origin TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            remote_id INTEGER NOT NULL,
+            local_id INTEGER NOT NULL,
+            PRIMARY KEY (origin, table_name, remote_id)
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_id_map_local ON sync_id_map (table_name, local_id)")
+        origin = "(SELECT value FROM sync_state WHERE key = 'apply_origin')"
+        customer_json = """json_object('first_name', NEW.first_name, 'last_name', NEW.last_name,
+                               'tc_no', NEW.tc_no, 'phone', NEW.phone, 'address', NEW.address,
+                               'notes', NEW.notes"""
+        transaction_json = """json_object('customer_id', NEW.customer_id, 'amount', NEW.amount,
+                                  'description', NEW.description, 'transaction_type', NEW.transaction_type,
+                                  'payment_type', NEW.payment_type, 'date', NEW.date)"""
+        # Borç yalnızca hareketlerle (debt = debt + ?) değiştiğinde müşteri satırı günlüğe
+        # yazılmaz; karşı tarafta aynı etkiyi hareketin kendisi yeniden uygular.
+        # Elle düzenlemede (update_customer) borç farkı debt_delta olarak taşınır.
+        triggers = {
+            "trg_journal_customers_insert": f"""AFTER INSERT ON customers WHEN {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('customers', 'I', NEW.id, {customer_json}, 'debt', NEW.debt), {origin}); END""",
+            "trg_journal_customers_update": f"""AFTER UPDATE OF first_name, last_name, tc_no, phone, address, notes
+                ON customers WHEN {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('customers', 'U', NEW.id, {customer_json}, 'debt_delta', NEW.debt - OLD.debt), {origin}); END""",
+            "trg_journal_customers_delete": f"""AFTER DELETE ON customers
+                WHEN OLD.deleted_at IS NULL AND {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('customers', 'D', OLD.id, NULL, {origin}); END""",
+            # soft silme karşı şubeye silme olarak gider
+            "trg_journal_customers_soft_delete": f"""AFTER UPDATE OF deleted_at ON customers
+                WHEN OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL AND {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('customers', 'D', NEW.id, NULL, {origin}); END""",
+            "trg_journal_transactions_insert": f"""AFTER INSERT ON transactions WHEN {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('transactions', 'I', NEW.id, {transaction_json}, {origin}); END""",
+            "trg_journal_transactions_update": f"""AFTER UPDATE ON transactions
+                WHEN NEW.deleted_at IS NULL AND {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('transactions', 'U', NEW.id, {transaction_json}, {origin}); END""",
+            # tombstone karşı şubeye silme olarak gider
+            "trg_journal_transactions_tombstone": f"""AFTER UPDATE OF deleted_at ON transactions
+                WHEN OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL AND {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('transactions', 'D', NEW.id, NULL, {origin}); END""",
+            "trg_journal_transactions_delete": f"""AFTER DELETE ON transactions
+                WHEN OLD.deleted_at IS NULL AND {NOT_MIGRATING} BEGIN
+                INSERT INTO change_journal (table_name, op, row_id, payload, origin)
+                VALUES ('transactions', 'D', OLD.id, NULL, {origin}); END""",
+        }
+        for name, body in triggers.items():
+            self._ensure_schema_object("trigger", name, body)
+
+    def _create_reconciliation_tables(self):
+        # Banka POS ekstreleri ve kartlı hareketlerle eşleşmeleri (bkz. reconcile.py).
+        # status: matched (otomatik), proposed (yakın eşleşme önerisi), confirmed (elle onaylı),
+        # unmatched. Hareket kalıcı silinirse eşleşme boşa düşer.
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS pos_statements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            imported_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            period_start TEXT,
+            period_end TEXT,
+            line_count INTEGER NOT NULL DEFAULT 0
+        )""")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS pos_lines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            statement_id INTEGER NOT NULL REFERENCES pos_statements (id) ON DELETE CASCADE,
+            line_no INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL,
+            reference TEXT,
+            description TEXT,
+            status TEXT NOT NULL DEFAULT 'unmatched',
+            transaction_id INTEGER REFERENCES transactions (id) ON DELETE SET NULL,
+            score REAL
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pos_lines_statement ON pos_lines (statement_id, status)")
+        self.conn.execute("""CREATE INDEX IF NOT EXISTS idx_pos_lines_transaction ON pos_lines (transaction_id)
+                             WHERE transaction_id IS NOT NULL""")
+        # Ekstre döneminde olup hiçbir satırla eşleşmeyen kartlı hareketler
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS pos_unmatched (
+            statement_id INTEGER NOT NULL REFERENCES pos_statements (id) ON DELETE CASCADE,
+            transaction_id INTEGER NOT NULL REFERENCES transactions (id) ON DELETE CASCADE,
+            PRIMARY KEY (statement_id, transaction_id)
+        ) WITHOUT ROWID""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pos_unmatched_transaction ON pos_unmatched (transaction_id)")
+        # Elle reddedilen (ekstre satırı, hareket) çiftleri; yeniden eşleştirmede önerilmez.
+        # line_key satırın içeriğidir (reconcile.line_key): ekstre yeniden içe aktarılsa da geçerli.
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS reconcile_rejections (
+            line_key TEXT NOT NULL,
+            transaction_id INTEGER NOT NULL REFERENCES transactions (id) ON DELETE CASCADE,
+            rejected_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            PRIMARY KEY (line_key, transaction_id)
+        ) WITHOUT ROWID""")
+        self.conn.execute("""CREATE INDEX IF NOT EXISTS idx_reconcile_rejections_transaction
+                             ON reconcile_rejections (transaction_id)""")
+
+    def _create_audit_log(self):
+        # Denetim kaydı: hareket ve müşteri değişikliklerinin eski/yeni değerleri, kullanıcı ve
+        # zamanıyla. Yalnızca eklenebilir; güncelleme ve silme tetikleyicilerle reddedilir.
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            user TEXT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            old TEXT,
+            new TEXT
+        )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_row ON audit_log (table_name, row_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_at ON audit_log (at)")
+
+        def row_json(ref, table):
+            if table == 'transactions':
+                return f"""json_object('customer_id', {ref}.customer_id, 'amount', {ref}.amount,
+                    'description', {ref}.description, 'transaction_type', {ref}.transaction_type,
+                    'payment_type', {ref}.payment_type, 'date', {ref}.date)"""
+            return f"""json_object('first_name', {ref}.first_name, 'last_name', {ref}.last_name,
+                'tc_no', {ref}.tc_no, 'phone', {ref}.phone, 'address', {ref}.address,
+                'notes', {ref}.notes, 'debt', {ref}.debt)"""
+
+        def insert(table, row_id, action, old, new):
+            return f"""BEGIN INSERT INTO audit_log (user, table_name, row_id, action, old, new)
+                VALUES (audit_user(), '{table}', {row_id}, {action}, {old}, {new}); END"""
+
+        triggers = {"trg_audit_log_no_update": """BEFORE UPDATE ON audit_log
+                BEGIN SELECT RAISE(ABORT, 'audit_log yalnızca eklemeye açıktır'); END""",
+                    "trg_audit_log_no_delete": """BEFORE DELETE ON audit_log
+                BEGIN SELECT RAISE(ABORT, 'audit_log yalnızca eklemeye açıktır'); END"""}
+        # Müşteride yalnızca elle düzenleme denetlenir; hareketlerin borç etkisi (debt = debt + ?)
+        # hareketin kendi kaydında görülür.
+        updated_columns = {'transactions': "customer_id, amount, description, transaction_type, payment_type, date",
+                           'customers': "first_name, last_name, tc_no, phone, address, notes"}
+        for table, columns in updated_columns.items():
+            old, new = row_json("OLD", table), row_json("NEW", table)
+            triggers[f"trg_audit_{table}_insert"] = f"AFTER INSERT ON {table} WHEN {NOT_MIGRATING} " + insert(
+                table, "NEW.id", "'I'", "NULL", new)
+            triggers[f"trg_audit_{table}_update"] = (
+                f"AFTER UPDATE OF {columns} ON {table} WHEN NEW.deleted_at IS NULL AND {NOT_MIGRATING} "
+                + insert(table, "NEW.id", "'U'", old, new))
+            triggers[f"trg_audit_{table}_tombstone"] = (
+                f"AFTER UPDATE OF deleted_at ON {table} WHEN OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL "
+                f"AND {NOT_MIGRATING} " + insert(table, "NEW.id", "'D'", old, "NULL"))
+            # zaten silinmiş (tombstone) satırın kalıcı olarak kaldırılması 'P'
+            triggers[f"trg_audit_{table}_delete"] = f"AFTER DELETE ON {table} WHEN {NOT_MIGRATING} " + insert(
+                table, "OLD.id", "CASE WHEN OLD.deleted_at IS NULL THEN 'D' ELSE 'P' END", old, "NULL")
+        for name, body in triggers.items():
+            self._ensure_schema_object("trigger", name, body)
+
+    def iter_audit(self, table_name=None, row_id=None, user=None, start=None, end=None):
+        """Denetim kayıtları eskiden yeniye, imleç olarak.
+
+        Satırlar: (id, at, user, table_name, row_id, action, old, new); old/new JSON metnidir.
+        start/end 'YYYY-MM-DD' (bitiş günü dahil).
+        """
+        clauses, params = [], []
+        if table_name:
+            clauses.append("table_name = ?")
+            params.append(table_name)
+        if row_id is not None:
+            clauses.append("row_id = ?")
+            params.append(row_id)
+        if user:
+            clauses.append("user = ?")
+            params.append(user)
+        if start:
+            clauses.append("at >= ?")
+            params.append(str(start))
+        if end:
+            clauses.append("at < ?")
+            params.append(str(datetime.strptime(str(end)[:10], "%Y-%m-%d").date() + timedelta(days=1)))
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        # tarih aralığında ORDER BY id, planlayıcıyı tüm günlüğü id sırasıyla taramaya iter;
+        # at, id sırası aynı sonucu idx_audit_log_at ile verir
+        order = "at, id" if start or end else "id"
+        return self.conn.execute(f"""
+            SELECT id, at, user, table_name, row_id, action, old, new
+            FROM audit_log {where}
+            ORDER BY {order}
+        """, params)
+
+    def add_customer(self, first_name, last_name, tc_no, phone, address, notes, debt):
+        # normalize empty strings to None so UNIQUE columns allow multiple NULLs
+        tc_no_db = tc_no.strip() if tc_no and tc_no.strip() else None
+        phone_db = phone.strip() if phone and phone.strip() else None
+        cur = self.conn.execute(
+            "INSERT INTO customers (first_name, last_name, tc_no, phone, address, notes, debt) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (first_name, last_name, tc_no_db, phone_db, address, notes, float(debt)))
+        self._commit()
+        self._bump(cur.lastrowid)
+        return cur.lastrowid
+
+    def update_customer(self, cust_id, first_name, last_name, tc_no, phone, address, notes, debt):
+        tc_no_db = tc_no.strip() if tc_no and tc_no.strip() else None
+        phone_db = phone.strip() if phone and phone.strip() else None
+        self.conn.execute(
+            "UPDATE customers SET first_name=?, last_name=?, tc_no=?, phone=?, address=?, notes=?, debt=? WHERE id=?",
+            (first_name, last_name, tc_no_db, phone_db, address, notes, float(debt), cust_id))
+        self._commit()
+        self._bump(cust_id)
+
+    def delete_customer(self, cust_id):
+        """Müşteriyi delete_policy'ye göre siler.
+
+        block politikasında hareketi olan müşteri için sqlite3.IntegrityError yükselir.
+        """
+        with self.batch():
+            if self.delete_policy == 'soft':
+                self.conn.execute("UPDATE customers SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL",
+                                  (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), cust_id))
+            else:
+                if self.delete_policy == 'cascade':
+                    self.conn.execute("DELETE FROM transactions WHERE customer_id = ?", (cust_id,))
+                self.conn.execute("DELETE FROM customers WHERE id=?", (cust_id,))
+        self._bump(cust_id)
+
+    def get_customer(self, customer_id):
+        return self.conn.execute("""
+            SELECT id, first_name, last_name, tc_no, phone, address, notes, debt
+            FROM customers WHERE id = ? AND deleted_at IS NULL
+        """, (customer_id,)).fetchone()
+
+    def get_customers_by_ids(self, customer_ids):
+        customer_ids = list(customer_ids)
+        rows = []
+        # SQLite parametre sınırına takılmamak için parça parça sorgula
+        for start in range(0, len(customer_ids), 500):
+            chunk = customer_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows.extend(self.conn.execute(f"""
+                SELECT id, first_name, last_name, tc_no, phone, address, notes, debt
+                FROM customers WHERE id IN ({placeholders}) AND deleted_at IS NULL
+            """, chunk).fetchall())
+        return rows
+
+    def list_customers(self, filter_text=None, limit=None, offset=0, order_by='last_name', descending=False):
+        cur = self.conn.cursor()
+        # limit None ise tüm satırlar döner (SQLite'ta LIMIT -1 sınırsızdır)
+        page = (-1 if limit is None else int(limit), int(offset))
+        direction = "DESC" if descending else "ASC"
+        columns = CUSTOMER_ORDERINGS.get(order_by, CUSTOMER_ORDERINGS['last_name']) + ('id',)
+        order_sql = ", ".join(f"{col} {direction}" for col in columns)
+        if filter_text:
+            like = f"%{filter_text}%"
+            cur.execute(f"""
+                SELECT id, first_name, last_name, tc_no, phone, address, notes, debt 
+                FROM customers 
+                WHERE deleted_at IS NULL
+                  AND (first_name LIKE ? OR last_name LIKE ? OR phone LIKE ? OR tc_no LIKE ?)
+                ORDER BY {order_sql}
+                LIMIT ? OFFSET ?
+            """, (like, like, like, like) + page)
+        else:
+            cur.execute(f"""
+                SELECT id, first_name, last_name, tc_no, phone, address, notes, debt 
+                FROM customers 
+                WHERE deleted_at IS NULL
+                ORDER BY {order_sql}
+                LIMIT ? OFFSET ?
+            """, page)
+        return cur.fetchall()
+
+    def iter_customers(self, filter_text=None):
+        # fetchall yerine imleç üzerinden satır satır okunur (dışa aktarma için)
+        if filter_text:
+            like = f"%{filter_text}%"
+            return self.conn.execute("""
+                SELECT id, first_name, last_name, tc_no, phone, address, notes, debt
+                FROM customers
+                WHERE deleted_at IS NULL
+                  AND (first_name LIKE ? OR last_name LIKE ? OR phone LIKE ? OR tc_no LIKE ?)
+                ORDER BY last_name, first_name, id
+            """, (like, like, like, like))
+        return self.conn.execute("""
+            SELECT id, first_name, last_name, tc_no, phone, address, notes, debt
+            FROM customers
+            WHERE deleted_at IS NULL
+            ORDER BY last_name, first_name, id
+        """)
+
+    def import_customers(self, rows):
+        """(first_name, last_name, tc_no, phone, address, notes, debt) satırlarını tek işlemde ekler."""
+        count = 0
+        with self.batch():
+            for first_name, last_name, tc_no, phone, address, notes, debt in rows:
+                tc_no_db = tc_no.strip() if tc_no and tc_no.strip() else None
+                phone_db = phone.strip() if phone and phone.strip() else None
+                self.conn.execute(
+                    "INSERT INTO customers (first_name, last_name, tc_no, phone, address, notes, debt) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (first_name, last_name, tc_no_db, phone_db, address, notes, float(debt or 0)))
+                count += 1
+        self._bump()
+        return count
+
+    def merge_customers(self, keep_id, merge_id):
+        """merge_id müşterisini keep_id'ye tek işlemde birleştirir.
+
+        Hareketler taşınır, borçlar toplanır, keep_id'de boş olan TC/telefon/adres
+        merge_id'den doldurulur, notlar birleştirilir ve merge_id silinir.
+        """
+        if keep_id == merge_id:
+            raise ValueError("bir müşteri kendisiyle birleştirilemez")
+        with self.batch():
+            rows = {r[0]: r for r in self.get_customers_by_ids([keep_id, merge_id])}
+            if len(rows) != 2:
+                raise ValueError("birleştirilecek müşterilerden biri bulunamadı")
+            # Hareketlerin borç etkisi hareketle birlikte taşınır (eşitlemede karşı şube
+            # taşınan hareketi aynı şekilde uygular); kalan açılış borcu aşağıda eklenir.
+            moved = self.conn.execute("""
+                SELECT COALESCE(SUM(CASE WHEN transaction_type='income' THEN -amount ELSE amount END), 0)
+                FROM transactions WHERE customer_id = ? AND deleted_at IS NULL
+            """, (merge_id,)).fetchone()[0]
+            self.conn.execute("UPDATE customers SET debt = debt - ? WHERE id = ?", (moved, merge_id))
+            self.conn.execute("UPDATE customers SET debt = debt + ? WHERE id = ?", (moved, keep_id))
+            self.conn.execute("UPDATE transactions SET customer_id = ? WHERE customer_id = ?", (keep_id, merge_id))
+            keep, other = rows[keep_id], rows[merge_id]
+            remaining = float(other[7] or 0) - moved
+            notes = "\n".join(n for n in (keep[6], other[6]) if n and n.strip())
+            # UNIQUE TC/telefon keep'e aktarılmadan önce diğer kayıt silinmeli
+            self.conn.execute("DELETE FROM customers WHERE id = ?", (merge_id,))
+            self.conn.execute("""
+                UPDATE customers SET tc_no = ?, phone = ?, address = ?, notes = ?, debt = debt + ?
+                WHERE id = ?
+            """, (keep[3] or other[3], keep[4] or other[4], keep[5] or other[5], notes or None,
+                  remaining, keep_id))
+        self._bump(merge_id)
+        self._bump(keep_id)
+
+    def get_total_debt(self):
+        cur = self.conn.cursor()
+        cur.execute("SELECT total_debt FROM customer_totals WHERE id = 1")
+        result = cur.fetchone()
+        return float(result[0]) if result and result[0] is not None else 0.0
+
+    def add_transaction(self, customer_id, amount, description, transaction_type, payment_type, date=None):
+        date = normalize_date(date)
+
+        self.conn.execute(
+            "INSERT INTO transactions (customer_id, amount, description, transaction_type, payment_type, date) VALUES (?, ?, ?, ?, ?, ?)",
+            (customer_id, float(amount), description, transaction_type, payment_type, date))
+        self._commit()
+
+        # Update customer's debt: income reduces debt, expense increases
+        if transaction_type == 'income':
+            change = -abs(float(amount))
+        else:
+            change = abs(float(amount))
+
+        self.conn.execute(
+            "UPDATE customers SET debt = debt + ? WHERE id = ?",
+            (change, customer_id))
+        self._commit()
+        self._bump(customer_id)
+
+    def delete_transaction(self, transaction_id):
+        """Hareketi tombstone olarak işaretler (deleted_at); eski değerler audit_log'da kalır."""
+        cur = self.conn.cursor()
+        cur.execute("SELECT customer_id, amount, transaction_type FROM transactions WHERE id=? AND deleted_at IS NULL",
+                    (transaction_id,))
+        transaction = cur.fetchone()
+
+        if transaction:
+            customer_id, amount, transaction_type = transaction
+
+            if transaction_type == 'income':
+                change = amount  # reverse income -> add back
+            else:
+                change = -amount  # reverse expense -> subtract
+
+            self.conn.execute(
+                "UPDATE customers SET debt = debt + ? WHERE id = ?",
+                (change, customer_id))
+
+            self.conn.execute("UPDATE transactions SET deleted_at = ? WHERE id=?",
+                              (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), transaction_id))
+            self._commit()
+            self._bump(customer_id)
+            return True
+        return False
+
+    def update_transaction(self, transaction_id, amount, description, transaction_type, payment_type, date=None):
+        cur = self.conn.cursor()
+        cur.execute("SELECT customer_id, amount, transaction_type FROM transactions WHERE id=? AND deleted_at IS NULL",
+                    (transaction_id,))
+        old = cur.fetchone()
+        if not old:
+            return False
+        customer_id, old_amount, old_type = old
+
+        if old_type == 'income':
+            old_change = float(old_amount)
+        else:
+            old_change = -float(old_amount)
+
+        if transaction_type == 'income':
+            new_change = -abs(float(amount))
+        else:
+            new_change = abs(float(amount))
+
+        net = old_change + new_change
+
+        self.conn.execute("UPDATE customers SET debt = debt + ? WHERE id = ?", (net, customer_id))
+
+        date_str = normalize_date(date)
+
+        self.conn.execute(
+            "UPDATE transactions SET amount=?, description=?, transaction_type=?, payment_type=?, date=? WHERE id=?",
+            (float(amount), description, transaction_type, payment_type, date_str, transaction_id))
+        self._commit()
+        self._bump(customer_id)
+        return True
+
+    def import_transactions(self, rows):
+        """(customer_id, amount, description, transaction_type, payment_type, date) satırlarını
+        tek işlemde ekler ve müşteri borçlarını günceller."""
+        count = 0
+        with self.batch():
+            for customer_id, amount, description, transaction_type, payment_type, date in rows:
+                if transaction_type not in ('income', 'expense') or payment_type not in ('cash', 'card'):
+                    raise ValueError(f"geçersiz hareket türü: {transaction_type}/{payment_type}")
+                self.conn.execute(
+                    "INSERT INTO transactions (customer_id, amount, description, transaction_type, payment_type, date) VALUES (?, ?, ?, ?, ?, ?)",
+                    (customer_id, float(amount), description, transaction_type, payment_type, normalize_date(date)))
+                change = -abs(float(amount)) if transaction_type == 'income' else abs(float(amount))
+                self.conn.execute("UPDATE customers SET debt = debt + ? WHERE id = ?", (change, customer_id))
+                count += 1
+        self._bump()
+        return count
+
+    def iter_transactions(self, customer_id=None, filters=None, limit=None, offset=0, with_balance=False,
+                          rank=True):
+        """Filtreye uyan hareketleri imleç üzerinden (tarihe göre yeniden eskiye) döndürür.
+
+        filters: {'type': 'income'|'expense', 'payment': 'cash'|'card',
+                  'start_date': date|'YYYY-MM-DD', 'end_date': date|'YYYY-MM-DD',
+                  'search': açıklamada aranacak kelimeler}
+        Satırlar: (id, customer_id, customer_name, date, transaction_type, payment_type, amount, description)
+        with_balance ise sona müşterinin o hareketten sonraki bakiyesi (borç pozitif) eklenir.
+        Arama en fazla SEARCH_RANK_LIMIT hareketle eşleşiyorsa (with_balance değilken) sonuçlar
+        en alakalıdan (bm25) başlar; rank=False tarih sırasını korur (ör. birden çok kaynağın
+        tarihe göre birleştirildiği shards). Arama dizini hazır değilse SearchIndexPending.
+        """
+        page = [-1 if limit is None else int(limit), int(offset)]
+        self._check_search(filters)
+        if with_balance:
+            return self._iter_transactions_with_balance(customer_id, filters, page)
+        search = fts_query((filters or {}).get('search'))
+        by_date = bool(search) and self._count_matches(search) > SEARCH_RANK_LIMIT
+        if search and rank and not by_date:
+            where, params = self._transaction_filter_sql(
+                customer_id, {k: v for k, v in filters.items() if k != 'search'})
+            return self.conn.execute(f"""
+                SELECT t.id, t.customer_id, c.first_name || ' ' || c.last_name, t.date,
+                       t.transaction_type, t.payment_type, t.amount, t.description
+                FROM transactions_fts
+                JOIN transactions t ON t.id = transactions_fts.rowid
+                LEFT JOIN customers c ON c.id = t.customer_id
+                {where} AND transactions_fts MATCH ?
+                ORDER BY transactions_fts.rank, t.date DESC, t.id DESC
+                LIMIT ? OFFSET ?
+            """, params + [search] + page)
+        where, params = self._transaction_filter_sql(customer_id, filters, by_date)
+        return self.conn.execute(f"""
+            SELECT t.id, t.customer_id, c.first_name || ' ' || c.last_name, t.date,
+                   t.transaction_type, t.payment_type, t.amount, t.description
+            FROM transactions t
+            LEFT JOIN customers c ON c.id = t.customer_id
+            {where}
+            ORDER BY t.date DESC, t.id DESC
+            LIMIT ? OFFSET ?
+        """, params + page)
+
+    def load_transactions(self, customer_id=None, filters=None, with_balance=False):
+        """iter_transactions sonucunun tamamı, sütun bazlı ve az bellekle (bkz. columns)."""
+        cursor = self.iter_transactions(customer_id, filters, with_balance=with_balance)
+        return TransactionColumns.from_cursor(cursor, with_balance)
+
+    def _iter_transactions_with_balance(self, customer_id, filters, page):
+        # Bakiye = müşteri borcu (açılış bakiyesi dahil) - bu hareketten sonraki hareketlerin etkisi.
+        # Pencere görünümle aynı sırada (yeniden eskiye) koşar; filtre yoksa ilk sayfalar için
+        # müşterinin tüm geçmişi okunmaz. Filtre varsa bakiye yine tüm hareketler üzerinden
+        # hesaplanır, filtre dış sorguda uygulanır.
+        # Tek müşteride PARTITION BY gereksizdir ve SQLite'ı tüm satırları sıralamaya zorlar
+        partition = "PARTITION BY t.customer_id" if customer_id is None else ""
+        later = f"""SUM({LEDGER_CHANGE_SQL}) OVER ({partition} ORDER BY t.date DESC, t.id DESC
+                                              ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)"""
+        base_where, params = self._transaction_filter_sql(customer_id, None)
+        if not any((filters or {}).values()):
+            return self.conn.execute(f"""
+                SELECT t.id, t.customer_id, c.first_name || ' ' || c.last_name, t.date,
+                       t.transaction_type, t.payment_type, t.amount, t.description,
+                       ROUND(c.debt - COALESCE({later}, 0), 2)
+                FROM transactions t
+                LEFT JOIN customers c ON c.id = t.customer_id
+                {base_where}
+                ORDER BY t.date DESC, t.id DESC
+                LIMIT ? OFFSET ?
+            """, params + page)
+        where, filter_params = self._transaction_filter_sql(None, filters)
+        return self.conn.execute(f"""
+            SELECT t.id, t.customer_id, c.first_name || ' ' || c.last_name, t.date,
+                   t.transaction_type, t.payment_type, t.amount, t.description,
+                   ROUND(c.debt - COALESCE(t.later, 0), 2)
+            FROM (
+                SELECT t.*, {later} AS later
+                FROM transactions t
+                {base_where}
+            ) t
+            LEFT JOIN customers c ON c.id = t.customer_id
+            {where}
+            ORDER BY t.date DESC, t.id DESC
+            LIMIT ? OFFSET ?
+        """, params + filter_params + page)
+
+    def _check_search(self, filters):
+        # Dizin, geçiş adımı bitene kadar eksiktir; salt okunur bağlantılar (shards, sunucu
+        # okuyucuları) geçişleri hiç uygulamaz. Eksik sonuç yerine açık bir hata verilir.
+        if self._search_ready or not fts_query((filters or {}).get('search')):
+            return
+        if not search_ready(self):
+            raise SearchIndexPending("açıklama arama dizini henüz hazır değil; "
+                                     "'python -m muhasabe migrate run' ile tamamlayın")
+        self._search_ready = True
+
+    def _count_matches(self, search):
+        return self.conn.execute("SELECT COUNT(*) FROM transactions_fts WHERE transactions_fts MATCH ?",
+                                 (search,)).fetchone()[0]
+
+    @staticmethod
+    def _transaction_filter_sql(customer_id=None, filters=None, by_date=False):
+        # by_date: arama çok satırla eşleşiyor ve sonuç tarih sırasıyla sayfalanacak. FTS5
+        # eşleşme sayısını planlayıcıya bildirmez; planlayıcı eşleşme listesinden sürüp yüz
+        # binlerce satırı sıralar. "+t.id" listeyi yalnızca üyelik denetimine bırakır, tarih
+        # (ya da müşteri) indeksi sırayla yürünür ve ilk sayfa hemen dolar.
+        # silinmiş hareketler ve silinmiş (soft) müşterilerin hareketleri dahil edilmez
+        clauses = ["t.deleted_at IS NULL",
+                   "t.customer_id NOT IN (SELECT id FROM customers WHERE deleted_at IS NOT NULL)"]
+        params = []
+        if customer_id is not None:
+            clauses.append("t.customer_id = ?")
+            params.append(customer_id)
+        filters = filters or {}
+        if filters.get('type'):
+            clauses.append("t.transaction_type = ?")
+            params.append(filters['type'])
+        if filters.get('payment'):
+            clauses.append("t.payment_type = ?")
+            params.append(filters['payment'])
+        if filters.get('start_date'):
+            clauses.append("t.date >= ?")
+            params.append(str(filters['start_date']))
+        if filters.get('end_date'):
+            # bitiş günü dahil: ertesi günün başından küçük
+            end = filters['end_date']
+            if isinstance(end, str):
+                end = datetime.strptime(end[:10], "%Y-%m-%d").date()
+            clauses.append("t.date < ?")
+            params.append(str(end + timedelta(days=1)))
+        search = fts_query(filters.get('search'))
+        if search:
+            column = "+t.id" if by_date else "t.id"
+            clauses.append(f"{column} IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?)")
+            params.append(search)
+        return "WHERE " + " AND ".join(clauses), params
+
+    def get_period_totals(self, customer_id=None, filters=None):
+        self._check_search(filters)
+        where, params = self._transaction_filter_sql(customer_id, filters)
+        row = self.conn.execute(f"""
+            SELECT COUNT(*),
+                   COALESCE(SUM(CASE WHEN t.transaction_type='income' THEN t.amount ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN t.transaction_type='expense' THEN t.amount ELSE 0 END), 0)
+            FROM transactions t
+            {where}
+        """, params).fetchone()
+        return {'count': row[0], 'total_paid': row[1], 'total_debt': row[2]}
+
+    def verify(self):
+        """Veritabanı tutarlılık denetimi; bulunan sorunların listesini döner."""
+        problems = []
+        for (message,) in self.conn.execute("PRAGMA integrity_check"):
+            if message != "ok":
+                problems.append(f"integrity_check: {message}")
+        orphans = self.conn.execute("""
+            SELECT COUNT(*) FROM transactions t
+            WHERE NOT EXISTS (SELECT 1 FROM customers c WHERE c.id = t.customer_id)
+        """).fetchone()[0]
+        if orphans:
+            problems.append(f"müşterisi olmayan {orphans} hareket var")
+        total, count = self.conn.execute(
+            "SELECT COALESCE(SUM(debt), 0), COUNT(*) FROM customers WHERE deleted_at IS NULL").fetchone()
+        cached = self.conn.execute("SELECT total_debt, customer_count FROM customer_totals WHERE id = 1").fetchone()
+        if cached is None or cached[1] != count or abs(cached[0] - total) > 0.005:
+            problems.append("customer_totals toplamları müşteri tablosuyla uyuşmuyor")
+        return problems
+
+    def _file_size(self):
+        return sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal")
+                   if os.path.exists(self.path + suffix))
+
+    def sweep(self, purge_deleted=False):
+        """Bakım: müşterisi olmayan hareketleri siler, istenirse silinmiş (soft) müşterileri
+        hareketleriyle birlikte kalıcı olarak kaldırır, ardından VACUUM ile dosyayı küçültür.
+
+        {'orphans', 'purged', 'size_before', 'size_after'} döner.
+        """
+        size_before = self._file_size()
+        with self.batch():
+            orphans = self.conn.execute("""
+                DELETE FROM transactions
+                WHERE NOT EXISTS (SELECT 1 FROM customers c WHERE c.id = transactions.customer_id)
+            """).rowcount
+            purged = 0
+            if purge_deleted:
+                self.conn.execute("""
+                    DELETE FROM transactions
+                    WHERE customer_id IN (SELECT id FROM customers WHERE deleted_at IS NOT NULL)
+                """)
+                purged = self.conn.execute("DELETE FROM customers WHERE deleted_at IS NOT NULL").rowcount
+        self.conn.execute("VACUUM")
+        # WAL kipinde VACUUM sayfaları önce WAL dosyasına yazar; ana dosyaya aktarıp WAL'ı boşalt
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("PRAGMA optimize")
+        self._bump()
+        return {'orphans': orphans, 'purged': purged, 'size_before': size_before, 'size_after': self._file_size()}
+
+    def list_all_transactions(self):
+        """Tüm müşterilerin hareketleri, müşteri adıyla (Hareketler sekmesi için)."""
+        return self.conn.execute("""
+            SELECT t.id, t.amount, t.description, t.transaction_type, t.payment_type, t.date, 
+                c.first_name || ' ' || c.last_name as customer_name
+            FROM transactions t
+            JOIN customers c ON t.customer_id = c.id
+            WHERE t.deleted_at IS NULL AND c.deleted_at IS NULL
+            ORDER BY t.date DESC
+        """).fetchall()
+
+    def get_transactions(self, customer_id):
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT id, amount, description, transaction_type, payment_type, date 
+            FROM transactions 
+            WHERE customer_id = ? AND deleted_at IS NULL
+            ORDER BY date DESC
+        """, (customer_id,))
+        return cur.fetchall()
+
+    def get_transaction_stats(self, customer_id):
+        cur = self.conn.cursor()
+
+        cur.execute("""
+            SELECT 
+                SUM(CASE WHEN transaction_type='income' THEN amount ELSE 0 END) as total_income,
+                SUM(CASE WHEN transaction_type='expense' THEN amount ELSE 0 END) as total_expense
+            FROM transactions 
+            WHERE customer_id=? AND deleted_at IS NULL
+        """, (customer_id,))
+        stats = cur.fetchone()
+
+        date_30_days_ago = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        cur.execute("""
+            SELECT 
+                SUM(CASE WHEN transaction_type='income' THEN amount ELSE 0 END) as monthly_income,
+                SUM(CASE WHEN transaction_type='expense' THEN amount ELSE 0 END) as monthly_expense
+            FROM transactions 
+            WHERE customer_id=? AND date >= ? AND deleted_at IS NULL
+        """, (customer_id, date_30_days_ago))
+        monthly_stats = cur.fetchone()
+
+        return {
+            'total_paid': stats[0] or 0,
+            'total_debt': stats[1] or 0,
+            'monthly_paid': monthly_stats[0] or 0,
+            'monthly_debt': monthly_stats[1] or 0
+        }
@@ -0,0 +1,147 @@
+"""Aynı kişinin farklı yazımlarla birden fazla kez girildiği müşteri kayıtlarını bulur.
+
+Adlar Türkçe harfler sadeleştirilerek (fold_text), telefonlar E.164 biçimine
+(+905321234567), TC kimlik numaraları sağlama basamakları denetlenerek
+karşılaştırılır. Her müşteri birkaç "blok anahtarı" altında gruplanır (geçerli
+TC, telefon, sıralanmış ad belirteçleri, soyad + ad başı); yalnızca aynı bloğa
+düşen çiftler puanlanır. Böylece n² yerine yaklaşık n işlemle aday bulunur.
+"""
+import re
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+from database import fold_text
+
+# Puan eşiği ve ağırlıklar: ad benzerliği en fazla 0.5, aynı geçerli TC 0.5, aynı telefon 0.35
+DEFAULT_THRESHOLD = 0.75
+NAME_WEIGHT = 0.5
+TC_WEIGHT = 0.5
+PHONE_WEIGHT = 0.35
+# İki farklı geçerli TC: farklı kişiler
+TC_CONFLICT_PENALTY = 0.6
+# Çok kalabalık bloklar (ör. yaygın bir ad) çift sayısını patlatmasın diye atlanır
+MAX_BLOCK_SIZE = 200
+
+Candidate = namedtuple("Candidate", "score keep_id merge_id reasons")
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(first_name, last_name=""):
+    return " ".join(_NON_ALNUM.sub(" ", fold_text(f"{first_name or ''} {last_name or ''}")).split())
+
+
+def normalize_phone(phone, country_code="90"):
+    """Telefonu E.164 biçimine getirir; çözümlenemezse None."""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if phone.strip().startswith("+"):
+        return "+" + digits if 8 <= len(digits) <= 15 else None
+    if digits.startswith("00"):
+        digits = digits[2:]
+        return "+" + digits if 8 <= len(digits) <= 15 else None
+    if digits.startswith(country_code) and len(digits) == len(country_code) + 10:
+        return "+" + digits
+    if digits.startswith("0") and len(digits) == 11:
+        return "+" + country_code + digits[1:]
+    if len(digits) == 10 and digits[0] != "0":
+        return "+" + country_code + digits
+    return None
+
+
+def valid_tc(tc_no):
+    """TC kimlik numarasının biçim ve sağlama basamaklarını denetler."""
+    if not tc_no or len(tc_no) != 11 or not tc_no.isdigit() or tc_no[0] == "0":
+        return False
+    d = [int(c) for c in tc_no]
+    if ((sum(d[0:9:2]) * 7 - sum(d[1:8:2])) % 10) != d[9]:
+        return False
+    return sum(d[:10]) % 10 == d[10]
+
+
+def _record(row):
+    customer_id, first_name, last_name, tc_no, phone = row[:5]
+    tc_no = (tc_no or "").strip()
+    return {
+        'id': customer_id,
+        'name': normalize_name(first_name, last_name),
+        'tc': tc_no if valid_tc(tc_no) else None,
+        'phone': normalize_phone(phone),
+    }
+
+
+def _blocking_keys(record):
+    keys = []
+    if record['tc']:
+        keys.append(("tc", record['tc']))
+    if record['phone']:
+        keys.append(("phone", record['phone']))
+    tokens = record['name'].split()
+    if tokens:
+        # belirteç sırası: "Yılmaz Ali" ile "Ali Yılmaz" aynı bloğa düşer
+        keys.append(("name", " ".join(sorted(tokens))))
+        if len(tokens) > 1:
+            # soyad + ad başı: "Mehmet Öz" / "Mehmt Oz" gibi yazım hataları
+            keys.append(("initial", tokens[-1] + " " + tokens[0][0]))
+    return keys
+
+
+def score_pair(a, b, threshold=0.0):
+    """İki kaydın aynı kişi olma puanı (0..1) ve gerekçeleri.
+
+    Ad karşılaştırması en pahalı adımdır; TC/telefon puanıyla eşiğe hiç
+    ulaşılamayacaksa atlanır ve (0, []) döner.
+    """
+    reasons = []
+    score = 0.0
+    if a['tc'] and b['tc']:
+        if a['tc'] == b['tc']:
+            score += TC_WEIGHT
+            reasons.append("aynı TC")
+        else:
+            score -= TC_CONFLICT_PENALTY
+    if a['phone'] and a['phone'] == b['phone']:
+        score += PHONE_WEIGHT
+        reasons.append("aynı telefon")
+    if score + NAME_WEIGHT < threshold:
+        return 0.0, []
+    if sorted(a['name'].split()) == sorted(b['name'].split()):
+        name_score = 1.0
+    else:
+        name_score = SequenceMatcher(None, a['name'], b['name']).ratio()
+    score += NAME_WEIGHT * name_score
+    if name_score >= 0.8:
+        reasons.insert(0, f"ad %{name_score * 100:.0f}")
+    return max(0.0, min(1.0, score)), reasons
+
+
+def find_duplicates(db, threshold=DEFAULT_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """Olası mükerrer müşteri çiftleri, puana göre azalan sırada.
+
+    Her çiftte eski kayıt (küçük id) korunacak, yenisi birleştirilecek kayıttır.
+    """
+    records = {}
+    blocks = defaultdict(list)
+    for row in db.iter_customers():
+        record = _record(row)
+        records[record['id']] = record
+        for key in _blocking_keys(record):
+            blocks[key].append(record['id'])
+
+    seen = set()
+    candidates = []
+    for ids in blocks.values():
+        if len(ids) < 2 or len(ids) > max_block_size:
+            continue
+        for i, left in enumerate(ids):
+            for right in ids[i + 1:]:
+                pair = (left, right) if left < right else (right, left)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                score, reasons = score_pair(records[pair[0]], records[pair[1]], threshold)
+                if score >= threshold:
+                    candidates.append(Candidate(round(score, 3), pair[0], pair[1], reasons))
+    candidates.sort(key=lambda c: (-c.score, c.keep_id, c.merge_id))
+    return candidates
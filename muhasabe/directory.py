@@ -0,0 +1,176 @@
+import bisect
+import weakref
+from array import array
+
+from database import fold_text
+
+
+class CustomerDirectory:
+    """Süreç genelinde paylaşılan, bellekte tutulan müşteri listesi.
+
+    Sütunlar ayrı diziler halinde (last_name, first_name, id) sırasıyla saklanır.
+    Database.generation değiştiğinde yalnızca değişen müşteriler yeniden okunur;
+    değişiklik kaydı yetmezse (ör. başka bir bağlantı yazdıysa) liste baştan yüklenir.
+    """
+
+    _instances = weakref.WeakKeyDictionary()
+    # bundan fazla müşteri değiştiyse yamalamak yerine liste baştan yüklenir
+    PATCH_LIMIT = 64
+
+    @classmethod
+    def shared(cls, db):
+        directory = cls._instances.get(db)
+        if directory is None:
+            directory = cls._instances[db] = cls(db)
+        return directory
+
+    def __init__(self, db):
+        self.db = db
+        self.generation = None
+        self.ids = array('q')
+        self.first_names = []
+        self.last_names = []
+        self.tc_nos = []
+        self.phones = []
+        self.addresses = []
+        self.notes = []
+        self.debts = array('d')
+        self._row_of = None
+        self._haystack = None
+        self._offsets = None
+
+    def _ensure(self):
+        generation = self.db.generation
+        if generation == self.generation:
+            return
+        changed = None if self.generation is None else self.db.changes_since(self.generation)
+        if changed is None or len(changed) > self.PATCH_LIMIT:
+            self._load_all()
+        else:
+            self._patch(changed)
+        self.generation = generation
+
+    def invalidate(self):
+        """Liste sonraki kullanımda veritabanından baştan yüklenir (Yenile düğmeleri)."""
+        self.generation = None
+
+    def _load_all(self):
+        rows = self.db.list_customers()
+        self.ids = array('q', (r[0] for r in rows))
+        self.first_names = [r[1] for r in rows]
+        self.last_names = [r[2] for r in rows]
+        self.tc_nos = [r[3] for r in rows]
+        self.phones = [r[4] for r in rows]
+        self.addresses = [r[5] for r in rows]
+        self.notes = [r[6] for r in rows]
+        self.debts = array('d', (float(r[7] or 0) for r in rows))
+        self._row_of = None
+        self._haystack = None
+
+    def _columns(self):
+        return (self.ids, self.first_names, self.last_names, self.tc_nos, self.phones,
+                self.addresses, self.notes, self.debts)
+
+    def _sort_key(self, row):
+        return (self.last_names[row], self.first_names[row], self.ids[row])
+
+    def _remove(self, row):
+        for column in self._columns():
+            del column[row]
+
+    def _insert(self, values):
+        key = (values[2], values[1], values[0])
+        row = bisect.bisect_left(range(len(self.ids)), key, key=self._sort_key)
+        values = list(values)
+        values[7] = float(values[7] or 0)
+        for column, value in zip(self._columns(), values):
+            column.insert(row, value)
+
+    def _patch(self, changed):
+        fresh = {r[0]: r for r in self.db.get_customers_by_ids(changed)}
+        row_of = self._index()
+        structural = False
+        for customer_id in changed:
+            row = row_of.get(customer_id)
+            values = fresh.get(customer_id)
+            if row is not None and values is not None and \
+                    (values[2], values[1]) == (self.last_names[row], self.first_names[row]):
+                # yerinde güncelleme (ör. hareket sonrası borç değişimi)
+                self.tc_nos[row], self.phones[row] = values[3], values[4]
+                self.addresses[row], self.notes[row] = values[5], values[6]
+                self.debts[row] = float(values[7] or 0)
+                continue
+            if row is not None:
+                self._remove(row)
+                row_of = self._index(rebuild=True)
+            if values is not None:
+                self._insert(values)
+                row_of = self._index(rebuild=True)
+            structural = True
+        # arama metni tc/telefon değişiminde de değişir
+        self._haystack = None
+        if structural:
+            self._row_of = None
+
+    def _index(self, rebuild=False):
+        if self._row_of is None or rebuild:
+            self._row_of = {customer_id: row for row, customer_id in enumerate(self.ids)}
+        return self._row_of
+
+    def _search_index(self):
+        # Tüm müşterilerin sadeleştirilmiş arama metni tek bir metinde birleştirilir;
+        # str.find ile taranır, eşleşen konum ofsetlerden satıra çevrilir.
+        if self._haystack is None:
+            parts = []
+            offsets = array('q')
+            position = 0
+            for row in range(len(self.ids)):
+                key = fold_text(f"{self.first_names[row]} {self.last_names[row]} "
+                                f"{self.tc_nos[row] or ''} {self.phones[row] or ''}") + "\n"
+                offsets.append(position)
+                parts.append(key)
+                position += len(key)
+            offsets.append(position)
+            self._haystack = "".join(parts)
+            self._offsets = offsets
+        return self._haystack, self._offsets
+
+    def __len__(self):
+        self._ensure()
+        return len(self.ids)
+
+    def _row(self, row):
+        return (self.ids[row], self.first_names[row], self.last_names[row], self.tc_nos[row],
+                self.phones[row], self.addresses[row], self.notes[row], self.debts[row])
+
+    def row(self, row):
+        self._ensure()
+        return self._row(row)
+
+    def rows(self):
+        self._ensure()
+        return [self._row(i) for i in range(len(self.ids))]
+
+    def row_of(self, customer_id):
+        self._ensure()
+        return self._index().get(customer_id)
+
+    def get(self, customer_id):
+        row = self.row_of(customer_id)
+        return None if row is None else self._row(row)
+
+    def search(self, text, limit=None):
+        """Ad, soyad, TC no veya telefonda text geçen müşterilerin satırları (sıralı)."""
+        self._ensure()
+        needle = fold_text(text.strip())
+        if not needle:
+            count = len(self.ids) if limit is None else min(limit, len(self.ids))
+            return [self._row(i) for i in range(count)]
+        haystack, offsets = self._search_index()
+        result = []
+        pos = haystack.find(needle)
+        while pos != -1 and (limit is None or len(result) < limit):
+            row = bisect.bisect_right(offsets, pos) - 1
+            result.append(self._row(row))
+            pos = haystack.find(needle, offsets[row + 1])
+        return result
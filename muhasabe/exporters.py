@@ -0,0 +1,199 @@
+"""Hareketleri CSV, JSON Lines veya XLSX olarak akış halinde dışa aktarır.
+
+Satırlar imleçten fetchmany ile parça parça okunup hemen dosyaya yazılır;
+bellek kullanımı satır sayısından bağımsızdır. XLSX dosyası da zip içine
+sayfa sayfa yazılır (openpyxl gerekmez).
+"""
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+TRANSACTION_FIELDS = ["id", "customer_id", "customer_name", "date", "transaction_type",
+                      "payment_type", "amount", "description"]
+TRANSACTION_HEADERS = ["ID", "Müşteri ID", "Müşteri", "Tarih", "Tür", "Ödeme", "Tutar", "Açıklama"]
+# tek müşterinin dökümüne eklenen, hareketten sonraki bakiye sütunu
+BALANCE_FIELD, BALANCE_HEADER = "balance", "Bakiye"
+
+EXPORT_FORMATS = {"csv": ".csv", "jsonl": ".jsonl", "xlsx": ".xlsx"}
+
+# fetchmany ile okunan satır sayısı ve ilerleme bildirimi sıklığı
+BATCH_SIZE = 2000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class CsvWriter:
+    def __init__(self, path, fields):
+        import csv
+        # Excel'in Türkçe karakterleri doğru açması için BOM'lu UTF-8
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(fields)
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, path, fields):
+        import json
+        self._dumps = json.dumps
+        self._fields = fields
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write_rows(self, rows):
+        fields, dumps = self._fields, self._dumps
+        self._file.write("".join(dumps(dict(zip(fields, row)), ensure_ascii=False) + "\n" for row in rows))
+
+    def close(self):
+        self._file.close()
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class XlsxWriter:
+    """En küçük geçerli SpreadsheetML paketi; Excel'in satır sınırı aşılınca yeni sayfa açar."""
+
+    MAX_ROWS = 1048576
+
+    def __init__(self, path, fields, sheet_name="Hareketler"):
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._header = fields
+        self._sheet_name = sheet_name
+        self._sheets = 0
+        self._sheet = None
+        self._row = 0
+        self._letters = [_column_letter(i) for i in range(len(fields))]
+        self._open_sheet()
+
+    def _open_sheet(self):
+        self._close_sheet()
+        self._sheets += 1
+        self._sheet = self._zip.open(f"xl/worksheets/sheet{self._sheets}.xml", "w", force_zip64=True)
+        self._sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                          b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                          b'<sheetData>')
+        self._row = 0
+        self._write_row(self._header)
+
+    def _close_sheet(self):
+        if self._sheet is not None:
+            self._sheet.write(b"</sheetData></worksheet>")
+            self._sheet.close()
+            self._sheet = None
+
+    def _write_row(self, values):
+        self._row += 1
+        r = self._row
+        cells = []
+        for letter, value in zip(self._letters, values):
+            if value is None:
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{letter}{r}"><v>{value}</v></c>')
+            else:
+                text = escape(_XML_ILLEGAL.sub("", str(value)))
+                cells.append(f'<c r="{letter}{r}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        self._sheet.write(f'<row r="{r}">{"".join(cells)}</row>'.encode("utf-8"))
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self._row >= self.MAX_ROWS:
+                self._open_sheet()
+            self._write_row(row)
+
+    def close(self):
+        self._close_sheet()
+        sheets = range(1, self._sheets + 1)
+        self._zip.writestr("[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in sheets)
+            + '</Types>')
+        self._zip.writestr("_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>')
+        self._zip.writestr("xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="{self._sheet_name}{"" if i == 1 else f" {i}"}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i in sheets)
+            + '</sheets></workbook>')
+        self._zip.writestr("xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(f'<Relationship Id="rId{i}" '
+                      'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                      f'Target="worksheets/sheet{i}.xml"/>' for i in sheets)
+            + '</Relationships>')
+        self._zip.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter, "xlsx": XlsxWriter}
+
+
+def transaction_fields(with_balance=False, headers=False):
+    fields = TRANSACTION_HEADERS if headers else TRANSACTION_FIELDS
+    if with_balance:
+        fields = fields + [BALANCE_HEADER if headers else BALANCE_FIELD]
+    return fields
+
+
+def export_transactions(db, path, fmt, customer_id=None, filters=None, progress=None, cancelled=None,
+                        batch_size=BATCH_SIZE):
+    """Filtreye uyan hareketleri path'e yazar ve yazılan satır sayısını döner.
+
+    progress(yazılan, toplam) her parçadan sonra çağrılır; cancelled() True dönerse
+    yarım dosya silinmeden ExportCancelled fırlatılır (silmek çağırana kalır).
+    customer_id verilirse her satıra o hareketten sonraki bakiye de yazılır.
+    """
+    total = db.get_period_totals(customer_id, filters)['count'] if progress else None
+    with_balance = customer_id is not None
+    cursor = db.iter_transactions(customer_id, filters, with_balance=with_balance)
+    return write_transactions(cursor, path, fmt, with_balance, total, progress, cancelled, batch_size)
+
+
+def write_transactions(cursor, path, fmt, with_balance=False, total=None, progress=None, cancelled=None,
+                       batch_size=BATCH_SIZE):
+    """fetchmany destekleyen kaynaktaki (imleç ya da TransactionColumns.cursor()) satırları yazar."""
+    writer = WRITERS[fmt](path, transaction_fields(with_balance, fmt == "xlsx"))
+    written = 0
+    try:
+        while True:
+            if cancelled is not None and cancelled():
+                raise ExportCancelled()
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            writer.write_rows(rows)
+            written += len(rows)
+            if progress:
+                progress(written, total)
+    finally:
+        writer.close()
+    return written
@@ -0,0 +1,334 @@
+"""Sürümlü şema geçişleri.
+
+_create_tables yalnızca eksik tablo/tetikleyicileri oluşturur ve her açılışta çalışır;
+büyük tablolara dokunan değişiklikler (indeks kurmak, sütun doldurmak, tarih ya da tutar
+biçimi çevirmek) burada sıralı adımlar olarak tanımlanır. Uygulanan adımlar
+schema_version tablosuna yazılır, her adım bir kez çalışır.
+
+Database açılırken migrate(db, inline_only=True) yalnızca küçük tablolarda hızlı biten
+adımları uygular; kalanlar bekler ve arka planda (app2) ya da "python -m muhasabe migrate
+run" ile uygulanır, böylece 5 GB'lık bir dosyada açılış dakikalarca donmaz.
+
+- BackfillMigration satırları rowid aralıklarıyla CHUNK_ROWS'luk parçalar hâlinde işler.
+  Her parça kendi kısa işleminde onaylanır ve kalınan yer (schema_migration_progress)
+  aynı işlemde yazılır: arada yapılan yazmalar beklemez, yarıda kesilen adım kaldığı
+  yerden devam eder.
+- IndexMigration indeksi tek işlemde kurar (SQLite indeksi tek ifadede oluşturur, parça
+  parça kurulamaz). WAL sayesinde okuyucular bu sürede eski indeksle çalışmaya devam
+  eder; yazmalar kurulum bitene kadar bekler.
+
+Bir adım beklerken sonrakiler de bekler; adımlar birbirine dayanabilir.
+
+Adımların yaptığı yazmalar (ör. tarih biçimi düzeltmesi) kullanıcı değişikliği değildir:
+her parça yazarken sync_state'e 'migration' işareti konur, denetim ve eşitleme günlüğü
+tetikleyicileri (bkz. database.NOT_MIGRATING) bu işaret varken çalışmaz. İşaret aynı
+işlem içinde silinir; geçiş sürerken başka bağlantılardan yapılan yazmalar günlüğe girer.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime
+
+# Açılışta uygulanacak adımların dokunabileceği en fazla satır (~yarım saniye)
+INLINE_ROWS = 50_000
+# Bir parçada işlenen satır; her parça ayrı işlemdir
+CHUNK_ROWS = 5_000
+
+
+def _create_tables(db):
+    db.conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+    )""")
+    db.conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migration_progress (
+        version INTEGER PRIMARY KEY,
+        position INTEGER NOT NULL
+    )""")
+
+
+def _table_exists(db, name):
+    return db.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                           (name,)).fetchone() is not None
+
+
+def _applied(db):
+    if not _table_exists(db, "schema_version"):
+        return set()
+    return {row[0] for row in db.conn.execute("SELECT version FROM schema_version")}
+
+
+def _position(db, version):
+    if not _table_exists(db, "schema_migration_progress"):
+        return 0
+    row = db.conn.execute("SELECT position FROM schema_migration_progress WHERE version = ?",
+                          (version,)).fetchone()
+    return row[0] if row else 0
+
+
+def _started(db, version):
+    return db.conn.execute("SELECT 1 FROM schema_migration_progress WHERE version = ?",
+                           (version,)).fetchone() is not None
+
+
+def _max_rowid(db, table):
+    return db.conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+
+
+@contextmanager
+def _unlogged(db, version):
+    # db.batch() içinde çağrılır; işaret işlemle birlikte onaylanmadan silinir
+    db.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('migration', ?)", (version,))
+    yield
+    db.conn.execute("DELETE FROM sync_state WHERE key = 'migration'")
+
+
+class Migration:
+    """Tek işlemde uygulanan adım; alt sınıflar apply'ı tanımlar."""
+
+    def __init__(self, version, name):
+        self.version = version
+        self.name = name
+
+    def remaining(self, db):
+        """Adımın dokunacağı yaklaşık satır sayısı; INLINE_ROWS'u aşan adım açılışta uygulanmaz."""
+        return 0
+
+    def completed(self, db):
+        """(yapılan, toplam) satır; parça parça ilerlemeyen adımlar için (0, 0)."""
+        return 0, 0
+
+    def apply(self, db):
+        raise NotImplementedError
+
+    def run(self, db, progress=None, stop=None):
+        """Adımı uygular; bittiyse True, stop() ile durdurulduysa False döner."""
+        with db.batch():
+            # başka bir süreç aynı anda uygulamış olabilir
+            if self.version in _applied(db):
+                return True
+            with _unlogged(db, self.version):
+                self.apply(db)
+            self._finish(db)
+        return True
+
+    def _finish(self, db):
+        db.conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (self.version, self.name))
+        db.conn.execute("DELETE FROM schema_migration_progress WHERE version = ?", (self.version,))
+
+
+class IndexMigration(Migration):
+    """İndeksi oluşturur ya da tanımı değiştiyse yeniden kurar."""
+
+    def __init__(self, version, name, table, index, body):
+        super().__init__(version, name)
+        self.table = table
+        self.index = index
+        self.body = body
+
+    def remaining(self, db):
+        row = db.conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (self.index,)).fetchone()
+        wanted = f"CREATE INDEX {self.index} {self.body}"
+        if row is not None and " ".join(row[0].split()) == " ".join(wanted.split()):
+            # indeks zaten istenen tanımda (yeni veritabanı ya da daha önce kurulmuş)
+            return 0
+        return _max_rowid(db, self.table)
+
+    def apply(self, db):
+        db._ensure_schema_object("index", self.index, self.body)
+
+    def run(self, db, progress=None, stop=None):
+        if stop is not None and stop():
+            return False
+        if progress is not None:
+            progress(self, 0, 1)
+        super().run(db)
+        if progress is not None:
+            progress(self, 1, 1)
+        return True
+
+
+class BackfillMigration(Migration):
+    """Tablonun satırlarını rowid sırasıyla parça parça düzeltir ya da başka tabloya işler.
+
+    fix(satır) satır için write parametrelerini ya da dokunulmayacaksa None döner;
+    select "rowid > ? ORDER BY rowid LIMIT ?" biçiminde, ilk sütunu rowid olan sorgudur.
+    setup(db) verilirse ilk parçayla aynı işlemde bir kez çalışır; kalınan yer de o işlemde
+    yazıldığından tetikleyiciler schema_migration_progress'e bakarak işlenmiş satırları
+    (rowid <= position) ayırt edebilir.
+    """
+
+    def __init__(self, version, name, table, select, write, fix, setup=None, chunk=None):
+        super().__init__(version, name)
+        self.table = table
+        self.select = select
+        self.write = write
+        self.fix = fix
+        self.setup = setup
+        self.chunk = chunk
+
+    def remaining(self, db):
+        return max(_max_rowid(db, self.table) - _position(db, self.version), 0)
+
+    def completed(self, db):
+        total = _max_rowid(db, self.table)
+        return min(_position(db, self.version), total), total
+
+    def run(self, db, progress=None, stop=None):
+        chunk = self.chunk or CHUNK_ROWS
+        changed = 0
+        try:
+            while True:
+                if stop is not None and stop():
+                    return False
+                with db.batch():
+                    if self.version in _applied(db):
+                        return True
+                    position = _position(db, self.version)
+                    if self.setup is not None and not _started(db, self.version):
+                        self.setup(db)
+                    rows = db.conn.execute(self.select, (position, chunk)).fetchall()
+                    if not rows:
+                        self._finish(db)
+                        return True
+                    updates = [params for params in map(self.fix, rows) if params is not None]
+                    if updates:
+                        with _unlogged(db, self.version):
+                            db.conn.executemany(self.write, updates)
+                        changed += len(updates)
+                    db.conn.execute("INSERT OR REPLACE INTO schema_migration_progress (version, position) "
+                                    "VALUES (?, ?)", (self.version, rows[-1][0]))
+                if progress is not None:
+                    total = _max_rowid(db, self.table)
+                    progress(self, min(rows[-1][0], total), total)
+        finally:
+            if changed:
+                # hangi müşterilerin değiştiği izlenmedi; tüm önbellekler geçersiz
+                db._bump()
+
+
+# --- adımlar
+
+_CANONICAL_DATE = "%Y-%m-%d %H:%M:%S"
+_CANONICAL_PATTERN = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d")
+_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%d %H:%M:%S.%f",
+                 "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y",
+                 "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+
+def canonical_date(text):
+    """Tarih metnini 'YYYY-MM-DD HH:MM:SS' biçimine çevirir; zaten öyleyse ya da
+    okunamıyorsa None döner (okunamayan değere dokunulmaz)."""
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(_CANONICAL_DATE)
+        except ValueError:
+            continue
+    return None
+
+
+def _fix_transaction_date(row):
+    rowid, date = row
+    # çoğu satır zaten doğru biçimde; strptime yalnızca kalanlar için
+    if isinstance(date, str) and _CANONICAL_PATTERN.fullmatch(date):
+        return None
+    date = canonical_date(date)
+    return None if date is None else (date, rowid)
+
+
+# Açıklama araması (Database.iter_transactions, filters['search']). İçeriksiz FTS5 tablosu
+# yalnızca fold_text(description) sözcüklerini ve rowid'leri tutar; açıklamanın kendisi
+# transactions'ta kalır. İçeriksiz tablodan silerken eski değer aynen verilmelidir, bu
+# yüzden tetikleyiciler de fold_text kullanır (Database bağlantıya SQL işlevi olarak ekler).
+# Doldurma sürerken tetikleyiciler yalnızca işlenmiş satırları (id <= position) izler;
+# sonrakileri, o andaki açıklamalarıyla doldurma parçaları ekler.
+_FTS_VERSION = 3
+_FTS_PENDING = f"COALESCE((SELECT position FROM schema_migration_progress WHERE version = {_FTS_VERSION}), {{row}}.id)"
+
+
+def _create_transactions_fts(db):
+    db.conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts
+        USING fts5(description, content='', tokenize='unicode61 remove_diacritics 2')""")
+    db._ensure_schema_object("trigger", "trg_transactions_fts_insert", f"""
+    AFTER INSERT ON transactions WHEN NEW.id <= {_FTS_PENDING.format(row="NEW")}
+    BEGIN
+        INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, fold_text(NEW.description));
+    END""")
+    db._ensure_schema_object("trigger", "trg_transactions_fts_update", f"""
+    AFTER UPDATE OF description ON transactions WHEN OLD.id <= {_FTS_PENDING.format(row="OLD")}
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        VALUES ('delete', OLD.id, fold_text(OLD.description));
+        INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, fold_text(NEW.description));
+    END""")
+    db._ensure_schema_object("trigger", "trg_transactions_fts_delete", f"""
+    AFTER DELETE ON transactions WHEN OLD.id <= {_FTS_PENDING.format(row="OLD")}
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        VALUES ('delete', OLD.id, fold_text(OLD.description));
+    END""")
+
+
+MIGRATIONS = [
+    # Eski sürümler ve eşitlemeyle gelen hareketlerde '2024-03-15', '15.03.2024 10:00' gibi
+    # tarihler var; tarih filtreleri ve sıralama metin karşılaştırmasıyla çalıştığı için
+    # bunlar yanlış aralıklarda görünür.
+    BackfillMigration(
+        1, "hareket tarihleri YYYY-MM-DD HH:MM:SS biçimine", "transactions",
+        "SELECT id, date FROM transactions WHERE id > ? ORDER BY id LIMIT ?",
+        "UPDATE transactions SET date = ? WHERE id = ?",
+        _fix_transaction_date),
+    # Müşteri indeksi tombstone'ları da kapsar: müşteri silme/birleştirme ve FOREIGN KEY
+    # denetimi customer_id ile tüm satırları arar, kısmi indeks bunlarda kullanılamaz.
+    IndexMigration(
+        2, "idx_transactions_customer_date silinmiş hareketleri de kapsar", "transactions",
+        "idx_transactions_customer_date", "ON transactions (customer_id, date)"),
+    BackfillMigration(
+        _FTS_VERSION, "hareket açıklamaları için tam metin arama dizini", "transactions",
+        "SELECT id, fold_text(description) FROM transactions WHERE id > ? ORDER BY id LIMIT ?",
+        "INSERT INTO transactions_fts (rowid, description) VALUES (?, ?)",
+        tuple, setup=_create_transactions_fts),
+]
+
+
+def pending(db):
+    """Henüz uygulanmamış adımlar, sırasıyla."""
+    applied = _applied(db)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def initialized(db):
+    """Veritabanı bu sürümün şemasıyla (en az bir kez yazılabilir olarak) açılmış mı."""
+    return _table_exists(db, "schema_version")
+
+
+def search_ready(db):
+    """Açıklama arama dizini (transactions_fts) tüm hareketlerle doldurulmuş mu."""
+    return _FTS_VERSION in _applied(db)
+
+
+def current_version(db):
+    applied = _applied(db)
+    return max(applied) if applied else 0
+
+
+def migrate(db, progress=None, stop=None, inline_only=False):
+    """Bekleyen adımları sırayla uygular; hâlâ bekleyen adım kaldıysa True döner.
+
+    progress(adım, yapılan, toplam) her parçadan sonra çağrılır; stop() True dönerse
+    uygulama parça sınırında durur. inline_only ile INLINE_ROWS'tan fazla satıra dokunacak
+    ilk adımda durulur.
+    """
+    _create_tables(db)
+    db.conn.commit()
+    for migration in pending(db):
+        if inline_only and migration.remaining(db) > INLINE_ROWS:
+            return True
+        if not migration.run(db, progress, stop):
+            return True
+    return False
@@ -0,0 +1,377 @@
+"""Sorgu planı denetimi: indeks beklenen sorgular tam taramaya dönmüş mü?
+
+Üretilmiş iki veri kümesi (N ve N*ölçek hareket) üzerinde Database'in her genel
+metodu ve ana pencerenin eylemleri (müşteri/hareket sayfaları, filtreler, PDF ekstresi)
+birer senaryo olarak çalıştırılır. Senaryonun gönderdiği her SELECT/INSERT/UPDATE/DELETE
+kaydedilir ve aynı parametrelerle EXPLAIN QUERY PLAN'dan geçirilir:
+
+- customers, transactions ya da audit_log üzerinde indekssiz SCAN, senaryo o tabloyu
+  taramaya izinli değilse hatadır (izinli taramalar gerekçesiyle SCANS_ALLOWED'dadır);
+- süre satır sayısıyla ölçeklenerek denetlenir: sayfa ve tek kayıt senaryolarının süresi
+  veri büyüdükçe neredeyse sabit kalmalı; taramaların ve okuduğu satır sayısı veriyle
+  büyüyen senaryoların süresi doğrusaldan hızlı büyümemelidir.
+
+Sorun varsa çıkış kodu 1'dir; şema ya da sorgu değişikliklerinden sonra çalıştırılır:
+
+    python -m muhasabe plans --rows 50000 --scale 4
+"""
+import gc
+import os
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import chain
+
+from database import Database
+from migrations import migrate
+
+# büyüdükçe planı izlenen tablolar
+HOT_TABLES = ("customers", "transactions", "audit_log")
+PAGE_SIZE = 200  # app2.CUSTOMER_PAGE_SIZE; PyQt yüklenmesin diye kopyalandı
+DEFAULT_ROWS = 50000
+DEFAULT_SCALE = 4
+DEFAULT_REPEAT = 5
+# indeksli senaryo: büyük kümedeki süre <= küçük kümedeki * INDEX_GROWTH + FLOOR
+INDEX_GROWTH = 2.0
+# okuduğu satırlar veriyle büyüyen senaryo: büyük <= küçük * ölçek * LINEAR_SLACK + FLOOR
+# (önbelleğe sığmayan tablo ek maliyet getirir; karesel büyüme ölçek*ölçek olurdu)
+LINEAR_SLACK = 2.0
+# bu kadar kısa ölçümlerde oran gürültüdür (saniye)
+TIMING_FLOOR = 0.002
+
+_STATEMENT = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", re.IGNORECASE)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS (\w+))?$")
+_NOT_ALIAS = {"where", "on", "set", "left", "inner", "cross", "join", "order", "group", "limit",
+              "using", "values", "select", "default", "natural", "outer", "as", "not", "and"}
+
+Case = namedtuple("Case", "name run scans timed linear")
+Result = namedtuple("Result", "case plans problems small large")
+
+
+# --- ifadelerin kaydı
+
+class _RecordingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self.connection.record(sql, parameters)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        rows = iter(seq_of_parameters)
+        first = next(rows, None)
+        if first is None:
+            return super().executemany(sql, ())
+        self.connection.record(sql, first)
+        return super().executemany(sql, chain([first], rows))
+
+
+class RecordingConnection(sqlite3.Connection):
+    """Database(..., factory=RecordingConnection): gönderilen ifadeleri statements'a yazar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = None
+
+    def record(self, sql, parameters):
+        if self.statements is not None and _STATEMENT.match(sql):
+            self.statements.append((sql, parameters))
+
+    def cursor(self, factory=_RecordingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# --- veri kümesi
+
+def build_dataset(path, transactions, seed=1):
+    """transactions hareketli, transactions/10 müşterili deneme veritabanı oluşturur.
+
+    Hareketler üç yıla yayılır; %1'i silinmiş (tombstone), müşterilerin %1'i soft silinmiştir.
+    """
+    rng = random.Random(seed)
+    customers = max(transactions // 10, 10)
+    db = Database(path, delete_policy='soft', user="queryplan")
+    try:
+        db.import_customers(
+            (f"Ad{i}", f"Soyad{rng.randrange(customers)}", f"{10000000000 + i}", f"+90555{i:07d}",
+             "Adres", None, 0) for i in range(customers))
+        start = datetime(2023, 1, 1)
+        span = 3 * 365 * 24 * 3600
+        words = ["kasko", "trafik", "konut", "sağlık", "dask", "prim", "taksit", "iade", "poliçe"]
+        db.import_transactions(
+            (rng.randrange(1, customers + 1), round(rng.uniform(10, 5000), 2),
+             f"{rng.choice(words)} {rng.choice(words)} {rng.randrange(100000)}",
+             rng.choice(("income", "expense")), rng.choice(("cash", "card")),
+             (start + timedelta(seconds=rng.randrange(span))).strftime("%Y-%m-%d %H:%M:%S"))
+            for _ in range(transactions))
+        with db.batch():
+            db.conn.execute("UPDATE transactions SET deleted_at = date WHERE id % 100 = 7")
+            db.conn.execute("UPDATE customers SET deleted_at = '2024-01-01 00:00:00' WHERE id % 100 = 3")
+        db.conn.execute("ANALYZE")
+        db.conn.commit()
+    finally:
+        db.close()
+
+
+def _busiest_customer(db):
+    return db.conn.execute("""
+        SELECT customer_id FROM transactions WHERE deleted_at IS NULL
+          AND customer_id NOT IN (SELECT id FROM customers WHERE deleted_at IS NOT NULL)
+        GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()[0]
+
+
+# --- senaryolar
+
+LAST_MONTH = {'start_date': '2025-11-01', 'end_date': '2025-11-30'}
+CARD_LAST_MONTH = dict(LAST_MONTH, payment='card')
+# build_dataset açıklamaları: "kasko" hareketlerin ~%20'sinde geçer (tarih sırası), 5 haneli
+# numaralar birkaç harekette (alaka sırası, bkz. SEARCH_RANK_LIMIT)
+SEARCH_COMMON = {'search': 'kasko'}
+SEARCH_RARE = {'search': '12345'}
+
+# senaryo adı -> {tablo: taramanın neden kabul edildiği}
+SCANS_ALLOWED = {
+    "list_customers: arama": {"customers": "LIKE '%metin%' baştaki joker yüzünden indeks kullanamaz"},
+    "iter_customers: tümü": {"customers": "dışa aktarma tüm müşterileri okur"},
+    "get_period_totals: filtresiz": {"transactions": "tüm hareketlerin toplamı"},
+    "list_all_transactions": {"transactions": "tüm hareketleri döndürür"},
+    "iter_audit: kullanıcı": {"audit_log": "user sütunu indekssiz; nadir kullanılan denetim sorgusu"},
+    "verify": {"transactions": "bütünlük denetimi tüm satırları okur",
+               "customers": "bütünlük denetimi tüm satırları okur"},
+    "sweep": {"transactions": "sahipsiz hareket taraması tüm satırları okur",
+              "customers": "silinmiş müşteri taraması"},
+}
+
+
+def _fetch(cursor):
+    return cursor.fetchall()
+
+
+def _cases():
+    def case(name, run, timed=True, linear=False):
+        scans = SCANS_ALLOWED.get(name, {})
+        return Case(name, run, scans, timed, linear or bool(scans))
+
+    def page(customer_id=None, filters=None, offset=0, with_balance=False):
+        return lambda db, ctx: _fetch(db.iter_transactions(ctx[customer_id] if customer_id else None, filters,
+                                                           limit=PAGE_SIZE, offset=offset,
+                                                           with_balance=with_balance))
+
+    cases = [
+        # ana pencere: müşteri tablosu sayfaları ve sıralamalar
+        *(case(f"MainWindow müşteri sayfası: {order}",
+               lambda db, ctx, order=order: db.list_customers(None, limit=PAGE_SIZE, offset=0, order_by=order))
+          for order in ("last_name", "first_name", "tc_no", "phone", "debt")),
+        case("MainWindow müşteri sayfası: 5. sayfa, borç azalan",
+             lambda db, ctx: db.list_customers(None, limit=PAGE_SIZE, offset=4 * PAGE_SIZE,
+                                               order_by='debt', descending=True)),
+        case("list_customers: arama", lambda db, ctx: db.list_customers("yad12")),
+        case("get_customer", lambda db, ctx: db.get_customer(ctx["customer"])),
+        # müşteri dizini değişen müşterileri id listesiyle tazeler
+        case("get_customers_by_ids", lambda db, ctx: db.get_customers_by_ids(range(1, 1000, 10))),
+        case("iter_customers: tümü", lambda db, ctx: _fetch(db.iter_customers())),
+        case("get_total_debt", lambda db, ctx: db.get_total_debt()),
+        # ana pencere: Hareketler sekmesi (load_all_transactions / load_transactions_data)
+        case("MainWindow.load_all_transactions: ilk sayfa", page()),
+        case("MainWindow.load_all_transactions: 5. sayfa", page(offset=4 * PAGE_SIZE)),
+        case("MainWindow.load_all_transactions: kart, son ay", page(filters=CARD_LAST_MONTH)),
+        case("MainWindow.load_all_transactions: arama, nadir kelime", page(filters=SEARCH_RARE)),
+        # eşleşme listesi veriyle büyür
+        case("MainWindow.load_all_transactions: arama, sık kelime", page(filters=SEARCH_COMMON), linear=True),
+        case("MainWindow.load_all_transactions: arama, kart, son ay",
+             page(filters=dict(CARD_LAST_MONTH, **SEARCH_COMMON)), linear=True),
+        case("MainWindow.load_transactions_data: ilk sayfa, bakiye",
+             page("customer", with_balance=True)),
+        case("MainWindow.load_transactions_data: kart, son ay, bakiye",
+             page("customer", filters=CARD_LAST_MONTH, with_balance=True)),
+        case("MainWindow.load_transactions_data: istatistik",
+             lambda db, ctx: db.get_transaction_stats(ctx["customer"])),
+        # ana pencere: export_to_pdf (_write_statement_pdf)
+        case("MainWindow.export_to_pdf",
+             lambda db, ctx: (db.get_customer(ctx["customer"]),
+                              db.load_transactions(ctx["customer"], with_balance=True),
+                              db.get_transaction_stats(ctx["customer"]))),
+        # ayın hareket sayısı veriyle büyür
+        case("get_period_totals: son ay", lambda db, ctx: db.get_period_totals(None, LAST_MONTH), linear=True),
+        case("get_period_totals: müşteri, kart",
+             lambda db, ctx: db.get_period_totals(ctx["customer"], {'payment': 'card'})),
+        case("get_period_totals: filtresiz", lambda db, ctx: db.get_period_totals()),
+        case("get_period_totals: arama", lambda db, ctx: db.get_period_totals(None, SEARCH_COMMON), linear=True),
+        case("get_transactions", lambda db, ctx: db.get_transactions(ctx["customer"])),
+        case("list_all_transactions", lambda db, ctx: db.list_all_transactions()),
+        case("iter_audit: kayıt geçmişi",
+             lambda db, ctx: _fetch(db.iter_audit("transactions", ctx["transaction"]))),
+        case("iter_audit: tarih aralığı", lambda db, ctx: _fetch(db.iter_audit(start="2999-01-01"))),
+        case("iter_audit: kullanıcı", lambda db, ctx: _fetch(db.iter_audit(user="yok"))),
+        # yazmalar: yalnızca plan denetlenir (veriyi değiştirdikleri için süre ölçülmez)
+        case("add_customer", lambda db, ctx: ctx.update(
+            new_customer=db.add_customer("Yeni", "Müşteri", None, None, "", "", 0)), timed=False),
+        case("update_customer", lambda db, ctx: db.update_customer(
+            ctx["new_customer"], "Yeni", "Müşteri2", None, None, "", "", 0), timed=False),
+        case("add_transaction", lambda db, ctx: db.add_transaction(
+            ctx["new_customer"], 10, "deneme", "expense", "cash"), timed=False),
+        case("update_transaction", lambda db, ctx: db.update_transaction(
+            ctx["transaction"], 12, "deneme", "income", "card"), timed=False),
+        case("delete_transaction", lambda db, ctx: db.delete_transaction(ctx["transaction"]), timed=False),
+        case("merge_customers", lambda db, ctx: db.merge_customers(ctx["customer"], ctx["new_customer"]),
+             timed=False),
+        case("delete_customer", lambda db, ctx: db.delete_customer(ctx["customer"]), timed=False),
+        case("verify", lambda db, ctx: db.verify(), timed=False),
+        case("sweep", lambda db, ctx: db.sweep(), timed=False),
+    ]
+    return cases
+
+
+# --- plan ve süre
+
+def _aliases(sql):
+    aliases = {table: table for table in HOT_TABLES}
+    for table, alias in _TABLE_REF.findall(sql):
+        if alias and alias.lower() not in _NOT_ALIAS:
+            aliases[alias] = table
+    return aliases
+
+
+def explain(conn, sql, parameters=()):
+    """EXPLAIN QUERY PLAN satırlarının detay metinleri."""
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+
+
+def full_scans(sql, details):
+    """Plan detaylarından indekssiz taranan sıcak tabloların adları."""
+    aliases = _aliases(sql)
+    # alt sorgu sonuçları (CO-ROUTINE t, MATERIALIZE t) tablo değildir
+    for detail in details:
+        kind, _, name = detail.partition(" ")
+        if kind in ("CO-ROUTINE", "MATERIALIZE"):
+            aliases.pop(name, None)
+    tables = set()
+    for detail in details:
+        match = _FULL_SCAN.match(detail)
+        if match:
+            table = aliases.get(match.group(2) or match.group(1))
+            if table in HOT_TABLES:
+                tables.add(table)
+    return tables
+
+
+def _run_case(db, reader, case, ctx, repeat):
+    db.conn.statements = []
+    case.run(db, ctx)
+    statements = db.conn.statements
+    db.conn.statements = None
+    plans = []
+    seen = set()
+    problems = []
+    for sql, parameters in statements:
+        if sql in seen:
+            continue
+        seen.add(sql)
+        details = explain(reader.conn, sql, parameters)
+        plans.append((" ".join(sql.split()), details))
+        for table in sorted(full_scans(sql, details) - set(case.scans)):
+            problems.append(f"{table} tablosu indekssiz taranıyor: {' '.join(sql.split())[:120]}")
+    elapsed = None
+    if case.timed:
+        elapsed = float("inf")
+        # çok satır döndüren senaryolarda çöp toplayıcı süreyi sorgudan bağımsız şişirir
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                case.run(db, ctx)
+                elapsed = min(elapsed, time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return plans, problems, elapsed
+
+
+def _run_dataset(path, repeat):
+    db = Database(path, factory=RecordingConnection, delete_policy='cascade', user="queryplan")
+    # --keep ile saklanan eski veri kümelerinde açılışta ertelenen adımlar
+    migrate(db)
+    reader = Database(path, read_only=True)
+    try:
+        ctx = {"customer": _busiest_customer(db)}
+        ctx["transaction"] = db.conn.execute(
+            "SELECT MAX(id) FROM transactions WHERE customer_id = ? AND deleted_at IS NULL",
+            (ctx["customer"],)).fetchone()[0]
+        return [(case, *_run_case(db, reader, case, ctx, repeat)) for case in _cases()]
+    finally:
+        reader.close()
+        db.close()
+
+
+def check(rows=DEFAULT_ROWS, scale=DEFAULT_SCALE, repeat=DEFAULT_REPEAT, workdir=None, progress=None):
+    """İki veri kümesinde tüm senaryoları çalıştırır; Result listesi döner.
+
+    workdir verilirse veri kümeleri orada tutulur ve sonraki çalıştırmada yeniden
+    kullanılır (deneme veritabanı her çalıştırmada değiştiği için kopyası kullanılır).
+    """
+    temp = tempfile.mkdtemp(prefix="muhasabe-plans-")
+    try:
+        runs = []
+        for size in (rows, rows * scale):
+            path = os.path.join(temp, f"plans-{size}.db")
+            cached = os.path.join(workdir, f"plans-{size}.db") if workdir else None
+            if cached and os.path.exists(cached):
+                shutil.copyfile(cached, path)
+            else:
+                if progress:
+                    progress(f"{size} hareketli veri kümesi oluşturuluyor")
+                build_dataset(path, size)
+                if cached:
+                    os.makedirs(workdir, exist_ok=True)
+                    shutil.copyfile(path, cached)
+            if progress:
+                progress(f"{size} hareket: senaryolar çalışıyor")
+            runs.append(_run_dataset(path, repeat))
+    finally:
+        shutil.rmtree(temp, ignore_errors=True)
+
+    results = []
+    for (case, plans, problems, small), (_, _, large_problems, large) in zip(*runs):
+        problems = list(problems) + [p for p in large_problems if p not in problems]
+        if case.timed:
+            if case.linear:
+                limit, kind = small * scale * LINEAR_SLACK, "doğrusaldan"
+            else:
+                limit, kind = small * INDEX_GROWTH, "indeksli sorgu için beklenenden"
+            if large > limit + TIMING_FLOOR:
+                problems.append(f"süre {kind} hızlı büyüyor: {small * 1000:.2f} ms -> {large * 1000:.2f} ms "
+                                f"({scale}x veri, sınır {(limit + TIMING_FLOOR) * 1000:.2f} ms)")
+        results.append(Result(case, plans, problems, small, large))
+    return results
+
+
+def report(results, verbose=False, stream=None):
+    """Sonuç tablosunu yazar; sorun sayısını döner."""
+    stream = stream or sys.stdout
+    failures = 0
+    print(f"  {'senaryo':<58} {'küçük ms':>9} {'büyük ms':>9}  durum", file=stream)
+    for result in results:
+        status = "HATA" if result.problems else ("tarama" if result.case.scans else "ok")
+        failures += bool(result.problems)
+        small = f"{result.small * 1000:9.2f}" if result.small is not None else f"{'-':>9}"
+        large = f"{result.large * 1000:9.2f}" if result.large is not None else f"{'-':>9}"
+        print(f"  {result.case.name:<58} {small} {large}  {status}", file=stream)
+        for problem in result.problems:
+            print(f"      ! {problem}", file=stream)
+        if verbose or result.problems:
+            for sql, details in result.plans:
+                print(f"      {sql[:110]}", file=stream)
+                for detail in details:
+                    print(f"          {detail}", file=stream)
+    return failures
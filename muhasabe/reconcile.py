@@ -0,0 +1,402 @@
+"""Banka POS ekstrelerini kartlı hareketlerle (payment_type='card') eşleştirir.
+
+Ekstre dosyası (CSV; ayraç ve sütun adları bankaya göre değişir) satır satır okunup
+pos_lines tablosuna yazılır. Eşleştirme iç içe döngü yerine karma tablolarla yapılır:
+dönemdeki kartlı hareketler bir kez okunup (tutar, belirteç) ve (tutar, gün)
+anahtarlarıyla gruplanır, her ekstre satırı yalnızca kendi anahtarlarına bakar:
+
+1. referans: açıklamadaki provizyon/referans numarası ve tutar aynı, tarih pencere içinde
+2. tutar + tarih: tutar aynı, tarih farkı en fazla `window` gün (en yakın gün önce)
+3. öneri: kalanlar için tutar farkı `tolerance` oranında (ör. komisyon kesintisi) ve tarih
+   farkı en fazla `fuzzy_window` gün olan çiftler puanlanır; en iyi çiftler "proposed"
+   olarak kaydedilir ve elle onaylanır (confirm) ya da reddedilir (reject).
+
+Adaylar yalnızca kartlı ödemelerdir (transaction_type='income'): ekstre müşteriden
+kartla alınan tahsilatları listeler, aynı tutarlı kartlı borç kaydı tahsilat değildir.
+Reddedilen çiftler reconcile_rejections tablosunda satırın içeriğiyle (line_key) saklanır
+ve sonraki eşleştirmelerde o satıra bir daha önerilmez.
+
+Eşleşmeyen ekstre satırları status='unmatched' ile, dönemdeki eşleşmeyen hareketler
+pos_unmatched tablosunda saklanır.
+"""
+import bisect
+import csv
+import hashlib
+import re
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+
+from database import fold_text
+
+DEFAULT_WINDOW = 2
+DEFAULT_FUZZY_WINDOW = 5
+DEFAULT_TOLERANCE = 0.03
+# Bir ekstre satırı için saklanacak en fazla öneri adayı
+MAX_CANDIDATES = 3
+# pos_lines'a tek seferde yazılan satır sayısı
+INSERT_BATCH = 5000
+
+# Sütun başlıkları (fold_text ile sadeleştirilmiş) -> alan
+COLUMN_ALIASES = {
+    'date': ("tarih", "islem tarihi", "islem tar.", "valor", "date", "transaction date"),
+    'amount': ("tutar", "islem tutari", "brut tutar", "amount"),
+    'reference': ("referans", "referans no", "provizyon", "provizyon no", "onay kodu", "reference", "ref"),
+    'description': ("aciklama", "description", "isyeri", "uye isyeri"),
+}
+DATE_FORMATS = ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d",
+                "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+# Referans belirteci: en az 4 haneli sayı ya da rakam içeren 6+ karakterlik kod
+_TOKEN = re.compile(r"\b(?=[0-9a-z]*[0-9])[0-9a-z]{4,}\b")
+
+Summary = namedtuple("Summary", "statement_id lines matched proposed unmatched_lines unmatched_transactions")
+
+
+class StatementError(ValueError):
+    pass
+
+
+def line_key(when, cents, reference, description):
+    """Ekstre satırının içerikten türetilen anahtarı; aynı satır yeniden içe aktarılsa da aynıdır."""
+    text = "\x1f".join((when, str(cents), reference or "", description or ""))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def reference_tokens(*texts):
+    tokens = set()
+    for text in texts:
+        for token in _TOKEN.findall(fold_text(text)):
+            if not token.isdigit() and len(token) < 6:
+                continue
+            tokens.add(token.lstrip("0") or "0")
+    return tokens
+
+
+def parse_amount(text):
+    """'1.234,56', '1234.56', '₺ 99,90' gibi tutarları kuruşa çevirir."""
+    cleaned = re.sub(r"[^0-9,.\-]", "", text or "")
+    if not re.search(r"\d", cleaned):
+        raise StatementError(f"tutar okunamadı: {text!r}")
+    if "," in cleaned and "." in cleaned:
+        # sondaki ayraç ondalık ayracıdır
+        thousands = "." if cleaned.rfind(",") > cleaned.rfind(".") else ","
+        cleaned = cleaned.replace(thousands, "")
+    elif cleaned.count(".") > 1:
+        cleaned = cleaned.replace(".", "")
+    cleaned = cleaned.replace(",", ".")
+    try:
+        return round(float(cleaned) * 100)
+    except ValueError:
+        raise StatementError(f"tutar okunamadı: {text!r}") from None
+
+
+def parse_date(text):
+    text = (text or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise StatementError(f"tarih okunamadı: {text!r}")
+
+
+def _columns(header):
+    folded = [fold_text(h).strip() for h in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for i, name in enumerate(folded):
+            if name in aliases:
+                columns[field] = i
+                break
+    missing = {'date', 'amount'} - columns.keys()
+    if missing:
+        raise StatementError(f"ekstrede sütun bulunamadı: {', '.join(sorted(missing))} (başlık: {header})")
+    return columns
+
+
+def read_statement(f):
+    """Açık metin dosyasından (line_no, tarih, kuruş, referans, açıklama) satırlarını üretir."""
+    sample = f.read(4096)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t|")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(f, dialect)
+    columns = _columns(next(reader, []))
+    ref_col, desc_col = columns.get('reference'), columns.get('description')
+    for line_no, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            when = parse_date(row[columns['date']])
+            cents = parse_amount(row[columns['amount']])
+        except (IndexError, StatementError) as exc:
+            raise StatementError(f"{line_no}. satır: {exc}") from None
+        reference = row[ref_col].strip() if ref_col is not None and ref_col < len(row) else None
+        description = row[desc_col].strip() if desc_col is not None and desc_col < len(row) else None
+        yield line_no, when.strftime("%Y-%m-%d %H:%M:%S"), cents, reference or None, description or None
+
+
+def import_statement(db, path, window=DEFAULT_WINDOW, fuzzy_window=DEFAULT_FUZZY_WINDOW,
+                     tolerance=DEFAULT_TOLERANCE):
+    """Ekstreyi kaydeder, eşleştirir ve özetini (Summary) döner."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        with db.batch():
+            statement_id = db.conn.execute("INSERT INTO pos_statements (source) VALUES (?)", (str(path),)).lastrowid
+            lines = read_statement(f)
+            while True:
+                chunk = [(statement_id,) + line for _, line in zip(range(INSERT_BATCH), lines)]
+                if not chunk:
+                    break
+                db.conn.executemany("""
+                    INSERT INTO pos_lines (statement_id, line_no, date, amount_cents, reference, description)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, chunk)
+            db.conn.execute("""
+                UPDATE pos_statements
+                SET (period_start, period_end, line_count) =
+                    (SELECT MIN(date), MAX(date), COUNT(*) FROM pos_lines WHERE statement_id = ?)
+                WHERE id = ?
+            """, (statement_id, statement_id))
+    return match_statement(db, statement_id, window, fuzzy_window, tolerance)
+
+
+def _day(text):
+    return date.fromisoformat(text[:10]).toordinal()
+
+
+def _offsets(window):
+    # en yakın gün önce: 0, +1, -1, +2, -2 ... (ekstre genelde hareketten sonra gelir)
+    yield 0
+    for d in range(1, window + 1):
+        yield d
+        yield -d
+
+
+class _CardIndex:
+    """Dönemdeki eşleşmemiş kartlı hareketlerin karma tabloları."""
+
+    def __init__(self, rows):
+        self.by_token = defaultdict(list)
+        self.by_day = defaultdict(list)
+        self.day_amounts = defaultdict(list)
+        self.day_of = {}
+        self.used = set()
+        for tx_id, when, cents, description in rows:
+            day = _day(when)
+            self.day_of[tx_id] = day
+            self.by_day[cents, day].append(tx_id)
+            self.day_amounts[day].append((cents, tx_id))
+            for token in reference_tokens(description):
+                self.by_token[token, cents].append(tx_id)
+        for amounts in self.day_amounts.values():
+            amounts.sort()
+
+    def take(self, tx_id):
+        if tx_id in self.used:
+            return False
+        self.used.add(tx_id)
+        return True
+
+    # rejected: bu satır için reddedilmiş hareket id'leri
+    def by_reference(self, tokens, cents, day, window, rejected=()):
+        best = None
+        for token in tokens:
+            for tx_id in self.by_token.get((token, cents), ()):
+                distance = abs(self.day_of[tx_id] - day)
+                if (tx_id not in self.used and tx_id not in rejected and distance <= window
+                        and (best is None or distance < best[0])):
+                    best = (distance, tx_id)
+        return None if best is None else best[1]
+
+    def by_amount(self, cents, day, window, rejected=()):
+        for offset in _offsets(window):
+            for tx_id in self.by_day.get((cents, day - offset), ()):
+                if tx_id not in self.used and tx_id not in rejected:
+                    return tx_id
+        return None
+
+    def near(self, cents, day, window, tolerance, rejected=()):
+        # iade satırlarında tutar eksidir
+        low, high = sorted((cents * (1 - tolerance), cents * (1 + tolerance)))
+        for offset in range(-window, window + 1):
+            amounts = self.day_amounts.get(day - offset)
+            if not amounts:
+                continue
+            i = bisect.bisect_left(amounts, (low, -1))
+            while i < len(amounts) and amounts[i][0] <= high:
+                candidate_cents, tx_id = amounts[i]
+                if tx_id not in self.used and tx_id not in rejected:
+                    yield tx_id, candidate_cents, abs(offset)
+                i += 1
+
+
+def match_statement(db, statement_id, window=DEFAULT_WINDOW, fuzzy_window=DEFAULT_FUZZY_WINDOW,
+                    tolerance=DEFAULT_TOLERANCE):
+    """Ekstrenin onaylanmamış satırlarını yeniden eşleştirir; onaylı eşleşmelere dokunmaz."""
+    row = db.conn.execute("SELECT period_start, period_end FROM pos_statements WHERE id = ?",
+                          (statement_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"ekstre bulunamadı: {statement_id}")
+    period_start, period_end = row
+    if period_start is None:
+        return Summary(statement_id, 0, 0, 0, 0, 0)
+    reach = max(window, fuzzy_window)
+    start = (date.fromisoformat(period_start[:10]) - timedelta(days=reach)).isoformat()
+    end = (date.fromisoformat(period_end[:10]) + timedelta(days=reach + 1)).isoformat()
+
+    with db.batch():
+        db.conn.execute("""
+            UPDATE pos_lines SET status = 'unmatched', transaction_id = NULL, score = NULL
+            WHERE statement_id = ? AND status IN ('matched', 'proposed')
+        """, (statement_id,))
+        # başka satırlarla (bu ya da önceki ekstreler) eşleşmiş hareketler aday değildir
+        index = _CardIndex(db.conn.execute("""
+            SELECT t.id, t.date, CAST(ROUND(t.amount * 100) AS INTEGER), t.description
+            FROM transactions t
+            WHERE t.deleted_at IS NULL AND t.payment_type = 'card' AND t.transaction_type = 'income'
+              AND t.date >= ? AND t.date < ?
+              AND t.customer_id NOT IN (SELECT id FROM customers WHERE deleted_at IS NOT NULL)
+              AND NOT EXISTS (SELECT 1 FROM pos_lines p WHERE p.transaction_id = t.id)
+        """, (start, end)))
+        # reddetme elle yapılır, tablo küçüktür; tamamı bir kez okunur
+        rejections = defaultdict(set)
+        for key, tx_id in db.conn.execute("SELECT line_key, transaction_id FROM reconcile_rejections"):
+            rejections[key].add(tx_id)
+
+        lines = db.conn.execute("""
+            SELECT id, date, amount_cents, reference, description FROM pos_lines
+            WHERE statement_id = ? AND status = 'unmatched'
+            ORDER BY id
+        """, (statement_id,)).fetchall()
+        updates = []
+        remaining = []
+        for line_id, when, cents, reference, description in lines:
+            day = _day(when)
+            rejected = rejections.get(line_key(when, cents, reference, description), ()) if rejections else ()
+            tx_id = index.by_reference(reference_tokens(reference, description), cents, day, window, rejected)
+            if tx_id is not None:
+                index.take(tx_id)
+                updates.append(('matched', tx_id, 1.0, line_id))
+                continue
+            tx_id = index.by_amount(cents, day, window, rejected)
+            if tx_id is not None:
+                index.take(tx_id)
+                updates.append(('matched', tx_id, 1.0 - abs(index.day_of[tx_id] - day) / (window + 1) / 10, line_id))
+                continue
+            remaining.append((line_id, cents, day, rejected))
+
+        # öneriler: tüm adaylar puanlanır, en yüksek puanlı çiftler sırayla atanır
+        pairs = []
+        for line_id, cents, day, rejected in remaining:
+            candidates = []
+            for tx_id, tx_cents, distance in index.near(cents, day, fuzzy_window, tolerance, rejected):
+                amount_gap = abs(tx_cents - cents) / max(abs(cents), 1) / tolerance if tolerance else 0
+                score = 1.0 - 0.5 * amount_gap - 0.5 * distance / (fuzzy_window + 1)
+                candidates.append((score, tx_id))
+            candidates.sort(reverse=True)
+            pairs.extend((score, line_id, tx_id) for score, tx_id in candidates[:MAX_CANDIDATES])
+        pairs.sort(reverse=True)
+        proposed = set()
+        for score, line_id, tx_id in pairs:
+            if line_id in proposed or not index.take(tx_id):
+                continue
+            proposed.add(line_id)
+            updates.append(('proposed', tx_id, round(score, 3), line_id))
+
+        db.conn.executemany("UPDATE pos_lines SET status = ?, transaction_id = ?, score = ? WHERE id = ?", updates)
+        _store_unmatched_transactions(db, statement_id, period_start, period_end)
+    return summarize(db, statement_id)
+
+
+def _store_unmatched_transactions(db, statement_id, period_start, period_end):
+    db.conn.execute("DELETE FROM pos_unmatched WHERE statement_id = ?", (statement_id,))
+    end = (date.fromisoformat(period_end[:10]) + timedelta(days=1)).isoformat()
+    db.conn.execute("""
+        INSERT INTO pos_unmatched (statement_id, transaction_id)
+        SELECT ?, t.id FROM transactions t
+        WHERE t.deleted_at IS NULL AND t.payment_type = 'card' AND t.transaction_type = 'income'
+          AND t.date >= ? AND t.date < ?
+          AND t.customer_id NOT IN (SELECT id FROM customers WHERE deleted_at IS NOT NULL)
+          AND NOT EXISTS (SELECT 1 FROM pos_lines p WHERE p.transaction_id = t.id)
+    """, (statement_id, period_start[:10], end))
+
+
+def summarize(db, statement_id):
+    counts = dict(db.conn.execute(
+        "SELECT status, COUNT(*) FROM pos_lines WHERE statement_id = ? GROUP BY status", (statement_id,)))
+    unmatched_tx = db.conn.execute("SELECT COUNT(*) FROM pos_unmatched WHERE statement_id = ?",
+                                   (statement_id,)).fetchone()[0]
+    return Summary(statement_id, sum(counts.values()),
+                   counts.get('matched', 0) + counts.get('confirmed', 0), counts.get('proposed', 0),
+                   counts.get('unmatched', 0), unmatched_tx)
+
+
+def iter_lines(db, statement_id, status=None):
+    """(id, line_no, tarih, tutar, referans, açıklama, durum, hareket id, puan) satırları."""
+    sql = """SELECT id, line_no, date, amount_cents / 100.0, reference, description, status, transaction_id, score
+             FROM pos_lines WHERE statement_id = ?"""
+    params = [statement_id]
+    if status:
+        sql += " AND status = ?"
+        params.append(status)
+    return db.conn.execute(sql + " ORDER BY id", params)
+
+
+def iter_unmatched_transactions(db, statement_id):
+    """Ekstre döneminde eşleşmeyen kartlı ödemeler (iter_transactions satır biçiminde)."""
+    return db.conn.execute("""
+        SELECT t.id, t.customer_id, c.first_name || ' ' || c.last_name, t.date,
+               t.transaction_type, t.payment_type, t.amount, t.description
+        FROM pos_unmatched u
+        JOIN transactions t ON t.id = u.transaction_id
+        LEFT JOIN customers c ON c.id = t.customer_id
+        WHERE u.statement_id = ? AND t.deleted_at IS NULL
+        ORDER BY t.date, t.id
+    """, (statement_id,))
+
+
+def confirm(db, line_id, transaction_id=None):
+    """Öneriyi (ya da elle verilen hareketi) ekstre satırıyla eşleşmiş olarak onaylar."""
+    row = db.conn.execute("SELECT statement_id, transaction_id, date, amount_cents, reference, description "
+                          "FROM pos_lines WHERE id = ?", (line_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"ekstre satırı bulunamadı: {line_id}")
+    statement_id, proposed = row[:2]
+    transaction_id = transaction_id or proposed
+    if transaction_id is None:
+        raise ValueError("onaylanacak öneri yok; hareket id'si verin")
+    with db.batch():
+        other = db.conn.execute("SELECT id FROM pos_lines WHERE transaction_id = ? AND id != ?",
+                                (transaction_id, line_id)).fetchone()
+        if other is not None:
+            raise ValueError(f"hareket {transaction_id} zaten {other[0]} numaralı satırla eşleşmiş")
+        db.conn.execute("UPDATE pos_lines SET status = 'confirmed', transaction_id = ?, score = NULL WHERE id = ?",
+                        (transaction_id, line_id))
+        db.conn.execute("DELETE FROM pos_unmatched WHERE transaction_id = ?", (transaction_id,))
+        # daha önce reddedilmiş çift elle onaylandıysa ret geçersizdir
+        db.conn.execute("DELETE FROM reconcile_rejections WHERE line_key = ? AND transaction_id = ?",
+                        (line_key(*row[2:]), transaction_id))
+
+
+def reject(db, line_id):
+    """Eşleşmeyi/öneriyi kaldırır ve çifti bir daha önerilmemek üzere kaydeder; hareket ekstre
+    dönemindeyse eşleşmeyenlere döner."""
+    row = db.conn.execute("SELECT statement_id, transaction_id, date, amount_cents, reference, description "
+                          "FROM pos_lines WHERE id = ?", (line_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"ekstre satırı bulunamadı: {line_id}")
+    statement_id, transaction_id = row[:2]
+    with db.batch():
+        db.conn.execute("UPDATE pos_lines SET status = 'unmatched', transaction_id = NULL, score = NULL WHERE id = ?",
+                        (line_id,))
+        if transaction_id is not None:
+            db.conn.execute("INSERT OR IGNORE INTO reconcile_rejections (line_key, transaction_id) VALUES (?, ?)",
+                            (line_key(*row[2:]), transaction_id))
+            db.conn.execute("""
+                INSERT OR IGNORE INTO pos_unmatched (statement_id, transaction_id)
+                SELECT s.id, t.id FROM pos_statements s, transactions t
+                WHERE s.id = ? AND t.id = ? AND t.deleted_at IS NULL
+                  AND date(t.date) BETWEEN date(s.period_start) AND date(s.period_end)
+            """, (statement_id, transaction_id))
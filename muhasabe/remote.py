@@ -0,0 +1,253 @@
+"""Database ile aynı arayüzü HTTP API (server.py) üzerinden sunan istemci.
+
+Arayüz `python app2.py --server http://host:port` ile başlatıldığında yerel
+SQLite dosyası yerine bu sınıf kullanılır. Satırlar Database'in döndürdüğü
+demetlerle aynı biçimdedir; böylece pencere, müşteri dizini ve dışa aktarma
+kodu değişmeden çalışır.
+"""
+import getpass
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from columns import TransactionColumns
+from server import CUSTOMER_FIELDS, TRANSACTION_FIELDS, TRANSACTION_LIST_FIELDS
+from tracing import TRACER
+
+# generation sorgusunun önbellekte tutulacağı süre (saniye)
+GENERATION_TTL = 0.5
+PAGE_SIZE = 1000
+
+
+class RemoteError(Exception):
+    pass
+
+
+def _filter_params(filters):
+    filters = filters or {}
+    params = {'type': filters.get('type'), 'payment': filters.get('payment'),
+              'from': filters.get('start_date'), 'to': filters.get('end_date'), 'q': filters.get('search')}
+    return {k: str(v) for k, v in params.items() if v}
+
+
+class _PagedCursor:
+    """iter_transactions sonucu; sqlite3 imleci gibi fetchmany ve yineleme destekler."""
+
+    def __init__(self, remote, params, page_size=PAGE_SIZE, offset=0, limit=None, fields=TRANSACTION_LIST_FIELDS):
+        self.remote = remote
+        self.params = params
+        self.page_size = page_size
+        self.offset = offset
+        self.remaining = limit
+        self.fields = fields
+        self.buffer = []
+        self.exhausted = limit == 0
+
+    def _fill(self, size):
+        while len(self.buffer) < size and not self.exhausted:
+            count = self.page_size if self.remaining is None else min(self.page_size, self.remaining)
+            page = self.remote._get("/transactions", dict(self.params, limit=count, offset=self.offset))
+            self.offset += len(page)
+            if self.remaining is not None:
+                self.remaining -= len(page)
+            self.exhausted = len(page) < count or self.remaining == 0
+            self.buffer.extend(tuple(r[f] for f in self.fields) for r in page)
+
+    def fetchmany(self, size=PAGE_SIZE):
+        self._fill(size)
+        rows, self.buffer = self.buffer[:size], self.buffer[size:]
+        return rows
+
+    def fetchall(self):
+        rows = []
+        while True:
+            chunk = self.fetchmany(self.page_size)
+            if not chunk:
+                return rows
+            rows.extend(chunk)
+
+    def __iter__(self):
+        while True:
+            chunk = self.fetchmany(self.page_size)
+            if not chunk:
+                return
+            yield from chunk
+
+
+class RemoteDatabase:
+    path = None
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url if "://" in url else "http://" + url)
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        # sunucudaki audit_log'a bu kullanıcı adıyla yazılır
+        self.user = os.environ.get("MUHASABE_USER") or getpass.getuser()
+        self._conn = None
+        self._lock = threading.Lock()
+        self._generation = None
+        self._generation_checked = 0.0
+        self.delete_policy = self._get("/health").get("delete_policy", "cascade")
+
+    def _request(self, method, path, params=None, body=None):
+        if params:
+            path += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"X-User": self.user}
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        with self._lock:
+            for attempt in (0, 1):
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self._conn.request(method, path, body=data, headers=headers)
+                    response = self._conn.getresponse()
+                    payload = json.loads(response.read() or b"null")
+                    break
+                except (ConnectionError, http.client.HTTPException):
+                    # sunucu boştaki bağlantıyı kapatmış olabilir; bir kez yeniden dene
+                    self._conn.close()
+                    self._conn = None
+                    if attempt:
+                        raise
+        if TRACER.active:
+            # uzak kullanımda veritabanı süresi HTTP gidiş-dönüşüdür
+            TRACER.sql(f"{method} {path}", started, time.perf_counter(),
+                       len(payload) if isinstance(payload, list) else 0)
+        if response.status == 409:
+            raise sqlite3.IntegrityError(payload.get("error"))
+        if response.status == 404:
+            return None
+        if response.status >= 400:
+            raise RemoteError(f"{method} {path}: {response.status} {payload.get('error')}")
+        return payload
+
+    def _get(self, path, params=None):
+        return self._request("GET", path, params)
+
+    def _write(self, method, path, body=None):
+        result = self._request(method, path, body=body)
+        # kendi yazmamızdan sonra sayacı hemen yeniden sor
+        self._generation_checked = 0.0
+        return result
+
+    def reopen(self):
+        return RemoteDatabase(self.url, self.timeout)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- önbellek sayacı
+
+    @property
+    def generation(self):
+        now = time.monotonic()
+        if self._generation is None or now - self._generation_checked > GENERATION_TTL:
+            self._generation = self._get("/changes")["generation"]
+            self._generation_checked = now
+        return self._generation
+
+    def customer_generation(self, customer_id):
+        # sunucu müşteri başına sayaç yayımlamaz; herhangi bir yazma tüm görünümleri geçersiz kılar
+        return self.generation
+
+    def changes_since(self, generation):
+        result = self._get("/changes", {"since": generation})
+        return None if result["customers"] is None else set(result["customers"])
+
+    # --- müşteriler
+
+    @staticmethod
+    def _customer_body(first_name, last_name, tc_no, phone, address, notes, debt):
+        return {"first_name": first_name, "last_name": last_name, "tc_no": tc_no, "phone": phone,
+                "address": address, "notes": notes, "debt": debt}
+
+    def add_customer(self, *args):
+        return self._write("POST", "/customers", self._customer_body(*args))["id"]
+
+    def update_customer(self, cust_id, *args):
+        self._write("PUT", f"/customers/{int(cust_id)}", self._customer_body(*args))
+
+    def delete_customer(self, cust_id):
+        self._write("DELETE", f"/customers/{int(cust_id)}")
+
+    def get_customer(self, customer_id):
+        row = self._get(f"/customers/{int(customer_id)}")
+        return tuple(row[f] for f in CUSTOMER_FIELDS) if row else None
+
+    def get_customers_by_ids(self, customer_ids):
+        rows = []
+        customer_ids = list(customer_ids)
+        for start in range(0, len(customer_ids), 500):
+            chunk = customer_ids[start:start + 500]
+            rows.extend(self._get("/customers", {"ids": ",".join(str(int(i)) for i in chunk)}))
+        return [tuple(r[f] for f in CUSTOMER_FIELDS) for r in rows]
+
+    def list_customers(self, filter_text=None, limit=None, offset=0, order_by='last_name', descending=False):
+        rows = self._get("/customers", {"q": filter_text, "limit": limit, "offset": offset or None,
+                                        "order": order_by, "desc": "1" if descending else None})
+        return [tuple(r[f] for f in CUSTOMER_FIELDS) for r in rows]
+
+    def get_total_debt(self):
+        return float(self._get("/stats")["total_debt"])
+
+    # --- hareketler
+
+    @staticmethod
+    def _transaction_body(amount, description, transaction_type, payment_type, date=None):
+        return {"amount": amount, "description": description, "transaction_type": transaction_type,
+                "payment_type": payment_type, "date": str(date) if date else None}
+
+    def add_transaction(self, customer_id, amount, description, transaction_type, payment_type, date=None):
+        body = self._transaction_body(amount, description, transaction_type, payment_type, date)
+        body["customer_id"] = int(customer_id)
+        self._write("POST", "/transactions", body)
+
+    def update_transaction(self, transaction_id, amount, description, transaction_type, payment_type, date=None):
+        body = self._transaction_body(amount, description, transaction_type, payment_type, date)
+        return self._write("PUT", f"/transactions/{int(transaction_id)}", body) is not None
+
+    def delete_transaction(self, transaction_id):
+        return self._write("DELETE", f"/transactions/{int(transaction_id)}") is not None
+
+    def get_transactions(self, customer_id):
+        rows = self._get(f"/customers/{int(customer_id)}/transactions") or []
+        return [tuple(r[f] for f in TRANSACTION_FIELDS) for r in rows]
+
+    def get_transaction_stats(self, customer_id):
+        return self._get(f"/customers/{int(customer_id)}/stats")
+
+    def list_all_transactions(self):
+        # (id, amount, description, transaction_type, payment_type, date, customer_name)
+        return [(r[0], r[6], r[7], r[4], r[5], r[3], r[2]) for r in self.iter_transactions() if r[2] is not None]
+
+    def iter_transactions(self, customer_id=None, filters=None, limit=None, offset=0, with_balance=False):
+        params = _filter_params(filters)
+        if customer_id is not None:
+            params["customer"] = int(customer_id)
+        fields = TRANSACTION_LIST_FIELDS
+        if with_balance:
+            params["balance"] = 1
+            fields += ("balance",)
+        return _PagedCursor(self, params, offset=offset, limit=limit, fields=fields)
+
+    def load_transactions(self, customer_id=None, filters=None, with_balance=False):
+        cursor = self.iter_transactions(customer_id, filters, with_balance=with_balance)
+        return TransactionColumns.from_cursor(cursor, with_balance)
+
+    def get_period_totals(self, customer_id=None, filters=None):
+        params = _filter_params(filters)
+        if customer_id is not None:
+            params["customer"] = int(customer_id)
+        return self._get("/transactions/totals", params)
@@ -0,0 +1,407 @@
+"""Yerel ağ için JSON HTTP API sunucusu (python -m muhasabe serve).
+
+asyncio ile tek iş parçacığında bağlantıları karşılar. Okumalar her biri kendi
+salt okunur SQLite bağlantısına sahip bir iş parçacığı havuzunda, yazmalar ise tek
+bir yazıcı iş parçacığında (writequeue.WriteCoalescer) toplu onayla yürütülür;
+böylece SQLite'ın tek yazıcı kuralı kilit beklemesine dönüşmez. /metrics rota
+başına istek sayısı ve süreleri verir.
+
+Açılışta ertelenen şema geçişleri (bkz. migrations) sunucu başlarken ayrı bir
+iş parçacığında uygulanır; arama dizini hazır olana kadar açıklama araması 503 döner.
+"""
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import migrations
+from database import Database, SearchIndexPending
+from writequeue import MAX_BATCH, MAX_DELAY_MS, WriteCoalescer
+
+CUSTOMER_FIELDS = ("id", "first_name", "last_name", "tc_no", "phone", "address", "notes", "debt")
+TRANSACTION_FIELDS = ("id", "amount", "description", "transaction_type", "payment_type", "date")
+TRANSACTION_LIST_FIELDS = ("id", "customer_id", "customer_name", "date", "transaction_type",
+                           "payment_type", "amount", "description")
+
+MAX_BODY = 1 << 20
+# /metrics gecikme dağılımı sınırları (ms)
+LATENCY_BUCKETS = (1, 5, 10, 50, 100, 500, 1000)
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+            503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _customer(row):
+    return dict(zip(CUSTOMER_FIELDS, row)) if row else None
+
+
+def _filters(query):
+    return {
+        'type': query.get('type'),
+        'payment': query.get('payment'),
+        'start_date': query.get('from'),
+        'end_date': query.get('to'),
+        'search': query.get('q'),
+    }
+
+
+def _int(query, name, default=None):
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(400, f"{name} tamsayı olmalı")
+
+
+def _customer_args(body):
+    try:
+        return (body['first_name'], body['last_name'], body.get('tc_no'), body.get('phone'),
+                body.get('address'), body.get('notes'), float(body.get('debt') or 0))
+    except KeyError as exc:
+        raise HttpError(400, f"eksik alan: {exc.args[0]}")
+
+
+def _transaction_args(body):
+    try:
+        args = (float(body['amount']), body.get('description'), body['transaction_type'],
+                body['payment_type'])
+    except KeyError as exc:
+        raise HttpError(400, f"eksik alan: {exc.args[0]}")
+    if args[2] not in ('income', 'expense') or args[3] not in ('cash', 'card'):
+        raise HttpError(400, "geçersiz hareket veya ödeme türü")
+    return args
+
+
+# --- rota işleyicileri: (db, yol parametreleri, sorgu, gövde) -> (durum, yanıt)
+
+def h_health(db, params, query, body):
+    return 200, {"status": "ok", "delete_policy": db.delete_policy}
+
+
+def h_stats(db, params, query, body):
+    count = db.conn.execute("SELECT customer_count FROM customer_totals WHERE id = 1").fetchone()[0]
+    return 200, {"customer_count": count, "total_debt": db.get_total_debt()}
+
+
+def h_list_customers(db, params, query, body):
+    if query.get('ids'):
+        ids = [int(x) for x in query['ids'].split(",") if x]
+        return 200, [_customer(r) for r in db.get_customers_by_ids(ids)]
+    rows = db.list_customers(query.get('q') or None, limit=_int(query, 'limit'), offset=_int(query, 'offset', 0),
+                             order_by=query.get('order', 'last_name'), descending=query.get('desc') == '1')
+    return 200, [_customer(r) for r in rows]
+
+
+def h_get_customer(db, params, query, body):
+    row = db.get_customer(int(params[0]))
+    if row is None:
+        raise HttpError(404, "müşteri bulunamadı")
+    return 200, _customer(row)
+
+
+def h_add_customer(db, params, query, body):
+    return 201, {"id": db.add_customer(*_customer_args(body))}
+
+
+def h_update_customer(db, params, query, body):
+    db.update_customer(int(params[0]), *_customer_args(body))
+    return 200, {"id": int(params[0])}
+
+
+def h_delete_customer(db, params, query, body):
+    db.delete_customer(int(params[0]))
+    return 200, {"id": int(params[0])}
+
+
+def h_customer_transactions(db, params, query, body):
+    return 200, [dict(zip(TRANSACTION_FIELDS, r)) for r in db.get_transactions(int(params[0]))]
+
+
+def h_customer_stats(db, params, query, body):
+    return 200, db.get_transaction_stats(int(params[0]))
+
+
+def h_list_transactions(db, params, query, body):
+    with_balance = bool(_int(query, 'balance', 0))
+    cursor = db.iter_transactions(_int(query, 'customer'), _filters(query),
+                                  limit=_int(query, 'limit'), offset=_int(query, 'offset', 0),
+                                  with_balance=with_balance)
+    fields = TRANSACTION_LIST_FIELDS + ("balance",) if with_balance else TRANSACTION_LIST_FIELDS
+    return 200, [dict(zip(fields, r)) for r in cursor]
+
+
+def h_transaction_totals(db, params, query, body):
+    return 200, db.get_period_totals(_int(query, 'customer'), _filters(query))
+
+
+def h_add_transaction(db, params, query, body):
+    if 'customer_id' not in body:
+        raise HttpError(400, "eksik alan: customer_id")
+    db.add_transaction(int(body['customer_id']), *_transaction_args(body), date=body.get('date'))
+    return 201, {"customer_id": int(body['customer_id'])}
+
+
+def h_update_transaction(db, params, query, body):
+    if not db.update_transaction(int(params[0]), *_transaction_args(body), date=body.get('date')):
+        raise HttpError(404, "hareket bulunamadı")
+    return 200, {"id": int(params[0])}
+
+
+def h_delete_transaction(db, params, query, body):
+    if not db.delete_transaction(int(params[0])):
+        raise HttpError(404, "hareket bulunamadı")
+    return 200, {"id": int(params[0])}
+
+
+def h_search(db, params, query, body):
+    rows = db.list_customers(query.get('q') or None, limit=_int(query, 'limit', 50))
+    return 200, [_customer(r) for r in rows]
+
+
+def h_changes(db, params, query, body):
+    # db yazıcının onayladığı sayaçtır (writequeue.CommittedChanges); istemci önbellekleri
+    # (CustomerDirectory) bununla yenilenir
+    since = _int(query, 'since')
+    changed = None if since is None else db.changes_since(since)
+    return 200, {"generation": db.generation, "customers": None if changed is None else sorted(changed)}
+
+
+# (yöntem, yol, tür, işleyici); tür 'read' okuma havuzunda, 'write' yazıcıda çalışır,
+# 'state' SQLite'a gitmeden yazıcının yayımladığı sayaçla hemen yanıtlanır
+ROUTES = [
+    ("GET", r"/health", "read", h_health),
+    ("GET", r"/stats", "read", h_stats),
+    ("GET", r"/customers", "read", h_list_customers),
+    ("POST", r"/customers", "write", h_add_customer),
+    ("GET", r"/customers/(\d+)", "read", h_get_customer),
+    ("PUT", r"/customers/(\d+)", "write", h_update_customer),
+    ("DELETE", r"/customers/(\d+)", "write", h_delete_customer),
+    ("GET", r"/customers/(\d+)/transactions", "read", h_customer_transactions),
+    ("GET", r"/customers/(\d+)/stats", "read", h_customer_stats),
+    ("GET", r"/transactions", "read", h_list_transactions),
+    ("GET", r"/transactions/totals", "read", h_transaction_totals),
+    ("POST", r"/transactions", "write", h_add_transaction),
+    ("PUT", r"/transactions/(\d+)", "write", h_update_transaction),
+    ("DELETE", r"/transactions/(\d+)", "write", h_delete_transaction),
+    ("GET", r"/search", "read", h_search),
+    ("GET", r"/changes", "state", h_changes),
+]
+_COMPILED = [(method, re.compile(path + "$"), kind, handler) for method, path, kind, handler in ROUTES]
+
+
+def _as_user(db, user, handler, *args):
+    # audit_log'da değişikliği yapan istemcinin kullanıcısı görünsün
+    default, db.user = db.user, user or db.user
+    try:
+        return handler(db, *args)
+    finally:
+        db.user = default
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, status, elapsed_ms):
+        with self._lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                              "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+            entry["count"] += 1
+            entry["errors"] += status >= 400
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            bucket = next((i for i, limit in enumerate(LATENCY_BUCKETS) if elapsed_ms <= limit), len(LATENCY_BUCKETS))
+            entry["buckets"][bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for route, entry in self.routes.items():
+                routes[route] = dict(entry, avg_ms=entry["total_ms"] / entry["count"],
+                                     buckets=dict(zip([f"<={b}ms" for b in LATENCY_BUCKETS] + ["slower"],
+                                                      entry["buckets"])))
+            return {"uptime_s": round(time.time() - self.started, 1), "routes": routes}
+
+
+class ApiServer:
+    def __init__(self, db_path, host="127.0.0.1", port=8765, read_workers=4,
+                 batch_ms=MAX_DELAY_MS, batch_size=MAX_BATCH):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.metrics = Metrics()
+        self.writer = WriteCoalescer(db_path, max_delay_ms=batch_ms, max_batch=batch_size)
+        self._local = threading.local()
+        self._readers = ThreadPoolExecutor(read_workers, thread_name_prefix="db-reader")
+        self._server = None
+        self._stopping = threading.Event()
+        self._migration_db = None
+        self._migrations = threading.Thread(target=self._migrate, name="db-migrate", daemon=True)
+
+    def _read(self, handler, *args):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # şema yazıcı açılırken denetlendi; okuyucular dosyayı salt okunur açar
+            db = self._local.db = Database(self.db_path, read_only=True)
+        return handler(db, *args)
+
+    def _migrate(self):
+        db = self._migration_db = Database(self.db_path)
+        try:
+            if not migrations.pending(db):
+                return
+            print("bekleyen şema geçişleri arka planda uygulanıyor", flush=True)
+            if migrations.migrate(db, stop=self._stopping.is_set):
+                return
+            # satırlar başka bağlantıda değişti; istemci önbellekleri yenilensin
+            self.writer.submit(lambda writer_db: writer_db._bump())
+            print("şema geçişleri tamamlandı", flush=True)
+        except Exception:
+            if not self._stopping.is_set():
+                print("şema geçişi hata:\n", traceback.format_exc(), flush=True)
+        finally:
+            self._migration_db = None
+            db.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._migrations.start()
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self._stopping.set()
+        db = self._migration_db
+        if db is not None:
+            # tek ifadede süren indeks kurulumunu da keser; adım sonraki açılışta sürer
+            try:
+                db.conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass
+        if self._migrations.is_alive():
+            self._migrations.join()
+        self._readers.shutdown(wait=True)
+        self.writer.close()
+
+    async def dispatch(self, method, target, body, user=None):
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/metrics":
+            snapshot = self.metrics.snapshot()
+            snapshot["writes"] = {"batches": self.writer.batches, "operations": self.writer.operations}
+            return "/metrics", 200, snapshot
+        path_matched = False
+        for route_method, pattern, kind, handler in _COMPILED:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+            route = f"{method} {pattern.pattern[:-1]}"
+            try:
+                data = json.loads(body) if body else {}
+                if kind == "state":
+                    status, payload = handler(self.writer.committed, match.groups(), query, data)
+                else:
+                    if kind == "write":
+                        future = self.writer.submit(_as_user, user, handler, match.groups(), query, data)
+                    else:
+                        future = self._readers.submit(self._read, handler, match.groups(), query, data)
+                    status, payload = await asyncio.wrap_future(future)
+            except HttpError as exc:
+                status, payload = exc.status, {"error": str(exc)}
+            except SearchIndexPending as exc:
+                if self._migrations.is_alive():
+                    exc = "açıklama arama dizini hazırlanıyor; şema geçişleri bitince yeniden deneyin"
+                status, payload = 503, {"error": str(exc)}
+            except sqlite3.IntegrityError as exc:
+                status, payload = 409, {"error": str(exc)}
+            except (ValueError, TypeError) as exc:
+                status, payload = 400, {"error": str(exc)}
+            except Exception as exc:
+                status, payload = 500, {"error": repr(exc)}
+            return route, status, payload
+        if path_matched:
+            return "405", 405, {"error": "yöntem desteklenmiyor"}
+        return "404", 404, {"error": "bulunamadı"}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                started = time.perf_counter()
+                if length > MAX_BODY:
+                    route, status, payload = "413", 413, {"error": "istek gövdesi çok büyük"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    route, status, payload = await self.dispatch(method.upper(), target, body,
+                                                                 user=headers.get("x-user"))
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write((f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                              "Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                self.metrics.record(route, status, (time.perf_counter() - started) * 1000)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def serve(db_path, host="127.0.0.1", port=8765, read_workers=4, batch_ms=MAX_DELAY_MS, batch_size=MAX_BATCH):
+    async def main():
+        server = await ApiServer(db_path, host, port, read_workers, batch_ms, batch_size).start()
+        print(f"http://{server.host}:{server.port} dinleniyor ({db_path})", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,209 @@
+"""Ajans başına ayrı veritabanı dosyası (shard) ve ajanslar arası sorgular.
+
+Kayıt dosyası (varsayılan shards.json) ajans adlarını dosyalara eşler; göreli yollar
+kayıt dosyasının klasörüne göredir:
+
+    {"shards": {"merkez": "merkez.db", "kadikoy": "ajanslar/kadikoy.db"}}
+
+Ajansa özgü iş open(ad) ile açılan sıradan bir Database üzerinden yapılır ve yalnızca
+o dosyaya dokunur; yazma kilidi ve WAL dosyası ajans başınadır, bu yüzden yeni bir ajans
+eklemek diğerlerini yavaşlatmaz. Ajanslar arası rapor, arama ve hareket listesi her
+shard için ayrı iş parçacığında, ayrı salt okunur bağlantıyla koşar (sqlite3 sorgu
+sırasında GIL'i bırakır) ve sonuçlar birleştirilir. ATTACH kullanılmaz: bir bağlantıya
+en fazla 10 dosya eklenebilir ve tek bağlantının sorgusu tek iş parçacığında ilerler.
+Birleşik satırların başında shard adı bulunur; müşteri ve hareket id'leri yalnızca
+kendi shard'ı içinde tekildir.
+"""
+import heapq
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from database import Database, SearchIndexPending
+
+REGISTRY_NAME = "shards.json"
+# aynı anda sorgulanan en fazla shard; fazlası sırayla bekler
+MAX_WORKERS = 8
+
+_NAME = re.compile(r"^[\w-]+$")
+
+
+class ShardError(Exception):
+    pass
+
+
+def default_registry_path():
+    return os.environ.get("MUHASABE_SHARDS") or REGISTRY_NAME
+
+
+def _shard_error(name, exc):
+    if isinstance(exc, SearchIndexPending):
+        # shard'lar salt okunur açılır ve geçişleri uygulamaz; dizini kurmak elle yapılır
+        return ShardError(f"{name}: açıklama arama dizini henüz hazır değil; "
+                          f"'python -m muhasabe --shard {name} migrate run' ile tamamlayın")
+    return ShardError(f"{name}: {exc}")
+
+
+def _tagged(name, rows):
+    for row in rows:
+        yield (name,) + tuple(row)
+
+
+class ShardRegistry:
+    """shards.json kaydı; dosya yoksa boş kayıt olarak başlar."""
+
+    def __init__(self, path=None):
+        self.path = path or default_registry_path()
+        self.base = os.path.dirname(os.path.abspath(self.path))
+        self.shards = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                try:
+                    self.shards = dict(json.load(f).get("shards", {}))
+                except (ValueError, AttributeError) as exc:
+                    raise ShardError(f"{self.path}: okunamayan shard kaydı ({exc})") from exc
+
+    def names(self):
+        return list(self.shards)
+
+    def __contains__(self, name):
+        return name in self.shards
+
+    def path_of(self, name):
+        if name not in self.shards:
+            raise ShardError(f"bilinmeyen shard: {name}")
+        return os.path.join(self.base, self.shards[name])
+
+    def open(self, name, **kwargs):
+        """Tek ajansın veritabanı; diğer shard dosyaları açılmaz."""
+        return Database(self.path_of(name), **kwargs)
+
+    def add(self, name, db_path=None):
+        """Shard'ı kaydeder ve dosyası yoksa boş şemayla oluşturur."""
+        if not _NAME.match(name):
+            raise ShardError(f"geçersiz shard adı: {name!r} (harf, rakam, - ve _ kullanın)")
+        if name in self.shards:
+            raise ShardError(f"shard zaten kayıtlı: {name}")
+        db_path = db_path or f"{name}.db"
+        if os.path.isabs(db_path):
+            relative = db_path
+        else:
+            # göreli yol çalışma klasörüne göre verilir, kayda kayıt klasörüne göre yazılır
+            relative = os.path.relpath(os.path.abspath(db_path), self.base)
+        self.shards[name] = relative
+        Database(self.path_of(name)).close()
+        self._save()
+        return self.path_of(name)
+
+    def remove(self, name):
+        """Shard'ı kayıttan çıkarır; veritabanı dosyası silinmez."""
+        self.path_of(name)
+        del self.shards[name]
+        self._save()
+
+    def _save(self):
+        # yarım yazılmış kayıt bırakmamak için geçici dosya + os.replace
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"shards": self.shards}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(temp, self.path)
+
+    # --- ajanslar arası sorgular
+
+    def _select(self, names):
+        names = self.names() if names is None else list(names)
+        for name in names:
+            self.path_of(name)
+        return names
+
+    def _reader(self, name):
+        try:
+            return Database(self.path_of(name), read_only=True)
+        except Exception as exc:
+            raise ShardError(f"{name}: {exc}") from exc
+
+    def _parallel(self, func, names):
+        # her shard kendi iş parçacığında ve kendi bağlantısıyla; sonuçlar kayıt sırasıyla
+        def run(name):
+            db = self._reader(name)
+            try:
+                return func(db)
+            except ShardError:
+                raise
+            except Exception as exc:
+                raise _shard_error(name, exc) from exc
+            finally:
+                db.close()
+
+        if not names:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(names), MAX_WORKERS)) as pool:
+            futures = [pool.submit(run, name) for name in names]
+            return [(name, future.result()) for name, future in zip(names, futures)]
+
+    def map(self, func, names=None):
+        """func(db) işlevini her shard'da paralel çalıştırır; [(ad, sonuç), ...] döner."""
+        return self._parallel(func, self._select(names))
+
+    def report(self, filters=None, names=None):
+        """Shard başına ve toplam özet; anahtarlar cli report komutuyla aynıdır."""
+        def totals(db):
+            period = db.get_period_totals(None, filters)
+            return {
+                'customer_count': db.conn.execute(
+                    "SELECT customer_count FROM customer_totals WHERE id = 1").fetchone()[0],
+                'total_customer_debt': db.get_total_debt(),
+                'transaction_count': period['count'],
+                'total_paid': period['total_paid'],
+                'total_debt': period['total_debt'],
+            }
+
+        per_shard = dict(self.map(totals, names))
+        combined = {}
+        for values in per_shard.values():
+            for key, value in values.items():
+                combined[key] = combined.get(key, 0) + value
+        return per_shard, combined
+
+    def search_customers(self, filter_text=None, limit=None, names=None):
+        """Tüm shard'larda müşteri araması; (shard, id, ad, soyad, ...) soyada göre sıralı."""
+        results = self.map(lambda db: db.list_customers(filter_text, limit), names)
+        streams = [_tagged(name, rows) for name, rows in results]
+        # list_customers soyad, ad, id sırasıyla döner; birleştirme aynı sırayı korur
+        merged = heapq.merge(*streams, key=lambda r: (r[3] or "", r[2] or "", r[1]))
+        return list(islice(merged, limit))
+
+    def iter_transactions(self, filters=None, limit=None, names=None):
+        """Tüm shard'ların hareketleri, tarihe göre yeniden eskiye birleştirilmiş akış.
+
+        Satırlar (shard,) + Database.iter_transactions satırıdır. Sorgular paralel
+        başlatılır (sıralama execute içinde yapılır), satırlar tüketildikçe okunur. Açıklama
+        aramasında da shard'lar alaka değil tarih sırasıyla döner (rank=False); birleştirme
+        buna dayanır.
+        """
+        names = self._select(names)
+        # başlatılan bağlantılar, biri hata verse de kapatılabilsin diye burada toplanır
+        opened = {}
+
+        def start(name):
+            db = opened[name] = self._reader(name)
+            try:
+                return db.iter_transactions(None, filters, limit, rank=False)
+            except Exception as exc:
+                raise _shard_error(name, exc) from exc
+
+        try:
+            if names:
+                with ThreadPoolExecutor(max_workers=min(len(names), MAX_WORKERS)) as pool:
+                    cursors = list(zip(names, pool.map(start, names)))
+            else:
+                cursors = []
+            streams = [_tagged(name, cursor) for name, cursor in cursors]
+            merged = heapq.merge(*streams, key=lambda r: (r[4], r[1]), reverse=True)
+            yield from islice(merged, limit)
+        finally:
+            for db in opened.values():
+                db.close()
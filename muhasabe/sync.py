@@ -0,0 +1,269 @@
+"""Şubeler arası artımlı eşitleme.
+
+Her veritabanı change_journal tablosuna (tetikleyicilerle) kendi değişikliklerini
+artan seq numaralarıyla yazar. export_changes belirli bir seq'ten sonraki yerel
+değişiklikleri sıkıştırılmış bir dosyaya yazar; apply_changes bu dosyayı diğer
+veritabanına uygular. Maliyet veritabanının boyutuna değil değişiklik sayısına
+bağlıdır.
+
+Satırlar dosyada (kaynak düğüm, kaynaktaki id) çiftiyle tanımlanır; alıcı bunu
+sync_id_map ile kendi id'sine çevirir, böylece iki şubede aynı id'yi alan
+kayıtlar çakışmaz. Hareketlerin borç etkisi alıcıda yeniden hesaplanır.
+"""
+import gzip
+import json
+import sqlite3
+import uuid
+
+FORMAT = "muhasabe-sync"
+VERSION = 1
+
+_TABLE_CODES = {"customers": "c", "transactions": "t"}
+_TABLE_NAMES = {code: name for name, code in _TABLE_CODES.items()}
+
+_CUSTOMER_FIELDS = ("first_name", "last_name", "tc_no", "phone", "address", "notes")
+
+
+class SyncError(Exception):
+    pass
+
+
+def node_id(db, create=True):
+    """Bu veritabanının kalıcı eşitleme kimliği (ilk çağrıda üretilir).
+
+    create=False ise kimlik henüz üretilmemişse None döner; salt okunur bağlantılar için.
+    """
+    row = db.conn.execute("SELECT value FROM sync_state WHERE key = 'node_id'").fetchone()
+    if row or not create:
+        return row[0] if row else None
+    value = uuid.uuid4().hex
+    with db.conn:
+        db.conn.execute("INSERT INTO sync_state (key, value) VALUES ('node_id', ?)", (value,))
+    return value
+
+
+def _ledger_change(amount, transaction_type):
+    # Database.add_transaction ile aynı kural: ödeme borcu azaltır, borç ekleme artırır
+    return -abs(float(amount)) if transaction_type == 'income' else abs(float(amount))
+
+
+class _KeyTranslator:
+    """Yerel id <-> (kaynak düğüm, kaynaktaki id) dönüşümü."""
+
+    def __init__(self, conn, local_node):
+        self.conn = conn
+        self.local_node = local_node
+
+    def to_key(self, table_name, local_id):
+        row = self.conn.execute(
+            "SELECT origin, remote_id FROM sync_id_map WHERE table_name = ? AND local_id = ?",
+            (table_name, local_id)).fetchone()
+        return [row[0], row[1]] if row else [self.local_node, local_id]
+
+    def to_local(self, table_name, key):
+        origin, remote_id = key
+        if origin == self.local_node:
+            return remote_id
+        row = self.conn.execute(
+            "SELECT local_id FROM sync_id_map WHERE origin = ? AND table_name = ? AND remote_id = ?",
+            (origin, table_name, remote_id)).fetchone()
+        return row[0] if row else None
+
+    def remember(self, table_name, key, local_id):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_id_map (origin, table_name, remote_id, local_id) VALUES (?, ?, ?, ?)",
+            (key[0], table_name, key[1], local_id))
+
+    def forget(self, table_name, key):
+        self.conn.execute("DELETE FROM sync_id_map WHERE origin = ? AND table_name = ? AND remote_id = ?",
+                          (key[0], table_name, key[1]))
+
+
+def journal_position(db):
+    row = db.conn.execute("SELECT MAX(seq) FROM change_journal").fetchone()
+    return row[0] or 0
+
+
+def export_changes(db, path, peer=None, since=None):
+    """since'ten (verilmezse peer'e en son gönderilenden) sonraki yerel değişiklikleri yazar.
+
+    Yazılan değişiklik sayısını döner; peer verildiyse gönderim konumu ilerletilir.
+    """
+    local_node = node_id(db)
+    if since is None:
+        row = db.conn.execute("SELECT last_seq FROM sync_sent WHERE peer = ?", (peer,)).fetchone() if peer else None
+        since = row[0] if row else 0
+    upto = journal_position(db)
+    translator = _KeyTranslator(db.conn, local_node)
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        out.write(json.dumps({"format": FORMAT, "version": VERSION, "origin": local_node,
+                              "from_seq": since, "to_seq": upto}) + "\n")
+        cursor = db.conn.execute("""
+            SELECT seq, table_name, op, row_id, payload FROM change_journal
+            WHERE seq > ? AND seq <= ? AND origin IS NULL
+            ORDER BY seq
+        """, (since, upto))
+        for seq, table_name, op, row_id, payload in cursor:
+            data = json.loads(payload) if payload else None
+            if data and table_name == "transactions":
+                data["customer_id"] = translator.to_key("customers", data["customer_id"])
+            record = [seq, _TABLE_CODES[table_name], op, translator.to_key(table_name, row_id), data]
+            out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    if peer:
+        with db.conn:
+            db.conn.execute("""
+                INSERT INTO sync_sent (peer, last_seq) VALUES (?, ?)
+                ON CONFLICT(peer) DO UPDATE SET last_seq = excluded.last_seq
+            """, (peer, upto))
+    return count
+
+
+def apply_changes(db, path):
+    """Başka bir şubeden gelen değişiklik dosyasını tek işlemde uygular.
+
+    Daha önce uygulanmış seq'ler atlanır, bu yüzden aynı dosyayı iki kez uygulamak
+    güvenlidir. {'applied', 'skipped', 'unresolved'} sayılarını döner.
+    """
+    local_node = node_id(db)
+    stats = {"applied": 0, "skipped": 0, "unresolved": 0}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise SyncError("tanınmayan eşitleme dosyası")
+        origin = header["origin"]
+        if origin == local_node:
+            raise SyncError("dosya bu veritabanından dışa aktarılmış")
+        row = db.conn.execute("SELECT last_seq FROM sync_received WHERE origin = ?", (origin,)).fetchone()
+        last_seq = row[0] if row else 0
+        if header["from_seq"] > last_seq:
+            raise SyncError(f"eksik değişiklikler: son alınan {last_seq}, dosya {header['from_seq']} sonrasından başlıyor")
+
+        translator = _KeyTranslator(db.conn, local_node)
+        conn = db.conn
+        # denetim kaydında eşitlemeyle gelen değişiklikler kaynak şubeyle görünür
+        user, db.user = db.user, f"sync:{origin}"
+        try:
+            with conn:
+                # tetikleyiciler bu işlem boyunca günlüğe kaynağı yazar, değişiklik geri gönderilmez
+                conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('apply_origin', ?)", (origin,))
+                for line in f:
+                    seq, code, op, key, data = json.loads(line)
+                    if seq <= last_seq:
+                        stats["skipped"] += 1
+                        continue
+                    if code == "c":
+                        ok = _apply_customer(conn, translator, op, key, data, soft_delete=db.delete_policy == "soft")
+                    else:
+                        ok = _apply_transaction(conn, translator, op, key, data)
+                    if ok:
+                        stats["applied"] += 1
+                    else:
+                        stats["unresolved"] += 1
+                conn.execute("DELETE FROM sync_state WHERE key = 'apply_origin'")
+                conn.execute("""
+                    INSERT INTO sync_received (origin, last_seq) VALUES (?, ?)
+                    ON CONFLICT(origin) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)
+                """, (origin, header["to_seq"]))
+        finally:
+            db.user = user
+    # önbellekler (müşteri listesi vb.) tamamen yenilensin
+    db._bump()
+    return stats
+
+
+def _apply_customer(conn, translator, op, key, data, soft_delete=False):
+    local_id = translator.to_local("customers", key)
+    if op == "I":
+        if local_id is not None:
+            return True
+        # Aynı TC no veya telefonla kayıtlı müşteri varsa aynı kişi kabul edilir
+        for column in ("tc_no", "phone"):
+            if data.get(column):
+                row = conn.execute(f"SELECT id FROM customers WHERE {column} = ?", (data[column],)).fetchone()
+                if row:
+                    translator.remember("customers", key, row[0])
+                    return True
+        cur = conn.execute(
+            "INSERT INTO customers (first_name, last_name, tc_no, phone, address, notes, debt) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            tuple(data.get(f) for f in _CUSTOMER_FIELDS) + (float(data.get("debt") or 0),))
+        translator.remember("customers", key, cur.lastrowid)
+        return True
+    if local_id is None:
+        return False
+    if op == "U":
+        values = {f: data.get(f) for f in _CUSTOMER_FIELDS}
+        try:
+            conn.execute("SAVEPOINT sync_customer")
+            _update_customer(conn, local_id, values, data.get("debt_delta") or 0)
+            conn.execute("RELEASE sync_customer")
+        except sqlite3.IntegrityError:
+            # TC no / telefon başka bir müşteride kayıtlı: bu iki alan dışında uygula
+            conn.execute("ROLLBACK TO sync_customer")
+            conn.execute("RELEASE sync_customer")
+            values.pop("tc_no")
+            values.pop("phone")
+            _update_customer(conn, local_id, values, data.get("debt_delta") or 0)
+        return True
+    # Silme yerel politikaya göre uygulanır; block politikasında bile karşı şubede
+    # silinmiş müşteri burada hareketleriyle silinir, aksi halde iki taraf ayrışır.
+    if soft_delete:
+        conn.execute("UPDATE customers SET deleted_at = datetime('now', 'localtime') WHERE id = ? AND deleted_at IS NULL",
+                     (local_id,))
+    else:
+        conn.execute("DELETE FROM transactions WHERE customer_id = ?", (local_id,))
+        conn.execute("DELETE FROM customers WHERE id = ?", (local_id,))
+    translator.forget("customers", key)
+    return True
+
+
+def _update_customer(conn, customer_id, values, debt_delta):
+    assignments = ", ".join(f"{column} = ?" for column in values)
+    conn.execute(f"UPDATE customers SET {assignments}, debt = debt + ? WHERE id = ?",
+                 tuple(values.values()) + (float(debt_delta), customer_id))
+
+
+def _apply_transaction(conn, translator, op, key, data):
+    local_id = translator.to_local("transactions", key)
+    if op == "I" and local_id is not None:
+        return True
+    if op != "I" and local_id is None:
+        return False
+    if op in ("U", "D"):
+        old = conn.execute("SELECT customer_id, amount, transaction_type FROM transactions "
+                           "WHERE id = ? AND deleted_at IS NULL", (local_id,)).fetchone()
+        if old is None:
+            return False
+        conn.execute("UPDATE customers SET debt = debt - ? WHERE id = ?", (_ledger_change(old[1], old[2]), old[0]))
+        if op == "D":
+            conn.execute("UPDATE transactions SET deleted_at = datetime('now', 'localtime') WHERE id = ?", (local_id,))
+            translator.forget("transactions", key)
+            return True
+    customer_id = translator.to_local("customers", data["customer_id"])
+    if customer_id is None:
+        return False
+    values = (customer_id, float(data["amount"]), data.get("description"), data["transaction_type"],
+              data["payment_type"], data["date"])
+    if op == "I":
+        cur = conn.execute(
+            "INSERT INTO transactions (customer_id, amount, description, transaction_type, payment_type, date) VALUES (?, ?, ?, ?, ?, ?)",
+            values)
+        translator.remember("transactions", key, cur.lastrowid)
+    else:
+        conn.execute(
+            "UPDATE transactions SET customer_id=?, amount=?, description=?, transaction_type=?, payment_type=?, date=? WHERE id=?",
+            values + (local_id,))
+    conn.execute("UPDATE customers SET debt = debt + ? WHERE id = ?",
+                 (_ledger_change(data["amount"], data["transaction_type"]), customer_id))
+    return True
+
+
+def prune_journal(db):
+    """Tüm bilinen şubelere gönderilmiş günlük kayıtlarını siler; silinen sayıyı döner."""
+    row = db.conn.execute("SELECT MIN(last_seq) FROM sync_sent").fetchone()
+    if not row or row[0] is None:
+        return 0
+    with db.conn:
+        cur = db.conn.execute("DELETE FROM change_journal WHERE seq <= ?", (row[0],))
+    return cur.rowcount
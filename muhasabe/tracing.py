@@ -0,0 +1,278 @@
+"""Arayüz eylemleri için isteğe bağlı izleme (span) kaydı.
+
+Bir eylem (ör. Filtrele) traced ile işaretlenir; izleme açıkken her çağrı bir span
+olur ve toplam süre, bunun SQLite'ta geçen kısmı, sorgu ve okunan satır sayısı ile
+oluşturulan pencere öğesi sayısı kaydedilir. SQL süresi TracedConnection ile açılmış
+bağlantılardan ölçülür. Kayıt durdurulunca dosya uzantısına göre Chrome izleme
+biçiminde JSON (chrome://tracing, Perfetto) ya da cProfile istatistikleri (.prof)
+yazılır. İzleme kapalıyken maliyet, çağrı başına bir öznitelik denetimidir.
+
+    MUHASABE_TRACE=iz.json python muhasabe/app2.py
+"""
+import cProfile
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+PROFILE_EXTENSIONS = (".prof", ".pstats")
+# Chrome izinde SQL olaylarının adı için kırpılan sorgu uzunluğu
+SQL_NAME_LENGTH = 80
+# izleme açıkken imleç üzerinde yinelenirken tek seferde okunan satır
+ITER_BATCH = 256
+
+
+class _Span:
+    __slots__ = ("name", "start", "db", "queries", "rows", "widgets")
+
+    def __init__(self, name, start, widgets):
+        self.name = name
+        self.start = start
+        self.db = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.widgets = widgets
+
+
+class Tracer:
+    """Süreç genelinde tek izleyici (bkz. TRACER); span yığını iş parçacığı başınadır."""
+
+    def __init__(self):
+        self.active = False
+        self.path = None
+        self.events = []
+        self._origin = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profile = None
+        self._widget_counter = None
+
+    def start(self, path, widget_counter=None):
+        """Kaydı başlatır; widget_counter() o an var olan pencere öğesi sayısını döner."""
+        if self.active:
+            return
+        self.path = path
+        self.events = []
+        self._origin = time.perf_counter()
+        self._widget_counter = widget_counter
+        self._profile = cProfile.Profile() if path.lower().endswith(PROFILE_EXTENSIONS) else None
+        self.active = True
+
+    def stop(self):
+        """Kaydı durdurur, dosyayı yazar ve yolunu döner."""
+        if not self.active:
+            return None
+        self.active = False
+        if self._profile is not None:
+            self._profile.dump_stats(self.path)
+        else:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return self.path
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _event(self, name, cat, start, end, args):
+        event = {"name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                 "ts": round((start - self._origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                 "args": args}
+        with self._lock:
+            self.events.append(event)
+
+    def enter(self, name):
+        stack = self._stack()
+        widgets = self._widget_counter() if self._widget_counter else 0
+        if not stack and self._profile is not None and threading.current_thread() is threading.main_thread():
+            self._profile.enable()
+        stack.append(_Span(name, time.perf_counter(), widgets))
+
+    def exit(self):
+        stack = self._stack()
+        if not stack:
+            return
+        span = stack.pop()
+        end = time.perf_counter()
+        widgets = (self._widget_counter() if self._widget_counter else 0) - span.widgets
+        if stack:
+            # üst span alt span'ların SQL süresini ve satırlarını da içerir
+            parent = stack[-1]
+            parent.db += span.db
+            parent.queries += span.queries
+            parent.rows += span.rows
+        elif self._profile is not None and threading.current_thread() is threading.main_thread():
+            self._profile.disable()
+        total = end - span.start
+        self._event(span.name, "ui", span.start, end, {
+            "db_ms": round(span.db * 1000, 3), "python_ms": round((total - span.db) * 1000, 3),
+            "queries": span.queries, "rows": span.rows, "widgets": widgets})
+
+    def span(self, name):
+        return _SpanContext(self, name)
+
+    def sql(self, sql, start, end, rows=0, executed=True):
+        """TracedConnection'dan gelen ölçüm; açık span yoksa yok sayılır."""
+        stack = self._stack()
+        if not stack:
+            return
+        span = stack[-1]
+        span.db += end - start
+        span.rows += rows
+        if executed:
+            span.queries += 1
+            text = " ".join(sql.split())
+            self._event(text[:SQL_NAME_LENGTH], "sql", start, end, {"sql": text})
+
+    def summary(self, stream=None):
+        """Span adlarına göre toplanmış süreleri yazdırır."""
+        stream = stream or sys.stderr
+        totals = {}
+        for event in self.events:
+            if event["cat"] != "ui":
+                continue
+            entry = totals.setdefault(event["name"], [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += event["dur"] / 1000
+            entry[2] += event["args"]["db_ms"]
+            entry[3] += event["args"]["rows"]
+        print(f"  {'eylem':<32} {'adet':>6} {'toplam ms':>10} {'SQL ms':>10} {'satır':>10}", file=stream)
+        for name, (count, total, db, rows) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            print(f"  {name:<32} {count:>6} {total:>10.1f} {db:>10.1f} {rows:>10}", file=stream)
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "entered")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.entered = False
+
+    def __enter__(self):
+        if self.tracer.active:
+            self.tracer.enter(self.name)
+            self.entered = True
+        return self
+
+    def __exit__(self, *exc):
+        if self.entered:
+            self.tracer.exit()
+        return False
+
+
+TRACER = Tracer()
+
+
+def traced(name=None):
+    """Metodu izleme açıkken bir span içinde çalıştıran dekoratör.
+
+    Qt sinyalleri fazladan argüman geçebilir (ör. clicked(bool)); PyQt'nin doğrudan
+    bağlanan metotlarda yaptığı gibi bunlar metodun imzasına göre kırpılır.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+        params = inspect.signature(func).parameters.values()
+        if any(p.kind == p.VAR_POSITIONAL for p in params):
+            limit = None
+        else:
+            limit = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if limit is not None:
+                args = args[:limit]
+            if not TRACER.active:
+                return func(*args, **kwargs)
+            with TRACER.span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TracedCursor(sqlite3.Cursor):
+    """execute süresini sorgu, fetch* süresini ve satır sayısını okuma olarak kaydeder."""
+
+    def execute(self, sql, parameters=()):
+        if not TRACER.active:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            TRACER.sql(sql, start, time.perf_counter())
+
+    def executemany(self, sql, seq_of_parameters):
+        if not TRACER.active:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            TRACER.sql(sql, start, time.perf_counter())
+
+    def fetchone(self):
+        if not TRACER.active:
+            return super().fetchone()
+        start = time.perf_counter()
+        row = super().fetchone()
+        TRACER.sql(None, start, time.perf_counter(), int(row is not None), executed=False)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        if not TRACER.active:
+            return super().fetchmany(size)
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        TRACER.sql(None, start, time.perf_counter(), len(rows), executed=False)
+        return rows
+
+    def __iter__(self):
+        # kapalıyken C yineleyicisi kullanılır; açıkken satırlar fetchmany ile sayılarak okunur
+        if not TRACER.active:
+            return self
+        return self._counted_rows()
+
+    def _counted_rows(self):
+        while True:
+            rows = self.fetchmany(ITER_BATCH)
+            if not rows:
+                return
+            yield from rows
+
+    def fetchall(self):
+        if not TRACER.active:
+            return super().fetchall()
+        start = time.perf_counter()
+        rows = super().fetchall()
+        TRACER.sql(None, start, time.perf_counter(), len(rows), executed=False)
+        return rows
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3.connect(..., factory=TracedConnection) ile açılan, ölçülebilir bağlantı."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if not TRACER.active:
+            return super().commit()
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            TRACER.sql("COMMIT", start, time.perf_counter())
@@ -0,0 +1,120 @@
+"""Hareket görünümleri için (müşteri, filtre) anahtarlı LRU sonuç önbelleği.
+
+Kullanıcı gün boyu aynı müşteriler ve aynı filtreler ("geçen ay / yalnızca nakit")
+arasında gidip gelir. Görünümden çıkılırken yüklenmiş sayfalar (TransactionColumns) ve
+müşteri istatistikleri burada saklanır; aynı görünüme dönüldüğünde SQLite'a hiç
+gidilmeden geri verilir. Bir kayıt, yazıldığı andaki müşteri sayacı
+(Database.customer_generation) değişmişse geçersizdir: başka müşterilere yazmak onu
+etkilemez, tüm müşteriler görünümü ise her yazmada geçersiz olur. Başka bir bağlantının
+yazması (PRAGMA data_version) kapsamı bilinmediği için tüm kayıtları geçersiz kılar.
+Toplam boyut bütçeyi aşınca en uzun süredir kullanılmayan kayıtlar atılır.
+"""
+import os
+import weakref
+from collections import OrderedDict, namedtuple
+
+# MUHASABE_VIEW_CACHE_MB=0 önbelleği kapatır
+DEFAULT_BUDGET = int(float(os.environ.get("MUHASABE_VIEW_CACHE_MB", "64")) * 1024 * 1024)
+
+_Entry = namedtuple("_Entry", "generation value size")
+
+
+def normalize_filters(filters):
+    """Filtre sözlüğünü karşılaştırılabilir anahtara çevirir.
+
+    Boş değerler atılır, tarihler (date ya da metin) 'YYYY-MM-DD' olur; böylece
+    {'type': None, 'start_date': date(2024, 1, 1)} ile {'start_date': '2024-01-01'}
+    aynı görünümü gösterir.
+    """
+    items = []
+    for key, value in (filters or {}).items():
+        if not value:
+            continue
+        if key.endswith('_date'):
+            value = str(value)[:10]
+        items.append((key, value))
+    return tuple(sorted(items))
+
+
+class ViewCache:
+    """Süreç genelinde veritabanı başına paylaşılan (bkz. shared) LRU önbellek."""
+
+    _instances = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def shared(cls, db):
+        cache = cls._instances.get(db)
+        if cache is None:
+            cache = cls._instances[db] = cls(db)
+        return cache
+
+    def __init__(self, db, budget=DEFAULT_BUDGET):
+        self.db = db
+        self.budget = budget
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def generation(self, customer_id):
+        """customer_id görünümünün geçerlilik sayacı; None tüm müşteriler demektir."""
+        if customer_id is None:
+            return self.db.generation
+        return self.db.customer_generation(customer_id)
+
+    def get(self, kind, customer_id, filters=None):
+        """Geçerli kayıt varsa değeri (en son kullanılan yapılarak), yoksa None döner."""
+        return self._lookup(kind, customer_id, filters, remove=False)
+
+    def take(self, kind, customer_id, filters=None):
+        """get gibi, ancak bulunan kayıt önbellekten çıkarılır.
+
+        Kullanılırken büyüyen değerler (sayfa eklenen TransactionColumns) için: değer
+        önbellekte eski boyutuyla kalıp bütçeyi yanıltmaz, işi bitince put ile güncel
+        boyutuyla geri konur.
+        """
+        return self._lookup(kind, customer_id, filters, remove=True)
+
+    def _lookup(self, kind, customer_id, filters, remove):
+        key = (kind, customer_id, normalize_filters(filters))
+        entry = self._entries.get(key)
+        if entry is not None and entry.generation == self.generation(customer_id):
+            if remove:
+                self._discard(key)
+            else:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+        if entry is not None:
+            self._discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, kind, customer_id, filters, value, size, generation=None):
+        """Değeri saklar; generation verilmezse şimdiki sayaç kullanılır.
+
+        Sonuç okunmaya başlamadan önce alınan sayacın verilmesi, okuma sırasında yapılan
+        bir yazmanın eski sonucu geçerli göstermesini önler.
+        """
+        key = (kind, customer_id, normalize_filters(filters))
+        self._discard(key)
+        if size > self.budget:
+            return
+        if generation is None:
+            generation = self.generation(customer_id)
+        self._entries[key] = _Entry(generation, value, size)
+        self.bytes += size
+        while self.bytes > self.budget:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,131 @@
+"""Yoğun yazma için toplu onaylı (group commit) yazma kuyruğu.
+
+Her Database değişikliği kendi işlemini onaylar; bu da saniyedeki yazma sayısını
+diske yazma (fsync) süresine bağlar. WriteCoalescer, herhangi bir iş
+parçacığından gelen değişiklikleri kuyruğa alır ve her `max_delay_ms`
+milisaniyede ya da `max_batch` işlem biriktiğinde hepsini tek işlemde onaylar.
+
+Her çağıran bir Future alır; Future ancak yazma diske onaylandıktan sonra
+sonuçlanır. Her değişiklik kendi SAVEPOINT'i içinde çalıştığından hatalı bir
+işlem yalnızca kendi Future'ına hata döndürür, partinin geri kalanı onaylanır.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from database import Database
+
+# Varsayılan toplama politikası. 0 ms beklemeden kuyrukta ne varsa alır: bir onay
+# diske yazılırken gelen istekler kendiliğinden bir sonraki partide toplanır.
+# Daha büyük değerler, seyrek yazan çok sayıda istemcide partileri büyütür.
+MAX_DELAY_MS = 0
+MAX_BATCH = 256
+
+_STOP = object()
+
+
+class CommittedChanges:
+    """Yazıcının son onayladığı partiden sonraki sayaç ve değişiklik kaydı.
+
+    Database.changes_since ile aynı yanıtı verir. Yazıcı her partiden sonra yenisini
+    yayımlar; böylece okuyan iş parçacıkları (sunucunun /changes rotası) yazma kuyruğunu
+    beklemeden ve yalnızca onaylanmış değişiklikleri görür.
+    """
+
+    changes_since = Database.changes_since
+
+    def __init__(self, db):
+        self.generation = db.generation
+        self._change_log = tuple(db._change_log)
+
+
+class WriteCoalescer:
+    def __init__(self, db_path, max_delay_ms=MAX_DELAY_MS, max_batch=MAX_BATCH):
+        if max_batch < 1 or max_delay_ms < 0:
+            raise ValueError("max_batch en az 1, max_delay_ms negatif olmayan bir sayı olmalı")
+        self.db_path = db_path
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_batch = max_batch
+        self.batches = 0
+        self.operations = 0
+        self.committed = None
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def submit(self, fn, *args, **kwargs):
+        """fn(db, *args, **kwargs) çağrısını kuyruğa ekler; sonucu taşıyan bir Future döner."""
+        future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def call(self, method, *args, **kwargs):
+        """Database yöntemini adıyla kuyruğa ekler, ör. call('add_transaction', ...)."""
+        return self.submit(lambda db: getattr(db, method)(*args, **kwargs))
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self):
+        db = Database(self.db_path)
+        self.committed = CommittedChanges(db)
+        self._ready.set()
+        try:
+            stopping = False
+            while not stopping:
+                batch = self._collect(self._queue.get())
+                if batch[-1] is _STOP:
+                    stopping = True
+                    batch.pop()
+                batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+                if batch:
+                    self._flush(db, batch)
+        finally:
+            db.close()
+
+    def _flush(self, db, batch):
+        results = []
+        try:
+            with db.batch():
+                for fn, args, kwargs, future in batch:
+                    db.conn.execute("SAVEPOINT write_op")
+                    try:
+                        results.append((future, True, fn(db, *args, **kwargs)))
+                    except Exception as exc:
+                        db.conn.execute("ROLLBACK TO write_op")
+                        results.append((future, False, exc))
+                    db.conn.execute("RELEASE write_op")
+        except Exception as exc:
+            # onay başarısız: partideki hiçbir yazma kalıcı değil
+            self.committed = CommittedChanges(db)
+            for _, _, _, future in batch:
+                future.set_exception(exc)
+            return
+        self.committed = CommittedChanges(db)
+        self.batches += 1
+        self.operations += len(batch)
+        # Future'lar yalnızca onaydan sonra sonuçlanır
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def close(self):
+        """Kuyrukta bekleyenleri yazar ve iş parçacığını durdurur."""
+        self._queue.put(_STOP)
+        self._thread.join()
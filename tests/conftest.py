@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Uygulama modülleri paket değil, muhasabe/ klasöründe düz modüllerdir (bkz. __main__.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "muhasabe"))
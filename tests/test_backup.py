@@ -0,0 +1,71 @@
+"""`backup` komutu: veritabanı eksik ya da bozukken de geri yükleyebilmeli."""
+import glob
+import os
+
+import pytest
+
+import cli
+from backup import BackupManager
+from database import Database
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "customers.db")
+    db = Database(path)
+    db.add_customer("Ali", "Yılmaz", None, "5551112233", "", "", 100)
+    db.close()
+    assert cli.main(["--db", path, "backup", "create"]) == 0
+    return path, BackupManager(path).list_snapshots()[-1]
+
+
+def customer_names(path):
+    db = Database(path, read_only=True)
+    try:
+        return [(r[1], r[2], r[7]) for r in db.list_customers()]
+    finally:
+        db.close()
+
+
+def test_restore_over_missing_database(snapshot):
+    path, gz = snapshot
+    for name in glob.glob(path + "*"):
+        os.remove(name)
+
+    assert cli.main(["--db", path, "backup", "restore", gz]) == 0
+    assert customer_names(path) == [("Ali", "Yılmaz", 100)]
+
+
+def test_restore_over_corrupt_database(snapshot):
+    path, gz = snapshot
+    for name in glob.glob(path + "-*"):
+        os.remove(name)
+    with open(path, "wb") as f:
+        f.write(b"bozuk" * 4096)
+
+    assert cli.main(["--db", path, "backup", "restore", gz]) == 0
+    assert customer_names(path) == [("Ali", "Yılmaz", 100)]
+    # bozuk dosya silinmez, incelenmek üzere kenara alınır
+    aside = glob.glob(path + ".corrupt-*")
+    assert len(aside) == 1
+    with open(aside[0], "rb") as f:
+        assert f.read(5) == b"bozuk"
+
+
+def test_restore_keeps_a_snapshot_of_the_replaced_database(snapshot):
+    path, gz = snapshot
+    db = Database(path)
+    db.add_customer("Ayşe", "Kaya", None, "5554445566", "", "", 0)
+    db.close()
+
+    assert cli.main(["--db", path, "backup", "restore", gz]) == 0
+    assert customer_names(path) == [("Ali", "Yılmaz", 100)]
+    snapshots = BackupManager(path).list_snapshots()
+    assert len(snapshots) == 2
+    assert not glob.glob(path + ".corrupt-*")
+
+
+def test_create_requires_an_existing_database(tmp_path):
+    path = str(tmp_path / "yok.db")
+    assert cli.main(["--db", path, "backup", "create"]) == 2
+    assert not os.path.exists(path)
@@ -0,0 +1,59 @@
+"""Müşteri dizini ve görünüm önbelleği başka bağlantıların yazmalarını görmeli."""
+import pytest
+
+from database import Database
+from directory import CustomerDirectory
+from viewcache import ViewCache
+
+
+@pytest.fixture
+def two_connections(tmp_path):
+    path = str(tmp_path / "customers.db")
+    gui = Database(path)
+    other = Database(path)  # CLI içe aktarma, ikinci pencere ya da sunucu
+    yield gui, other
+    gui.close()
+    other.close()
+
+
+def test_own_reads_keep_the_generation(two_connections):
+    gui, _ = two_connections
+    generation = gui.generation
+    gui.list_customers()
+    assert gui.generation == generation
+
+
+def test_directory_sees_writes_from_another_connection(two_connections):
+    gui, other = two_connections
+    gui.add_customer("Ali", "Yılmaz", None, "5551112233", "", "", 0)
+    directory = CustomerDirectory.shared(gui)
+    assert [r[1] for r in directory.rows()] == ["Ali"]
+
+    cid = other.add_customer("Ayşe", "Kaya", None, "5554445566", "", "", 0)
+    assert [r[1] for r in directory.rows()] == ["Ayşe", "Ali"]  # soyada göre
+    other.add_transaction(cid, 80, "trafik", "expense", "cash", "2024-01-06 10:00:00")
+    assert directory.get(cid)[7] == 80
+
+
+def test_view_cache_entry_is_dropped_after_another_connection_writes(two_connections):
+    gui, other = two_connections
+    cid = gui.add_customer("Ali", "Yılmaz", None, "5551112233", "", "", 0)
+    cache = ViewCache(gui)
+    cache.put("rows", cid, None, "eski", 10)
+    assert cache.get("rows", cid) == "eski"
+
+    other.add_transaction(cid, 50, "kasko", "expense", "card", "2024-01-05 10:00:00")
+    assert cache.get("rows", cid) is None
+
+
+def test_invalidate_reloads_the_directory(two_connections):
+    gui, _ = two_connections
+    gui.add_customer("Ali", "Yılmaz", None, "5551112233", "", "", 0)
+    directory = CustomerDirectory.shared(gui)
+    directory.rows()
+    # değişiklik kaydından habersiz bir yazma (ör. elle düzeltilen dosya)
+    gui.conn.execute("UPDATE customers SET first_name = 'Veli'")
+    gui.conn.commit()
+    assert [r[1] for r in directory.rows()] == ["Ali"]
+    directory.invalidate()
+    assert [r[1] for r in directory.rows()] == ["Veli"]
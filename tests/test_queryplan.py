@@ -0,0 +1,35 @@
+"""Sorgu planı denetimi (queryplan.py) pytest altında.
+
+Tam boyutlu denetim `python -m muhasabe plans` ile çalıştırılır; burada küçük veri
+kümeleriyle aynı senaryolar denenir. 5000 hareketten küçük kümelerde müşteri
+tablosu o kadar küçüktür ki planlayıcı get_customers_by_ids için haklı olarak taramayı seçer.
+"""
+import pytest
+
+import queryplan
+
+ROWS = 5000
+SCALE = 4
+
+
+@pytest.fixture(scope="module")
+def results():
+    return queryplan.check(rows=ROWS, scale=SCALE, repeat=3)
+
+
+def _problems(results, timing):
+    return {r.case.name: [p for p in r.problems if p.startswith("süre") == timing]
+            for r in results if any(p.startswith("süre") == timing for p in r.problems)}
+
+
+def test_every_scenario_ran(results):
+    assert len(results) == len(queryplan._cases())
+    assert all(r.plans for r in results)
+
+
+def test_hot_tables_use_indexes(results):
+    assert _problems(results, timing=False) == {}
+
+
+def test_timings_scale_with_row_count(results):
+    assert _problems(results, timing=True) == {}
@@ -0,0 +1,52 @@
+"""Yerel sunucu (server.py) ile uzak istemcinin (remote.py) uçtan uca denemesi."""
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from database import Database
+from remote import RemoteDatabase
+from server import ApiServer
+
+
+@pytest.fixture
+def remote(tmp_path):
+    path = str(tmp_path / "merkez.db")
+    Database(path).close()
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(ApiServer(path, port=0).start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    client = RemoteDatabase(f"http://127.0.0.1:{server.port}", timeout=10)
+    yield client
+    # önce istemci bağlantısı kapanır ki sunucu tarafındaki işleyici döngü açıkken bitsin
+    client.close()
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.close()
+
+
+def test_writes_are_visible_to_readers(remote):
+    assert remote.delete_policy == "cascade"
+    start = remote.generation
+    cid = remote.add_customer("Ali", "Yılmaz", None, "5551112233", "", "", 0)
+    remote.add_transaction(cid, 250, "kasko", "expense", "card", "2024-01-05 10:00:00")
+    remote.add_transaction(cid, 100, "ödeme", "income", "cash", "2024-01-06 10:00:00")
+
+    assert remote.generation > start
+    assert remote.changes_since(start) == {cid}
+    assert remote.get_customer(cid)[7] == 150
+    assert remote.get_total_debt() == 150
+    rows = list(remote.iter_transactions(customer_id=cid))
+    assert sorted(r[7] for r in rows) == ["kasko", "ödeme"]
+    assert [r[1] for r in remote.list_customers("Yılmaz")] == ["Ali"]
+
+
+def test_errors_map_to_client_exceptions(remote):
+    remote.add_customer("Ayşe", "Kaya", None, "5554445566", "", "", 0)
+    with pytest.raises(sqlite3.IntegrityError):
+        remote.add_customer("Ayşe", "Kaya", None, "5554445566", "", "", 0)
+    assert remote.get_customer(999) is None
@@ -0,0 +1,106 @@
+"""İki yerel veritabanı dosyası arasında export/apply gidiş-dönüşü (sync.py)."""
+import pytest
+
+import sync
+from database import Database
+
+
+@pytest.fixture
+def offices(tmp_path):
+    merkez = Database(str(tmp_path / "merkez.db"))
+    sube = Database(str(tmp_path / "sube.db"))
+    yield merkez, sube
+    merkez.close()
+    sube.close()
+
+
+def ship(source, target, path, peer):
+    """source'un peer'e gönderilmemiş değişikliklerini target'a uygular."""
+    sync.export_changes(source, str(path), peer=peer)
+    return sync.apply_changes(target, str(path))
+
+
+def ledger(db):
+    """Karşılaştırılabilir defter: id'ler şubeye göre değiştiği için ada göre."""
+    customers = {(r[1], r[2]): (r[3], r[4], round(r[7], 2)) for r in db.list_customers()}
+    transactions = sorted(
+        (r[2], r[3], r[4], r[5], r[6], r[7])
+        for r in db.iter_transactions())
+    return customers, transactions, round(db.get_total_debt(), 2)
+
+
+def test_round_trip_converges(offices, tmp_path):
+    merkez, sube = offices
+    ali = merkez.add_customer("Ali", "Yılmaz", "10000000146", "5551112233", "", "", 100)
+    ayse = merkez.add_customer("Ayşe", "Kaya", None, "5554445566", "", "", 0)
+    merkez.add_transaction(ali, 250, "kasko", "expense", "card", "2024-01-05 10:00:00")
+    merkez.add_transaction(ayse, 80, "trafik", "expense", "cash", "2024-01-06 10:00:00")
+    ship(merkez, sube, tmp_path / "m1.sync", "sube")
+    assert ledger(sube) == ledger(merkez)
+
+    # şubede alınan ödeme, merkezde düzeltilen hareket ve müşteri bilgisi
+    ali_in_sube = next(r[0] for r in sube.list_customers() if r[1] == "Ali")
+    sube.add_transaction(ali_in_sube, 120, "ödeme", "income", "cash", "2024-01-07 09:00:00")
+    kasko = next(r[0] for r in merkez.get_transactions(ali) if r[2] == "kasko")
+    merkez.update_transaction(kasko, 300, "kasko yenileme", "expense", "card", "2024-01-05 10:00:00")
+    merkez.update_customer(ayse, "Ayşe", "Kaya", None, "5559990000", "Kadıköy", "", 80)
+    trafik = next(r[0] for r in merkez.get_transactions(ayse))
+    merkez.delete_transaction(trafik)
+
+    ship(merkez, sube, tmp_path / "m2.sync", "sube")
+    ship(sube, merkez, tmp_path / "s1.sync", "merkez")
+    assert ledger(sube) == ledger(merkez)
+    customers, transactions, total = ledger(merkez)
+    assert customers[("Ali", "Yılmaz")][2] == 100 + 300 - 120
+    assert customers[("Ayşe", "Kaya")] == (None, "5559990000", 0)
+    assert [t[5] for t in transactions] == ["kasko yenileme", "ödeme"]
+    assert total == 280
+
+
+def test_merge_and_delete_are_replicated(offices, tmp_path):
+    merkez, sube = offices
+    keep = merkez.add_customer("Mehmet", "Demir", None, "5550000001", "", "", 10)
+    other = merkez.add_customer("Mehmet", "Demir ", None, "5550000002", "", "not", 5)
+    gone = merkez.add_customer("Zeynep", "Ak", None, "5550000003", "", "", 0)
+    merkez.add_transaction(keep, 40, "a", "expense", "cash", "2024-02-01 10:00:00")
+    merkez.add_transaction(other, 60, "b", "expense", "card", "2024-02-02 10:00:00")
+    merkez.add_transaction(gone, 70, "c", "expense", "cash", "2024-02-03 10:00:00")
+    ship(merkez, sube, tmp_path / "m1.sync", "sube")
+
+    merkez.merge_customers(keep, other)
+    merkez.delete_customer(gone)
+    ship(merkez, sube, tmp_path / "m2.sync", "sube")
+
+    assert ledger(sube) == ledger(merkez)
+    customers, transactions, total = ledger(sube)
+    assert list(customers) == [("Mehmet", "Demir")]
+    assert customers[("Mehmet", "Demir")][2] == 10 + 5 + 40 + 60
+    assert len(transactions) == 2
+    assert total == 115
+
+
+def test_reapplying_a_file_is_idempotent(offices, tmp_path):
+    merkez, sube = offices
+    cid = merkez.add_customer("Can", "Öz", None, None, "", "", 0)
+    merkez.add_transaction(cid, 99.9, "poliçe", "expense", "card", "2024-03-01 10:00:00")
+    path = tmp_path / "m1.sync"
+    first = ship(merkez, sube, path, "sube")
+    before = ledger(sube)
+
+    again = sync.apply_changes(sube, str(path))
+    assert first["applied"] == 2 and first["unresolved"] == 0
+    assert again == {"applied": 0, "skipped": 2, "unresolved": 0}
+    assert ledger(sube) == before
+
+    # aynı dosyanın geri gelmesi kaynağında reddedilir
+    with pytest.raises(sync.SyncError):
+        sync.apply_changes(merkez, str(path))
+
+
+def test_applied_changes_are_not_sent_back(offices, tmp_path):
+    merkez, sube = offices
+    cid = merkez.add_customer("Eda", "Sarı", None, None, "", "", 0)
+    merkez.add_transaction(cid, 10, "x", "expense", "cash", "2024-04-01 10:00:00")
+    ship(merkez, sube, tmp_path / "m1.sync", "sube")
+
+    assert sync.export_changes(sube, str(tmp_path / "s1.sync"), peer="merkez") == 0